@@ -14,9 +14,18 @@ from . import (
     ui_panel,
     operators,
     comfyui_client,
+    comfyui_websocket,
+    dispatcher,
+    result_cache,
     render_utils,
     pose_processor,
     workflow_manager,
+    pose_job,
+    profiling,
+    image_codec,
+    render_farm,
+    bone_detection,
+    triangulation,
 )
 
 modules = [
@@ -24,9 +33,18 @@ modules = [
     ui_panel,
     operators,
     comfyui_client,
+    comfyui_websocket,
+    dispatcher,
+    result_cache,
     render_utils,
     pose_processor,
     workflow_manager,
+    pose_job,
+    profiling,
+    image_codec,
+    render_farm,
+    bone_detection,
+    triangulation,
 ]
 
 
@@ -84,6 +102,34 @@ def register():
         default=True
     )
     
+    bpy.types.Scene.ai_pose_fast_capture = bpy.props.BoolProperty(
+        name="Fast Capture",
+        description="Render the rest views with flat Workbench shading instead of the scene's "
+                    "render engine. The engine is restored afterwards",
+        default=True
+    )
+    
+    bpy.types.Scene.ai_pose_bone_mask = bpy.props.BoolProperty(
+        name="Bone Mask",
+        description="Render an extra single-channel mask of the bone overlay and detect the "
+                    "rest pose bones in it instead of the red channel of the render",
+        default=True
+    )
+    
+    bpy.types.Scene.ai_pose_batch_prompts = bpy.props.PointerProperty(
+        name="Batch Prompts",
+        description="Text block with one pose prompt per line ('#' starts a comment)",
+        type=bpy.types.Text
+    )
+    
+    bpy.types.Scene.ai_pose_batch_max_in_flight = bpy.props.IntProperty(
+        name="Max In Flight",
+        description="Maximum number of batch prompts queued on ComfyUI at the same time",
+        default=4,
+        min=1,
+        max=32
+    )
+    
     print("AI Pose Generator add-on registered")
 
 
@@ -97,6 +143,10 @@ def unregister():
     del bpy.types.Scene.ai_pose_status
     del bpy.types.Scene.ai_pose_render_resolution
     del bpy.types.Scene.ai_pose_show_bones
+    del bpy.types.Scene.ai_pose_fast_capture
+    del bpy.types.Scene.ai_pose_bone_mask
+    del bpy.types.Scene.ai_pose_batch_prompts
+    del bpy.types.Scene.ai_pose_batch_max_in_flight
     
     for module in reversed(modules):
         if hasattr(module, "unregister"):
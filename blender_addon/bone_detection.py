@@ -0,0 +1,551 @@
+"""
+Connected-component detection of rendered bones
+Labels bone pixels and measures every component with a few vectorized NumPy passes
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+try:
+    # OpenCV labels faster when available (optional dependency)
+    import cv2
+    HAS_CV2 = True
+except ImportError:
+    HAS_CV2 = False
+
+
+# One row per detected component. Coordinates are (x, y) pixel positions with
+# the origin at the top-left pixel center; bbox is (x_min, y_min, x_max, y_max)
+# inclusive. endpoints are the ends of the component's principal axis, the
+# upper one first.
+COMPONENT_DTYPE = np.dtype([
+    ('area', np.int32),
+    ('centroid', np.float32, (2,)),
+    ('bbox', np.int32, (4,)),
+    ('endpoints', np.float32, (2, 2)),
+    ('length', np.float32),
+])
+
+
+def bone_channel(image: np.ndarray) -> Optional[np.ndarray]:
+    """
+    Get the channel bones are detected in
+    
+    Args:
+        image: Bone mask of shape (height, width), or an RGB(A) image whose
+            red channel holds the red emission bones
+            
+    Returns:
+        2D array, None if the image has no usable channel
+    """
+    if image.ndim == 2:
+        return image
+    if image.ndim == 3 and image.shape[2] >= 3:
+        return image[:, :, 0]
+    return None
+
+
+def find_runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Find the horizontal runs of set pixels
+    
+    Args:
+        mask: Boolean array of shape (height, width)
+        
+    Returns:
+        Tuple of (rows, starts, ends) int64 arrays in row-major order; ends are exclusive
+    """
+    height, width = mask.shape
+    padded = np.zeros((height, width + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.diff(padded, axis=1)
+    
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    return rows, starts, ends
+
+
+def _run_adjacency(rows: np.ndarray, starts: np.ndarray, ends: np.ndarray,
+                   width: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pair up runs that touch across consecutive rows, diagonals included
+    
+    Runs in a row are disjoint and sorted, so the runs of the next row
+    touching a run form a contiguous range found by binary search.
+    
+    Returns:
+        Tuple of (upper run indices, lower run indices)
+    """
+    stride = width + 2
+    start_keys = rows * stride + starts
+    end_keys = rows * stride + ends
+    
+    # Next-row runs ending at or after this run's start - 1 and starting at or before its end
+    first = np.searchsorted(end_keys, (rows + 1) * stride + starts, side='left')
+    last = np.searchsorted(start_keys, (rows + 1) * stride + ends, side='right')
+    counts = np.maximum(last - first, 0)
+    
+    upper = np.repeat(np.arange(len(rows)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    lower = np.repeat(first, counts) + offsets
+    return upper, lower
+
+
+def _merge_labels(count: int, upper: np.ndarray, lower: np.ndarray) -> np.ndarray:
+    """
+    Label the connected components of a graph
+    
+    Each node is repeatedly hooked onto the smallest root among its
+    neighbours, with pointer jumping in between, so the number of rounds
+    grows with the logarithm of the component size rather than its length.
+    
+    Args:
+        count: Number of nodes
+        upper: First node of every edge
+        lower: Second node of every edge
+        
+    Returns:
+        Component index of every node, numbered in order of each component's first node
+    """
+    parent = np.arange(count)
+    while True:
+        upper_root, lower_root = parent[upper], parent[lower]
+        pending = upper_root != lower_root
+        if not pending.any():
+            break
+        
+        upper_root, lower_root = upper_root[pending], lower_root[pending]
+        low = np.minimum(upper_root, lower_root)
+        np.minimum.at(parent, upper_root, low)
+        np.minimum.at(parent, lower_root, low)
+        
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+    
+    # Roots are the smallest node of their component
+    _, labels = np.unique(parent, return_inverse=True)
+    return labels
+
+
+def label_runs(rows: np.ndarray, starts: np.ndarray, ends: np.ndarray, width: int) -> np.ndarray:
+    """
+    Label runs by 8-connected component
+    
+    Args:
+        rows: Row of every run
+        starts: First column of every run
+        ends: Column after the last of every run
+        width: Image width
+        
+    Returns:
+        Component index of every run, in raster order of the components' first pixels
+    """
+    if not len(rows):
+        return np.zeros(0, dtype=np.int64)
+    upper, lower = _run_adjacency(rows, starts, ends, width)
+    return _merge_labels(len(rows), upper, lower)
+
+
+def measure_components(rows: np.ndarray, starts: np.ndarray, ends: np.ndarray,
+                       labels: np.ndarray, min_area: int = 1) -> np.ndarray:
+    """
+    Measure labeled components from their runs
+    
+    Area, centroid and second moments have closed forms per run, so each
+    is one weighted bincount over the runs.
+    
+    Args:
+        rows: Row of every run
+        starts: First column of every run
+        ends: Column after the last of every run
+        labels: Component index of every run
+        min_area: Smallest area in pixels kept in the result
+        
+    Returns:
+        Structured array of COMPONENT_DTYPE, in label order
+    """
+    count = int(labels.max()) + 1 if len(labels) else 0
+    if not count:
+        return np.zeros(0, dtype=COMPONENT_DTYPE)
+    
+    y = rows.astype(np.float64)
+    first = starts.astype(np.float64)
+    last = ends.astype(np.float64) - 1
+    lengths = last - first + 1
+    
+    # Sums of x and x^2 over the columns of every run
+    sum_x = lengths * (first + last) / 2
+    sum_xx = (last * (last + 1) * (2 * last + 1) - (first - 1) * first * (2 * first - 1)) / 6
+    
+    def total(weights):
+        return np.bincount(labels, weights=weights, minlength=count)
+    
+    # Runs grouped by component for the bounding boxes
+    order = np.argsort(labels, kind='stable')
+    bounds = np.flatnonzero(np.r_[True, np.diff(labels[order]) != 0])
+    bbox = np.stack([
+        np.minimum.reduceat(starts[order], bounds),
+        np.minimum.reduceat(rows[order], bounds),
+        np.maximum.reduceat(ends[order], bounds) - 1,
+        np.maximum.reduceat(rows[order], bounds),
+    ], axis=1)
+    
+    components = _components_from_sums(total(lengths), total(sum_x), total(lengths * y),
+                                       total(sum_xx), total(lengths * y * y), total(sum_x * y), bbox)
+    return components[components['area'] >= min_area]
+
+
+def _components_from_sums(area: np.ndarray, sum_x: np.ndarray, sum_y: np.ndarray,
+                          sum_xx: np.ndarray, sum_yy: np.ndarray, sum_xy: np.ndarray,
+                          bbox: np.ndarray) -> np.ndarray:
+    """
+    Build the component table from per-component pixel sums
+    
+    Args:
+        area: Pixel count of every component
+        sum_x: Sum of x over its pixels
+        sum_y: Sum of y over its pixels
+        sum_xx: Sum of x^2 over its pixels
+        sum_yy: Sum of y^2 over its pixels
+        sum_xy: Sum of x*y over its pixels
+        bbox: (x_min, y_min, x_max, y_max) of every component
+        
+    Returns:
+        Structured array of COMPONENT_DTYPE; empty components get zeros
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_x = np.nan_to_num(sum_x / area)
+        mean_y = np.nan_to_num(sum_y / area)
+        var_x = np.nan_to_num(sum_xx / area) - mean_x ** 2
+        var_y = np.nan_to_num(sum_yy / area) - mean_y ** 2
+        cov_xy = np.nan_to_num(sum_xy / area) - mean_x * mean_y
+    
+    # Principal axis of the 2x2 covariance; a uniform rod of length L has variance L^2 / 12
+    spread = np.sqrt(((var_x - var_y) / 2) ** 2 + cov_xy ** 2)
+    major = np.maximum((var_x + var_y) / 2 + spread, 0.0)
+    angle = 0.5 * np.arctan2(2 * cov_xy, var_x - var_y)
+    half_length = np.sqrt(3 * major)
+    axis = np.stack([np.cos(angle), np.sin(angle)], axis=1) * half_length[:, None]
+    
+    centroid = np.stack([mean_x, mean_y], axis=1)
+    ends_a, ends_b = centroid - axis, centroid + axis
+    a_first = (ends_a[:, 1] < ends_b[:, 1]) | ((ends_a[:, 1] == ends_b[:, 1]) & (ends_a[:, 0] <= ends_b[:, 0]))
+    endpoints = np.where(a_first[:, None, None],
+                         np.stack([ends_a, ends_b], axis=1),
+                         np.stack([ends_b, ends_a], axis=1))
+    
+    components = np.zeros(len(area), dtype=COMPONENT_DTYPE)
+    components['area'] = area
+    components['centroid'] = centroid
+    components['bbox'] = bbox
+    components['endpoints'] = endpoints
+    components['length'] = 2 * half_length
+    return components
+
+
+def _bright_runs(image: np.ndarray, threshold: int,
+                 use_cv2: Optional[bool]) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Find the runs of bright pixels and label them by component
+    
+    Args:
+        image: Bone mask or RGB(A) image, see bone_channel
+        threshold: Pixels brighter than this belong to bones
+        use_cv2: Label with OpenCV, by default whenever it is available
+        
+    Returns:
+        Tuple of (rows, starts, ends, labels) as for measure_components, or
+        None if the image has no usable channel
+    """
+    channel = bone_channel(image)
+    if channel is None:
+        return None
+    
+    mask = channel > threshold
+    rows, starts, ends = find_runs(mask)
+    
+    if use_cv2 is None:
+        use_cv2 = HAS_CV2
+    if use_cv2 and len(rows):
+        _, label_image = cv2.connectedComponents(mask.view(np.uint8), connectivity=8)
+        
+        # Renumber in raster order of the components' first runs
+        _, first, inverse = np.unique(label_image[rows, starts], return_index=True, return_inverse=True)
+        labels = np.argsort(np.argsort(first))[inverse]
+    else:
+        labels = label_runs(rows, starts, ends, mask.shape[1])
+    
+    return rows, starts, ends, labels
+
+
+def detect_components(image: np.ndarray, threshold: int = 100, min_area: int = 1,
+                      use_cv2: Optional[bool] = None) -> np.ndarray:
+    """
+    Detect bones as 8-connected components of bright pixels
+    
+    Both backends label the same components in the same raster order and
+    measure them from the same runs, so they return identical arrays.
+    
+    Args:
+        image: Bone mask or RGB(A) image, see bone_channel
+        threshold: Pixels brighter than this belong to bones
+        min_area: Smallest area in pixels reported
+        use_cv2: Label with OpenCV, by default whenever it is available
+        
+    Returns:
+        Structured array of COMPONENT_DTYPE, one row per component
+    """
+    runs = _bright_runs(image, threshold, use_cv2)
+    if runs is None:
+        return np.zeros(0, dtype=COMPONENT_DTYPE)
+    
+    return measure_components(*runs, min_area)
+
+
+def label_components(image: np.ndarray, threshold: int = 100, min_area: int = 1,
+                     use_cv2: Optional[bool] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Detect components like detect_components and label every pixel with its component
+    
+    Args:
+        image: Bone mask or RGB(A) image, see bone_channel
+        threshold: Pixels brighter than this belong to bones
+        min_area: Smallest area in pixels reported
+        use_cv2: Label with OpenCV, by default whenever it is available
+        
+    Returns:
+        Tuple of (components as from detect_components, int32 array of shape
+        (height, width) holding each pixel's row in components, -1 elsewhere)
+    """
+    label_image = np.full(image.shape[:2], -1, dtype=np.int32)
+    runs = _bright_runs(image, threshold, use_cv2)
+    if runs is None:
+        return np.zeros(0, dtype=COMPONENT_DTYPE), label_image
+    
+    rows, starts, ends, labels = runs
+    components = measure_components(rows, starts, ends, labels)
+    kept = components['area'] >= min_area
+    index = np.where(kept, np.cumsum(kept) - 1, -1)
+    
+    # Expand the runs to pixels
+    lengths = ends - starts
+    run = np.repeat(np.arange(len(rows)), lengths)
+    columns = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths) + starts[run]
+    label_image[rows[run], columns] = index[labels[run]]
+    
+    return components[kept], label_image
+
+
+def component_bones(label_image: np.ndarray, ids: np.ndarray, component_count: int,
+                    bone_count: int, purity: float = 0.9) -> np.ndarray:
+    """
+    Find the bone each component shows, using an ID pass of the same view
+    
+    A component is given to a bone when nearly all of its ID-covered
+    pixels belong to that bone. A bone split into several components keeps
+    only its largest one.
+    
+    Args:
+        label_image: Pixel labels from label_components
+        ids: Bone index per pixel from decode_ids, same shape as label_image
+        component_count: Number of components
+        bone_count: Number of bones in the palette
+        purity: Share of a component's ID pixels its bone must cover
+        
+    Returns:
+        int64 bone index of every component, -1 where it shows several bones or none
+    """
+    owners = np.full(component_count, -1, dtype=np.int64)
+    if not component_count or not bone_count:
+        return owners
+    
+    both = (label_image >= 0) & (ids >= 0)
+    pairs = label_image[both].astype(np.int64) * bone_count + ids[both]
+    counts = np.bincount(pairs, minlength=component_count * bone_count).reshape(component_count, bone_count)
+    
+    best = counts.argmax(axis=1)
+    covered = counts[np.arange(component_count), best]
+    pure = (covered > 0) & (covered >= purity * counts.sum(axis=1))
+    
+    # Largest component first, so np.unique keeps it for every bone
+    candidates = np.flatnonzero(pure)
+    candidates = candidates[np.argsort(-covered[candidates], kind='stable')]
+    _, first = np.unique(best[candidates], return_index=True)
+    owners[candidates[first]] = best[candidates[first]]
+    return owners
+
+
+def match_components(centroids: np.ndarray, others: np.ndarray) -> np.ndarray:
+    """
+    Pair components of two images by nearest centroid
+    
+    Pairs are taken greedily from the closest, each component used once.
+    
+    Args:
+        centroids: (x, y) centroids of shape (count, 2)
+        others: Centroids to pair them with, shape (other_count, 2)
+        
+    Returns:
+        int64 index into others for every centroid, -1 where none is left
+    """
+    matches = np.full(len(centroids), -1, dtype=np.int64)
+    if not len(centroids) or not len(others):
+        return matches
+    
+    distances = np.linalg.norm(np.asarray(centroids, dtype=np.float64)[:, None]
+                               - np.asarray(others, dtype=np.float64)[None], axis=2)
+    taken = np.zeros(len(others), dtype=bool)
+    remaining = min(len(centroids), len(others))
+    for flat in np.argsort(distances, axis=None, kind='stable'):
+        row, column = divmod(int(flat), len(others))
+        if matches[row] < 0 and not taken[column]:
+            matches[row] = column
+            taken[column] = True
+            remaining -= 1
+            if not remaining:
+                break
+    return matches
+
+
+def make_id_palette(count: int) -> np.ndarray:
+    """
+    Choose a distinct ID colour for each of a number of bones
+    
+    Up to 255 bones get evenly spaced grey levels, so the ID pass stays a
+    single channel; more bones are spread over 24-bit RGB. Zero is left for
+    the background.
+    
+    Args:
+        count: Number of bones
+        
+    Returns:
+        uint8 array of shape (count, 1), or (count, 3) for more than 255 bones
+    """
+    if count <= 255:
+        step = 255 / max(count, 1)
+        levels = np.round(255 - step * np.arange(count)).astype(np.uint8)
+        return levels[:, None]
+    
+    codes = (np.arange(count, dtype=np.int64) + 1) * ((1 << 24) - 1) // count
+    return (np.stack([codes >> 16, codes >> 8, codes], axis=1) & 0xFF).astype(np.uint8)
+
+
+def id_lookup_table(levels: np.ndarray) -> np.ndarray:
+    """
+    Map every 8-bit grey level to the bone whose ID level it is closest to
+    
+    Levels within half the palette spacing of an ID still decode to it,
+    which absorbs rounding in the render's colour transform.
+    
+    Args:
+        levels: Grey level of every bone, from make_id_palette
+        
+    Returns:
+        int32 array of 256 bone indices, -1 for the background
+    """
+    lut = np.full(256, -1, dtype=np.int32)
+    if not len(levels):
+        return lut
+    
+    levels = np.asarray(levels, dtype=np.int32)
+    values = np.arange(256)
+    nearest = np.abs(values[:, None] - levels[None, :]).argmin(axis=1)
+    distance = np.abs(values - levels[nearest])
+    
+    spacing = np.diff(np.sort(levels)).min() if len(levels) > 1 else 255
+    matched = (distance <= (spacing - 1) // 2) & (values > 0)
+    lut[matched] = nearest[matched]
+    return lut
+
+
+def decode_ids(image: np.ndarray, palette: np.ndarray) -> np.ndarray:
+    """
+    Decode the bone index of every pixel of an ID pass
+    
+    Args:
+        image: ID pass, single-channel for grey palettes or RGB(A)
+        palette: Palette from make_id_palette the pass was rendered with
+        
+    Returns:
+        int32 array of shape (height, width), -1 where no bone is visible
+    """
+    palette = np.asarray(palette, dtype=np.uint8)
+    
+    if palette.shape[1] == 1:
+        channel = image if image.ndim == 2 else image[:, :, 0]
+        return id_lookup_table(palette[:, 0])[channel]
+    
+    rgb = image[:, :, :3].astype(np.int32)
+    codes = (rgb[:, :, 0] << 16) | (rgb[:, :, 1] << 8) | rgb[:, :, 2]
+    palette_codes = (palette[:, 0].astype(np.int32) << 16) | (palette[:, 1].astype(np.int32) << 8) | palette[:, 2]
+    
+    order = np.argsort(palette_codes)
+    sorted_codes = palette_codes[order]
+    index = np.minimum(np.searchsorted(sorted_codes, codes), len(sorted_codes) - 1)
+    return np.where(sorted_codes[index] == codes, order[index], -1).astype(np.int32)
+
+
+def measure_ids(ids: np.ndarray, count: int) -> np.ndarray:
+    """
+    Measure every bone in a decoded ID pass
+    
+    Args:
+        ids: Bone index per pixel from decode_ids
+        count: Number of bones in the palette
+        
+    Returns:
+        Structured array of COMPONENT_DTYPE with one row per bone index;
+        bones that are not visible have zero area
+    """
+    ys, xs = np.nonzero(ids >= 0)
+    labels = ids[ys, xs]
+    x = xs.astype(np.float64)
+    y = ys.astype(np.float64)
+    
+    def total(weights=None):
+        return np.bincount(labels, weights=weights, minlength=count)[:count]
+    
+    bbox = np.zeros((count, 4), dtype=np.int64)
+    if len(labels):
+        order = np.argsort(labels, kind='stable')
+        bounds = np.flatnonzero(np.r_[True, np.diff(labels[order]) != 0])
+        bbox[labels[order][bounds]] = np.stack([
+            np.minimum.reduceat(xs[order], bounds),
+            np.minimum.reduceat(ys[order], bounds),
+            np.maximum.reduceat(xs[order], bounds),
+            np.maximum.reduceat(ys[order], bounds),
+        ], axis=1)
+    
+    return _components_from_sums(total(), total(x), total(y), total(x * x), total(y * y),
+                                 total(x * y), bbox)
+
+
+def detect_bone_ids(image: np.ndarray, palette: np.ndarray) -> np.ndarray:
+    """
+    Detect every bone of an ID pass by its colour
+    
+    Row i describes bone i of the palette, so no matching between views
+    or poses is needed.
+    
+    Args:
+        image: ID pass rendered with the palette
+        palette: Palette from make_id_palette
+        
+    Returns:
+        Structured array of COMPONENT_DTYPE with one row per bone index
+    """
+    return measure_ids(decode_ids(image, palette), len(palette))
+
+
+def register():
+    """Register module"""
+    pass
+
+
+def unregister():
+    """Unregister module"""
+    pass
@@ -4,27 +4,473 @@ Handles communication with ComfyUI backend server
 """
 
 import json
-import urllib.request
-import urllib.error
+import os
+import hashlib
+import http.client
 import urllib.parse
 import uuid
 import time
 import io
-from typing import Dict, List, Tuple, Optional
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Callable, Dict, Iterable, List, Tuple, Optional, Union
+
+from . import comfyui_websocket
+from . import profiling
+
+
+# Errors raised when a pooled keep-alive connection was closed by the server
+# while it sat idle. Requests failing this way on a reused connection are
+# retried once on a fresh connection.
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    ConnectionAbortedError,
+    BrokenPipeError,
+)
+
+
+# Size of the chunks image files are streamed in
+STREAM_CHUNK_SIZE = 256 * 1024
+
+# Image data accepted by upload methods: bytes, a file path or a binary file object
+ImageSource = Union[bytes, bytearray, memoryview, str, BinaryIO]
+
+
+@contextlib.contextmanager
+def open_image_source(image: ImageSource):
+    """
+    Open image data for streaming
+    
+    Args:
+        image: Image data as bytes, a file path or a binary file object
+        
+    Yields:
+        Tuple of (binary stream positioned at the data, remaining size in bytes)
+    """
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        stream = io.BytesIO(image)
+        yield stream, len(stream.getbuffer())
+    elif isinstance(image, str):
+        with open(image, 'rb') as stream:
+            yield stream, os.fstat(stream.fileno()).st_size
+    else:
+        start = image.tell()
+        image.seek(0, os.SEEK_END)
+        size = image.tell() - start
+        image.seek(start)
+        yield image, size
+
+
+def iter_chunks(stream: BinaryIO, size: int, chunk_size: int = STREAM_CHUNK_SIZE):
+    """
+    Read up to size bytes from a stream in chunks
+    
+    Args:
+        stream: Binary stream
+        size: Number of bytes to read
+        chunk_size: Maximum chunk size
+        
+    Yields:
+        Chunks of bytes
+    """
+    remaining = size
+    while remaining > 0:
+        chunk = stream.read(min(chunk_size, remaining))
+        if not chunk:
+            raise IOError("Image data ended before its expected size")
+        remaining -= len(chunk)
+        yield chunk
+
+
+def hash_image(image: ImageSource) -> str:
+    """
+    Compute the SHA-256 digest of image data without reading it into memory
+    
+    Args:
+        image: Image data as bytes, a file path or a binary file object
+        
+    Returns:
+        Hex digest of the image bytes
+        
+    Raises:
+        OSError: If the image cannot be read
+    """
+    with open_image_source(image) as (stream, size):
+        start = stream.tell()
+        sha = hashlib.sha256()
+        for chunk in iter_chunks(stream, size):
+            sha.update(chunk)
+        stream.seek(start)
+    return sha.hexdigest()
+
+
+def input_image_name(digest: str) -> str:
+    """
+    Get the content-derived name an image is uploaded under
+    
+    Args:
+        digest: SHA-256 hex digest of the image bytes
+        
+    Returns:
+        File name used on the server
+    """
+    return f"aipose_{digest[:32]}.png"
+
+
+class ConnectionPool:
+    """Thread-safe pool of persistent HTTP/1.1 keep-alive connections to one server"""
+    
+    def __init__(self, server_address: str, max_size: int = 4, idle_timeout: float = 30.0):
+        """
+        Initialize connection pool
+        
+        Args:
+            server_address: URL of the server
+            max_size: Maximum number of idle connections kept open
+            idle_timeout: Seconds after which an idle connection is closed
+        """
+        parsed = urllib.parse.urlsplit(server_address)
+        self.scheme = parsed.scheme or 'http'
+        self.host = parsed.hostname or 'localhost'
+        self.port = parsed.port
+        self.base_path = parsed.path.rstrip('/')
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        
+        self._idle = []  # List of (connection, last_used) pairs, most recent last
+        self._lock = threading.Lock()
+    
+    def _new_connection(self, timeout: float) -> http.client.HTTPConnection:
+        """Open a new connection to the server"""
+        if self.scheme == 'https':
+            return http.client.HTTPSConnection(self.host, self.port, timeout=timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+    
+    def _evict_idle_locked(self, now: float):
+        """Close idle connections past the idle timeout (lock must be held)"""
+        keep = []
+        for conn, last_used in self._idle:
+            if now - last_used > self.idle_timeout:
+                conn.close()
+            else:
+                keep.append((conn, last_used))
+        self._idle = keep
+    
+    def acquire(self, timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        """
+        Take a connection from the pool, opening a new one if none is idle
+        
+        Args:
+            timeout: Socket timeout for requests on the connection
+            
+        Returns:
+            Tuple of (connection, reused)
+        """
+        with self._lock:
+            self._evict_idle_locked(time.monotonic())
+            conn = self._idle.pop()[0] if self._idle else None
+        
+        if conn is None:
+            return self._new_connection(timeout), False
+        
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, True
+    
+    def release(self, conn: http.client.HTTPConnection):
+        """
+        Return a connection to the pool, closing it if the pool is full
+        
+        Args:
+            conn: Connection whose last response has been fully read
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._evict_idle_locked(now)
+            if conn.sock is not None and len(self._idle) < self.max_size:
+                self._idle.append((conn, now))
+                return
+        conn.close()
+    
+    def evict_idle(self):
+        """Close all connections that have been idle longer than the idle timeout"""
+        with self._lock:
+            self._evict_idle_locked(time.monotonic())
+    
+    def close(self):
+        """Close all idle connections"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            conn.close()
+    
+    @contextlib.contextmanager
+    def request(self, method: str, path: str, body: Union[None, bytes, Callable[[], Iterable[bytes]]] = None,
+                headers: Optional[Dict[str, str]] = None, timeout: float = 30.0):
+        """
+        Send a request over a pooled connection
+        
+        The connection goes back to the pool when the response has been read
+        completely, otherwise it is closed.
+        
+        Args:
+            method: HTTP method
+            path: Request path relative to the server address
+            body: Request body, or a function returning an iterable of chunks
+                (called again if the request has to be retried)
+            headers: Request headers, must include Content-Length for chunked bodies
+            timeout: Socket timeout in seconds
+            
+        Yields:
+            http.client.HTTPResponse
+        """
+        url = self.base_path + path
+        headers = headers or {}
+        
+        while True:
+            conn, reused = self.acquire(timeout)
+            try:
+                conn.request(method, url, body=body() if callable(body) else body, headers=headers)
+                response = conn.getresponse()
+                break
+            except STALE_CONNECTION_ERRORS:
+                conn.close()
+                if not reused:
+                    raise
+                # The server dropped the idle connection; retry on a fresh one
+            except BaseException:
+                conn.close()
+                raise
+        
+        try:
+            yield response
+        except BaseException:
+            conn.close()
+            raise
+        
+        if not response.isclosed() and response.length is not None and response.length <= 65536:
+            # Drain small unread remainders so the connection can be reused
+            response.read()
+        
+        if response.isclosed() and not response.will_close:
+            self.release(conn)
+        else:
+            conn.close()
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_connection_pool(server_address: str, max_size: int = 4, idle_timeout: float = 30.0) -> ConnectionPool:
+    """
+    Get the shared connection pool for a server, creating it if needed
+    
+    Args:
+        server_address: URL of the server
+        max_size: Maximum number of idle connections kept open
+        idle_timeout: Seconds after which an idle connection is closed
+        
+    Returns:
+        ConnectionPool shared by all clients of that server
+    """
+    key = server_address.rstrip('/')
+    
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(key, max_size, idle_timeout)
+            _pools[key] = pool
+        else:
+            pool.max_size = max_size
+            pool.idle_timeout = idle_timeout
+    
+    return pool
+
+
+def close_all_pools():
+    """Close every pooled connection"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    
+    for pool in pools:
+        pool.close()
+
+
+class UploadIndex:
+    """Persistent record of which image content hashes each server already holds"""
+    
+    # Entries remembered per server, least recently used are forgotten first
+    MAX_ENTRIES = 1000
+    
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize upload index
+        
+        Args:
+            path: JSON file the index is persisted to, None keeps it in memory only
+        """
+        self.path = path
+        self._servers: Dict[str, Dict[str, str]] = {}
+        self._verified = set()
+        self._lock = threading.Lock()
+        
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                servers = data.get('servers', {}) if isinstance(data, dict) else {}
+                self._servers = {
+                    server: dict(entries) for server, entries in servers.items()
+                    if isinstance(entries, dict)
+                }
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable upload index {path}: {e}")
+    
+    def get(self, server_address: str, digest: str) -> Optional[str]:
+        """
+        Look up the server-side name of an uploaded image
+        
+        Args:
+            server_address: URL of the server
+            digest: SHA-256 hex digest of the image bytes
+            
+        Returns:
+            Name as stored on the server, or None if unknown
+        """
+        with self._lock:
+            entries = self._servers.get(server_address)
+            if not entries or digest not in entries:
+                return None
+            # Move to the end to keep recently used entries
+            name = entries.pop(digest)
+            entries[digest] = name
+            return name
+    
+    def add(self, server_address: str, digest: str, name: str):
+        """
+        Record that a server holds an image
+        
+        Args:
+            server_address: URL of the server
+            digest: SHA-256 hex digest of the image bytes
+            name: Name as stored on the server
+        """
+        with self._lock:
+            entries = self._servers.setdefault(server_address, {})
+            entries.pop(digest, None)
+            entries[digest] = name
+            while len(entries) > self.MAX_ENTRIES:
+                del entries[next(iter(entries))]
+            self._verified.add((server_address, digest))
+            self._save_locked()
+    
+    def remove(self, server_address: str, digest: str):
+        """
+        Forget an image, e.g. after the server lost it
+        
+        Args:
+            server_address: URL of the server
+            digest: SHA-256 hex digest of the image bytes
+        """
+        with self._lock:
+            entries = self._servers.get(server_address, {})
+            if entries.pop(digest, None) is not None:
+                self._save_locked()
+            self._verified.discard((server_address, digest))
+    
+    def is_verified(self, server_address: str, digest: str) -> bool:
+        """Whether the entry was uploaded or checked during this session"""
+        with self._lock:
+            return (server_address, digest) in self._verified
+    
+    def mark_verified(self, server_address: str, digest: str):
+        """Remember that the server was seen holding the image this session"""
+        with self._lock:
+            self._verified.add((server_address, digest))
+    
+    def _save_locked(self):
+        """Write the index to disk (lock must be held)"""
+        if not self.path:
+            return
+        
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'servers': self._servers}, f)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"Error saving upload index: {e}")
+
+
+_upload_indexes: Dict[Optional[str], UploadIndex] = {}
+_upload_indexes_lock = threading.Lock()
+
+
+def get_upload_index(path: Optional[str] = None) -> UploadIndex:
+    """
+    Get the shared upload index stored at a path
+    
+    Args:
+        path: JSON file the index is persisted to, None for an in-memory index
+        
+    Returns:
+        UploadIndex shared by all clients using that path
+    """
+    with _upload_indexes_lock:
+        index = _upload_indexes.get(path)
+        if index is None:
+            index = UploadIndex(path)
+            _upload_indexes[path] = index
+        return index
 
 
 class ComfyUIClient:
     """Client for interacting with ComfyUI API"""
     
-    def __init__(self, server_address: str = "http://localhost:8188"):
+    def __init__(self, server_address: str = "http://localhost:8188",
+                 pool_size: int = 4, idle_timeout: float = 30.0,
+                 use_websocket: bool = True, upload_index: Optional[UploadIndex] = None):
         """
         Initialize ComfyUI client
         
         Args:
             server_address: URL of the ComfyUI server
+            pool_size: Maximum number of idle keep-alive connections kept per server
+            idle_timeout: Seconds after which an idle connection is closed
+            use_websocket: Follow job progress over /ws instead of polling history
+            upload_index: Index of images the server already holds, used to skip
+                repeated uploads (in-memory index if not given)
         """
         self.server_address = server_address.rstrip('/')
         self.client_id = str(uuid.uuid4())
+        self.pool = get_connection_pool(self.server_address, pool_size, idle_timeout)
+        self.use_websocket = use_websocket
+        self.upload_index = upload_index if upload_index is not None else get_upload_index()
+    
+    def _request(self, method: str, path: str, body: Union[None, bytes, Callable[[], Iterable[bytes]]] = None,
+                 headers: Optional[Dict[str, str]] = None, timeout: float = 30.0) -> Tuple[int, bytes]:
+        """
+        Send a request and read the whole response
+        
+        Args:
+            method: HTTP method
+            path: Request path relative to the server address
+            body: Request body, or a function returning an iterable of chunks
+            headers: Request headers
+            timeout: Socket timeout in seconds
+            
+        Returns:
+            Tuple of (status, response body)
+        """
+        with self.pool.request(method, path, body=body, headers=headers, timeout=timeout) as response:
+            return response.status, response.read()
     
     def test_connection(self) -> Tuple[bool, str]:
         """
@@ -34,14 +480,12 @@ class ComfyUIClient:
             Tuple of (success: bool, message: str)
         """
         try:
-            url = f"{self.server_address}/system_stats"
-            req = urllib.request.Request(url, method='GET')
-            with urllib.request.urlopen(req, timeout=5) as response:
-                if response.status == 200:
-                    return True, "Connected successfully to ComfyUI server"
-                else:
-                    return False, f"Server returned status {response.status}"
-        except urllib.error.URLError as e:
+            status, _ = self._request('GET', "/system_stats", timeout=5)
+            if status == 200:
+                return True, "Connected successfully to ComfyUI server"
+            else:
+                return False, f"Server returned status {status}"
+        except (OSError, http.client.HTTPException) as e:
             return False, f"Connection failed: {str(e)}"
         except Exception as e:
             return False, f"Error: {str(e)}"
@@ -63,22 +507,20 @@ class ComfyUIClient:
             }
             
             data = json.dumps(prompt_data).encode('utf-8')
-            url = f"{self.server_address}/prompt"
             
-            req = urllib.request.Request(
-                url,
-                data=data,
+            status, response_body = self._request(
+                'POST', "/prompt",
+                body=data,
                 headers={'Content-Type': 'application/json'}
             )
             
-            with urllib.request.urlopen(req, timeout=30) as response:
-                result = json.loads(response.read().decode('utf-8'))
-                return result.get('prompt_id')
-                
-        except urllib.error.HTTPError as e:
-            error_body = e.read().decode('utf-8') if e.fp else str(e)
-            print(f"Error queuing prompt: HTTP {e.code} - {error_body}")
-            return None
+            if status >= 400:
+                print(f"Error queuing prompt: HTTP {status} - {response_body.decode('utf-8', 'replace')}")
+                return None
+            
+            result = json.loads(response_body.decode('utf-8'))
+            return result.get('prompt_id')
+            
         except Exception as e:
             print(f"Error queuing prompt: {str(e)}")
             return None
@@ -94,17 +536,21 @@ class ComfyUIClient:
             History dictionary if available, None otherwise
         """
         try:
-            url = f"{self.server_address}/history/{prompt_id}"
-            req = urllib.request.Request(url, method='GET')
-            
-            with urllib.request.urlopen(req, timeout=10) as response:
-                history = json.loads(response.read().decode('utf-8'))
-                return history.get(prompt_id)
-                
+            return self._fetch_history(prompt_id)
         except Exception as e:
             print(f"Error getting history: {str(e)}")
             return None
     
+    def _fetch_history(self, prompt_id: str) -> Optional[Dict]:
+        """Get history for a prompt, raising on connection errors"""
+        status, response_body = self._request('GET', f"/history/{prompt_id}", timeout=10)
+        if status != 200:
+            print(f"Error getting history: HTTP {status}")
+            return None
+        
+        history = json.loads(response_body.decode('utf-8'))
+        return history.get(prompt_id)
+    
     def get_image(self, filename: str, subfolder: str = "", folder_type: str = "output") -> Optional[bytes]:
         """
         Download an image from ComfyUI
@@ -117,29 +563,117 @@ class ComfyUIClient:
         Returns:
             Image data as bytes if successful, None otherwise
         """
+        buffer = io.BytesIO()
+        if self.download_image(filename, subfolder, folder_type, buffer) is None:
+            return None
+        return buffer.getvalue()
+    
+    def download_image(self, filename: str, subfolder: str, folder_type: str,
+                       target: Union[str, BinaryIO], expected_sha256: Optional[str] = None) -> Optional[str]:
+        """
+        Stream an image from ComfyUI straight into a file or buffer
+        
+        The response is copied in chunks. A file target is written next to its
+        final path and only moved into place once the download is complete, so
+        a failed download never leaves a truncated image behind.
+        
+        Args:
+            filename: Name of the image file
+            subfolder: Subfolder within the output directory
+            folder_type: Type of folder (output, input, temp)
+            target: File path or writable binary file object
+            expected_sha256: Reject the download unless its SHA-256 hex digest matches
+            
+        Returns:
+            SHA-256 hex digest of the downloaded data, None on failure
+        """
+        params = {
+            "filename": filename,
+            "subfolder": subfolder,
+            "type": folder_type
+        }
+        
+        temp_path = f"{target}.part" if isinstance(target, str) else None
+        
         try:
-            params = {
-                "filename": filename,
-                "subfolder": subfolder,
-                "type": folder_type
-            }
+            with contextlib.ExitStack() as stack:
+                if temp_path is not None:
+                    stream = stack.enter_context(open(temp_path, 'wb'))
+                else:
+                    stream = target
+                
+                with self.pool.request('GET', f"/view?{urllib.parse.urlencode(params)}") as response:
+                    if response.status != 200:
+                        response.read()
+                        print(f"Error downloading image: HTTP {response.status}")
+                        return None
+                    
+                    sha = hashlib.sha256()
+                    received = 0
+                    while True:
+                        chunk = response.read(STREAM_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        sha.update(chunk)
+                        stream.write(chunk)
+                        received += len(chunk)
+                    
+                    expected_length = response.getheader('Content-Length')
+                
+                profiling.count('bytes_downloaded', received)
+                
+                if expected_length is not None and received != int(expected_length):
+                    print(f"Error downloading image: got {received} of {expected_length} bytes")
+                    return None
+                
+                digest = sha.hexdigest()
+                if expected_sha256 is not None and digest != expected_sha256.lower():
+                    print(f"Error downloading image: checksum mismatch for {filename}")
+                    return None
             
-            url = f"{self.server_address}/view?{urllib.parse.urlencode(params)}"
-            req = urllib.request.Request(url, method='GET')
+            if temp_path is not None:
+                os.replace(temp_path, target)
+                temp_path = None
+            
+            return digest
             
-            with urllib.request.urlopen(req, timeout=30) as response:
-                return response.read()
-                
         except Exception as e:
             print(f"Error downloading image: {str(e)}")
             return None
+        finally:
+            if temp_path is not None and os.path.exists(temp_path):
+                os.remove(temp_path)
+    
+    def download_images(self, images: List[Tuple[Tuple[str, str, str], Union[str, BinaryIO]]],
+                        max_workers: int = 4) -> List[Optional[str]]:
+        """
+        Download several images in parallel
+        
+        Args:
+            images: List of ((filename, subfolder, folder_type), target) pairs
+            max_workers: Maximum number of concurrent downloads
+            
+        Returns:
+            SHA-256 hex digest per image, None for failed downloads
+        """
+        if len(images) <= 1 or max_workers <= 1:
+            return [self.download_image(*image, target) for image, target in images]
+        
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(images)),
+                                thread_name_prefix="ComfyUI-Download") as executor:
+            download = profiling.bind(self.download_image)
+            futures = [executor.submit(download, *image, target) for image, target in images]
+            return [future.result() for future in futures]
     
-    def upload_image(self, image_data: bytes, filename: str, subfolder: str = "", overwrite: bool = True) -> Optional[Dict]:
+    def upload_image(self, image: ImageSource, filename: str, subfolder: str = "", overwrite: bool = True) -> Optional[Dict]:
         """
         Upload an image to ComfyUI
         
+        The multipart body is streamed to the socket in chunks, so memory use
+        does not grow with the image size.
+        
         Args:
-            image_data: Image data as bytes
+            image: Image data as bytes, a file path or a binary file object
             filename: Name for the uploaded file
             subfolder: Subfolder within the input directory
             overwrite: Whether to overwrite existing file
@@ -148,76 +682,328 @@ class ComfyUIClient:
             Upload result dictionary if successful, None otherwise
         """
         try:
-            # Prepare multipart form data
-            boundary = f"----WebKitFormBoundary{uuid.uuid4().hex}"
-            
-            body = io.BytesIO()
-            
-            # Add image field
-            body.write(f'--{boundary}\r\n'.encode())
-            body.write(f'Content-Disposition: form-data; name="image"; filename="{filename}"\r\n'.encode())
-            body.write(b'Content-Type: image/png\r\n\r\n')
-            body.write(image_data)
-            body.write(b'\r\n')
-            
-            # Add overwrite field
-            body.write(f'--{boundary}\r\n'.encode())
-            body.write(b'Content-Disposition: form-data; name="overwrite"\r\n\r\n')
-            body.write(b'true\r\n' if overwrite else b'false\r\n')
-            
-            # Add subfolder field if specified
-            if subfolder:
-                body.write(f'--{boundary}\r\n'.encode())
-                body.write(b'Content-Disposition: form-data; name="subfolder"\r\n\r\n')
-                body.write(subfolder.encode())
-                body.write(b'\r\n')
-            
-            body.write(f'--{boundary}--\r\n'.encode())
-            
-            url = f"{self.server_address}/upload/image"
-            req = urllib.request.Request(
-                url,
-                data=body.getvalue(),
-                headers={
-                    'Content-Type': f'multipart/form-data; boundary={boundary}'
-                }
-            )
-            
-            with urllib.request.urlopen(req, timeout=30) as response:
-                result = json.loads(response.read().decode('utf-8'))
-                return result
+            with open_image_source(image) as (stream, size):
+                # Prepare multipart form data framing around the streamed file
+                boundary = f"----WebKitFormBoundary{uuid.uuid4().hex}"
+                
+                preamble = io.BytesIO()
+                
+                # Add image field
+                preamble.write(f'--{boundary}\r\n'.encode())
+                preamble.write(f'Content-Disposition: form-data; name="image"; filename="{filename}"\r\n'.encode())
+                preamble.write(b'Content-Type: image/png\r\n\r\n')
+                
+                epilogue = io.BytesIO()
+                epilogue.write(b'\r\n')
                 
+                # Add overwrite field
+                epilogue.write(f'--{boundary}\r\n'.encode())
+                epilogue.write(b'Content-Disposition: form-data; name="overwrite"\r\n\r\n')
+                epilogue.write(b'true\r\n' if overwrite else b'false\r\n')
+                
+                # Add subfolder field if specified
+                if subfolder:
+                    epilogue.write(f'--{boundary}\r\n'.encode())
+                    epilogue.write(b'Content-Disposition: form-data; name="subfolder"\r\n\r\n')
+                    epilogue.write(subfolder.encode())
+                    epilogue.write(b'\r\n')
+                
+                epilogue.write(f'--{boundary}--\r\n'.encode())
+                
+                head = preamble.getvalue()
+                tail = epilogue.getvalue()
+                start = stream.tell()
+                
+                def body():
+                    # Called once per attempt so a retried request starts over
+                    stream.seek(start)
+                    yield head
+                    yield from iter_chunks(stream, size)
+                    yield tail
+                
+                status, response_body = self._request(
+                    'POST', "/upload/image",
+                    body=body,
+                    headers={
+                        'Content-Type': f'multipart/form-data; boundary={boundary}',
+                        'Content-Length': str(len(head) + size + len(tail)),
+                    }
+                )
+            
+            if status != 200:
+                print(f"Error uploading image: HTTP {status} - {response_body.decode('utf-8', 'replace')}")
+                return None
+            
+            profiling.count('bytes_uploaded', size)
+            result = json.loads(response_body.decode('utf-8'))
+            return result
+            
         except Exception as e:
             print(f"Error uploading image: {str(e)}")
             return None
     
-    def wait_for_completion(self, prompt_id: str, timeout: int = 300, poll_interval: float = 1.0) -> Optional[Dict]:
+    def get_progress_listener(self) -> Optional[comfyui_websocket.ProgressListener]:
+        """
+        Get the WebSocket progress listener for this client
+        
+        Returns:
+            Connected ProgressListener, or None if the socket is unavailable
+        """
+        if not self.use_websocket:
+            return None
+        
+        listener = comfyui_websocket.get_progress_listener(self.server_address, self.client_id)
+        return listener if listener.connected.is_set() else None
+    
+    def has_input_image(self, filename: str, subfolder: str = "") -> bool:
+        """
+        Check whether the server's input directory holds a file
+        
+        Args:
+            filename: Name of the image file
+            subfolder: Subfolder within the input directory
+            
+        Returns:
+            True if the server serves the file
+        """
+        params = {
+            "filename": filename,
+            "subfolder": subfolder,
+            "type": "input"
+        }
+        
+        try:
+            with self.pool.request('HEAD', f"/view?{urllib.parse.urlencode(params)}", timeout=10) as response:
+                response.read()
+                return response.status == 200
+        except Exception as e:
+            print(f"Error checking uploaded image: {str(e)}")
+            return False
+    
+    def upload_image_deduplicated(self, image: ImageSource, subfolder: str = "") -> Optional[str]:
+        """
+        Upload an image under a name derived from its content, skipping the
+        upload when the server already holds the same bytes
+        
+        Args:
+            image: Image data as bytes, a file path or a binary file object
+            subfolder: Subfolder within the input directory
+            
+        Returns:
+            Image name to reference in workflows, None if the upload failed
+        """
+        try:
+            digest = hash_image(image)
+        except OSError as e:
+            print(f"Error reading image: {str(e)}")
+            return None
+        
+        filename = input_image_name(digest)
+        
+        name = self.upload_index.get(self.server_address, digest)
+        if name is not None:
+            # Entries persisted by earlier sessions are confirmed once, since
+            # the server's input directory may have been cleaned up meanwhile
+            if self.upload_index.is_verified(self.server_address, digest):
+                profiling.count('uploads_skipped')
+                return name
+            if self.has_input_image(filename, subfolder):
+                self.upload_index.mark_verified(self.server_address, digest)
+                profiling.count('uploads_skipped')
+                return name
+            self.upload_index.remove(self.server_address, digest)
+        
+        result = self.upload_image(image, filename, subfolder, overwrite=True)
+        if not result:
+            return None
+        
+        name = result.get('name', filename)
+        if result.get('subfolder'):
+            name = f"{result['subfolder']}/{name}"
+        
+        self.upload_index.add(self.server_address, digest, name)
+        return name
+    
+    def wait_for_completion(self, prompt_id: str, timeout: int = 300, poll_interval: float = 1.0,
+                            progress_callback: Optional[Callable[[Optional[str], int, int], None]] = None,
+                            cancel_event: Optional[threading.Event] = None,
+                            max_connection_failures: int = 5) -> Optional[Dict]:
         """
         Wait for a prompt to complete and return results
         
+        Completion is taken from the WebSocket event stream when available and
+        the history endpoint is polled only while the socket is down.
+        
         Args:
             prompt_id: The prompt ID to wait for
             timeout: Maximum time to wait in seconds
             poll_interval: Time between polls in seconds
-            
+            progress_callback: Called as (node, value, max) while the prompt runs,
+                from the listener thread
+            cancel_event: Stop waiting and return None once this event is set
+            max_connection_failures: Give up after this many consecutive failed
+                history requests, as the server is most likely down
+                
         Returns:
             History dictionary if completed, None if timeout or error
         """
         start_time = time.time()
         
-        while time.time() - start_time < timeout:
-            history = self.get_history(prompt_id)
-            
-            if history is not None:
-                # Check if execution is complete
-                if 'outputs' in history:
-                    return history
-            
-            time.sleep(poll_interval)
+        listener = self.get_progress_listener()
+        state = listener.watch(prompt_id, progress_callback) if listener else None
+        connections_seen = listener.connections if listener else 0
+        # Check history first: the prompt may have finished before we started listening
+        check_history = True
+        connection_failures = 0
+        
+        try:
+            while time.time() - start_time < timeout:
+                if cancel_event is not None and cancel_event.is_set():
+                    return None
+                
+                if not check_history and listener.connected.is_set() and not state.done.is_set():
+                    # Wake up periodically to notice a dropped socket or a cancel request
+                    remaining = timeout - (time.time() - start_time)
+                    state.done.wait(max(0.0, min(remaining, 1.0)))
+                    
+                    # After a reconnect events may have been missed, so check history once
+                    if not state.done.is_set() and listener.connections == connections_seen:
+                        continue
+                    connections_seen = listener.connections
+                check_history = state is None
+                
+                if state is not None and state.error:
+                    print(f"Prompt {prompt_id} failed: {state.error}")
+                    return None
+                
+                try:
+                    profiling.count('history_polls')
+                    history = self._fetch_history(prompt_id)
+                    connection_failures = 0
+                except (OSError, http.client.HTTPException, ValueError) as e:
+                    history = None
+                    connection_failures += 1
+                    print(f"Error getting history: {str(e)}")
+                    if connection_failures >= max_connection_failures:
+                        print(f"Lost connection to {self.server_address} waiting for prompt {prompt_id}")
+                        return None
+                
+                if history is not None:
+                    # Check if execution is complete
+                    if 'outputs' in history:
+                        return history
+                
+                if state is not None and state.done.is_set() and state.outputs and not state.cached_nodes:
+                    # History not written yet; every output arrived with the events
+                    return {'outputs': dict(state.outputs), 'status': {'completed': True}}
+                
+                if state is None or state.done.is_set() or not listener.connected.is_set():
+                    time.sleep(poll_interval)
+        finally:
+            if state is not None:
+                listener.unwatch(prompt_id)
+                self._record_server_phases(state, start_time)
         
         print(f"Timeout waiting for prompt {prompt_id}")
         return None
     
+    @staticmethod
+    def _record_server_phases(state: comfyui_websocket.PromptState, start_time: float):
+        """
+        Split the wait for a prompt into server queue and execution time
+        
+        Args:
+            state: WebSocket state of the prompt
+            start_time: time.time() value when waiting started
+        """
+        trace = profiling.current_trace()
+        if trace is None or state.started_at is None:
+            return
+        
+        # Convert the wall-clock start to the perf_counter clock of the trace
+        wait_start = time.perf_counter() - (time.time() - start_time)
+        started_at = max(state.started_at, wait_start)
+        finished_at = state.finished_at or time.perf_counter()
+        
+        trace.add_span('server_queue', wait_start, started_at)
+        trace.add_span('server_execute', started_at, finished_at,
+                       cached_nodes=len(state.cached_nodes))
+        trace.count('progress_events', state.events)
+    
+    def get_system_stats(self) -> Optional[Dict]:
+        """
+        Get the server's system and device statistics
+        
+        Returns:
+            Dictionary with 'system' and 'devices' entries, None on error
+        """
+        try:
+            status, response_body = self._request('GET', "/system_stats", timeout=5)
+            if status != 200:
+                print(f"Error getting system stats: HTTP {status}")
+                return None
+            
+            return json.loads(response_body.decode('utf-8'))
+            
+        except Exception as e:
+            print(f"Error getting system stats: {str(e)}")
+            return None
+    
+    def get_queue(self) -> Optional[Dict]:
+        """
+        Get the server's running and pending prompts
+        
+        Returns:
+            Dictionary with 'queue_running' and 'queue_pending' lists, None on error
+        """
+        try:
+            status, response_body = self._request('GET', "/queue", timeout=10)
+            if status != 200:
+                print(f"Error getting queue: HTTP {status}")
+                return None
+            
+            return json.loads(response_body.decode('utf-8'))
+            
+        except Exception as e:
+            print(f"Error getting queue: {str(e)}")
+            return None
+    
+    def cancel_prompt(self, prompt_id: str) -> bool:
+        """
+        Remove a prompt from the queue, interrupting it if it is already running
+        
+        Args:
+            prompt_id: The prompt ID to cancel
+            
+        Returns:
+            True if the requests were accepted, False otherwise
+        """
+        try:
+            headers = {'Content-Type': 'application/json'}
+            
+            queue = self.get_queue() or {}
+            running = [entry[1] for entry in queue.get('queue_running', []) if len(entry) > 1]
+            
+            if prompt_id in running:
+                # Only interrupt our own prompt; other users may share the server
+                status, _ = self._request(
+                    'POST', "/interrupt",
+                    body=json.dumps({"prompt_id": prompt_id}).encode('utf-8'),
+                    headers=headers
+                )
+            else:
+                status, _ = self._request(
+                    'POST', "/queue",
+                    body=json.dumps({"delete": [prompt_id]}).encode('utf-8'),
+                    headers=headers
+                )
+            
+            return status == 200
+            
+        except Exception as e:
+            print(f"Error cancelling prompt: {str(e)}")
+            return False
+    
     def get_output_images(self, history: Dict) -> List[Tuple[str, str, str]]:
         """
         Extract output image information from history
@@ -251,4 +1037,4 @@ def register():
 
 def unregister():
     """Unregister module"""
-    pass
+    close_all_pools()
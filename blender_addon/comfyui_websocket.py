@@ -0,0 +1,535 @@
+"""
+ComfyUI WebSocket progress channel
+Listens for execution events on /ws so jobs resolve as soon as they finish
+"""
+
+import base64
+import hashlib
+import json
+import os
+import socket
+import ssl
+import struct
+import threading
+import time
+import urllib.parse
+from typing import Callable, Dict, Optional, Tuple
+
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+OPCODE_CONTINUATION = 0x0
+OPCODE_TEXT = 0x1
+OPCODE_BINARY = 0x2
+OPCODE_CLOSE = 0x8
+OPCODE_PING = 0x9
+OPCODE_PONG = 0xA
+
+
+class WebSocket:
+    """Minimal RFC 6455 client, enough to follow ComfyUI's event stream"""
+    
+    def __init__(self, sock: socket.socket):
+        """
+        Wrap an already upgraded socket
+        
+        Args:
+            sock: Connected socket after a successful handshake
+        """
+        self.sock = sock
+        self._buffer = b""
+        self._send_lock = threading.Lock()
+        
+        # Message being reassembled; kept across socket timeouts
+        self._message_opcode: Optional[int] = None
+        self._fragments = []
+    
+    @classmethod
+    def connect(cls, url: str, timeout: float = 5.0) -> 'WebSocket':
+        """
+        Open a WebSocket connection
+        
+        Args:
+            url: ws:// or wss:// URL
+            timeout: Connect and handshake timeout in seconds
+            
+        Returns:
+            Connected WebSocket
+            
+        Raises:
+            OSError: If the connection or handshake fails
+        """
+        parsed = urllib.parse.urlsplit(url)
+        secure = parsed.scheme == 'wss'
+        host = parsed.hostname or 'localhost'
+        port = parsed.port or (443 if secure else 80)
+        path = parsed.path or '/'
+        if parsed.query:
+            path += '?' + parsed.query
+        
+        sock = socket.create_connection((host, port), timeout=timeout)
+        try:
+            if secure:
+                sock = ssl.create_default_context().wrap_socket(sock, server_hostname=host)
+            
+            key = base64.b64encode(os.urandom(16)).decode('ascii')
+            request = (
+                f"GET {path} HTTP/1.1\r\n"
+                f"Host: {parsed.netloc}\r\n"
+                "Upgrade: websocket\r\n"
+                "Connection: Upgrade\r\n"
+                f"Sec-WebSocket-Key: {key}\r\n"
+                "Sec-WebSocket-Version: 13\r\n"
+                "\r\n"
+            )
+            sock.sendall(request.encode('ascii'))
+            
+            # Read the handshake response headers
+            response = b""
+            while b"\r\n\r\n" not in response:
+                chunk = sock.recv(4096)
+                if not chunk:
+                    raise ConnectionError("Connection closed during WebSocket handshake")
+                response += chunk
+                if len(response) > 65536:
+                    raise ConnectionError("WebSocket handshake response too large")
+            
+            header_block, remainder = response.split(b"\r\n\r\n", 1)
+            lines = header_block.decode('latin-1').split("\r\n")
+            status_parts = lines[0].split(" ", 2)
+            if len(status_parts) < 2 or status_parts[1] != "101":
+                raise ConnectionError(f"WebSocket upgrade refused: {lines[0]}")
+            
+            headers = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            
+            expected = base64.b64encode(
+                hashlib.sha1((key + WEBSOCKET_GUID).encode('ascii')).digest()
+            ).decode('ascii')
+            if headers.get('sec-websocket-accept') != expected:
+                raise ConnectionError("Invalid Sec-WebSocket-Accept in handshake")
+        except BaseException:
+            sock.close()
+            raise
+        
+        ws = cls(sock)
+        ws._buffer = remainder
+        return ws
+    
+    def _fill(self, size: int):
+        """Read from the socket until at least size bytes are buffered"""
+        while len(self._buffer) < size:
+            chunk = self.sock.recv(max(65536, size - len(self._buffer)))
+            if not chunk:
+                raise ConnectionError("WebSocket connection closed")
+            self._buffer += chunk
+    
+    def _recv_frame(self) -> Tuple[bool, int, bytes]:
+        """
+        Read one frame and return (fin, opcode, payload)
+        
+        The frame is only taken out of the buffer once all of it has arrived,
+        so a socket timeout part way through loses nothing and the next call
+        parses the same frame again.
+        """
+        self._fill(2)
+        first, second = self._buffer[0], self._buffer[1]
+        fin = bool(first & 0x80)
+        opcode = first & 0x0F
+        masked = bool(second & 0x80)
+        length = second & 0x7F
+        offset = 2
+        
+        if length == 126:
+            self._fill(4)
+            length = struct.unpack_from("!H", self._buffer, 2)[0]
+            offset = 4
+        elif length == 127:
+            self._fill(10)
+            length = struct.unpack_from("!Q", self._buffer, 2)[0]
+            offset = 10
+        
+        mask = None
+        if masked:
+            self._fill(offset + 4)
+            mask = self._buffer[offset:offset + 4]
+            offset += 4
+        
+        self._fill(offset + length)
+        payload = self._buffer[offset:offset + length]
+        self._buffer = self._buffer[offset + length:]
+        if mask:
+            payload = _apply_mask(payload, mask)
+        
+        return fin, opcode, payload
+    
+    def send_frame(self, opcode: int, payload: bytes = b""):
+        """
+        Send a single masked frame
+        
+        Args:
+            opcode: Frame opcode
+            payload: Frame payload
+        """
+        header = bytearray([0x80 | opcode])
+        length = len(payload)
+        if length < 126:
+            header.append(0x80 | length)
+        elif length < 65536:
+            header.append(0x80 | 126)
+            header += struct.pack("!H", length)
+        else:
+            header.append(0x80 | 127)
+            header += struct.pack("!Q", length)
+        
+        mask = os.urandom(4)
+        with self._send_lock:
+            self.sock.sendall(bytes(header) + mask + _apply_mask(payload, mask))
+    
+    def recv(self) -> Optional[Tuple[int, bytes]]:
+        """
+        Receive the next data message, answering pings along the way
+        
+        A socket timeout leaves partly received frames and fragments in
+        place, so calling recv() again resumes the same message.
+        
+        Returns:
+            Tuple of (opcode, payload), or None when the server closed the connection
+        """
+        while True:
+            fin, opcode, payload = self._recv_frame()
+            
+            if opcode == OPCODE_PING:
+                self.send_frame(OPCODE_PONG, payload)
+                continue
+            if opcode == OPCODE_PONG:
+                continue
+            if opcode == OPCODE_CLOSE:
+                try:
+                    self.send_frame(OPCODE_CLOSE, payload[:2])
+                except OSError:
+                    pass
+                return None
+            
+            if opcode != OPCODE_CONTINUATION:
+                self._message_opcode = opcode
+                self._fragments = []
+            self._fragments.append(payload)
+            
+            if fin:
+                message = self._message_opcode, b"".join(self._fragments)
+                self._message_opcode = None
+                self._fragments = []
+                return message
+    
+    def close(self):
+        """Close the connection"""
+        try:
+            self.send_frame(OPCODE_CLOSE, struct.pack("!H", 1000))
+        except OSError:
+            pass
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+def _apply_mask(payload: bytes, mask: bytes) -> bytes:
+    """XOR payload with a 4-byte WebSocket mask"""
+    if not payload:
+        return payload
+    repeated = (mask * (len(payload) // 4 + 1))[:len(payload)]
+    return (int.from_bytes(payload, 'big') ^ int.from_bytes(repeated, 'big')).to_bytes(len(payload), 'big')
+
+
+class PromptState:
+    """Execution state of one prompt as reported over the WebSocket"""
+    
+    def __init__(self, prompt_id: str):
+        self.prompt_id = prompt_id
+        self.done = threading.Event()
+        self.error: Optional[str] = None
+        self.current_node: Optional[str] = None
+        self.progress: Tuple[int, int] = (0, 0)
+        self.outputs: Dict[str, Dict] = {}
+        self.cached_nodes = []
+        self.progress_callback: Optional[Callable[[Optional[str], int, int], None]] = None
+        
+        # perf_counter times for timing instrumentation
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.events = 0
+    
+    def _finish(self):
+        """Mark the prompt as finished"""
+        if self.finished_at is None:
+            self.finished_at = time.perf_counter()
+        self.done.set()
+    
+    def _notify(self):
+        """Call the progress callback, ignoring callback errors"""
+        if self.progress_callback is None:
+            return
+        try:
+            self.progress_callback(self.current_node, self.progress[0], self.progress[1])
+        except Exception as e:
+            print(f"Error in progress callback: {e}")
+
+
+class ProgressListener:
+    """Background thread following /ws events for one client_id"""
+    
+    # Number of finished prompt states remembered for late watchers
+    MAX_STATES = 256
+    
+    def __init__(self, server_address: str, client_id: str, idle_timeout: float = 30.0):
+        """
+        Initialize progress listener
+        
+        Args:
+            server_address: HTTP URL of the ComfyUI server
+            client_id: Client ID sent with queued prompts
+            idle_timeout: Seconds without watchers after which the listener stops
+        """
+        parsed = urllib.parse.urlsplit(server_address)
+        scheme = 'wss' if parsed.scheme == 'https' else 'ws'
+        query = urllib.parse.urlencode({"clientId": client_id})
+        self.url = f"{scheme}://{parsed.netloc}{parsed.path.rstrip('/')}/ws?{query}"
+        self.client_id = client_id
+        self.idle_timeout = idle_timeout
+        
+        self.connected = threading.Event()
+        self.connections = 0
+        self._states: Dict[str, PromptState] = {}
+        self._watchers: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._ws: Optional[WebSocket] = None
+        self._last_watched = time.monotonic()
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def alive(self) -> bool:
+        """Whether the listener thread is running"""
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self, connect_timeout: float = 2.0) -> bool:
+        """
+        Start the listener thread
+        
+        Args:
+            connect_timeout: Seconds to wait for the first connection
+            
+        Returns:
+            True if the socket connected within the timeout
+        """
+        if not self.alive:
+            self._stop.clear()
+            self._last_watched = time.monotonic()
+            self._thread = threading.Thread(
+                target=self._run, name=f"ComfyUI-WS-{self.client_id[:8]}", daemon=True
+            )
+            self._thread.start()
+        return self.connected.wait(connect_timeout)
+    
+    def stop(self):
+        """Stop the listener thread and close the socket"""
+        self._stop.set()
+        ws = self._ws
+        if ws is not None:
+            ws.close()
+    
+    def watch(self, prompt_id: str,
+              progress_callback: Optional[Callable[[Optional[str], int, int], None]] = None) -> PromptState:
+        """
+        Register interest in a prompt
+        
+        Args:
+            prompt_id: Prompt ID to follow
+            progress_callback: Called as (node, value, max) from the listener thread
+            
+        Returns:
+            PromptState that is updated as events arrive
+        """
+        with self._lock:
+            state = self._state_locked(prompt_id)
+            if progress_callback is not None:
+                state.progress_callback = progress_callback
+            self._watchers[prompt_id] = self._watchers.get(prompt_id, 0) + 1
+            self._last_watched = time.monotonic()
+        return state
+    
+    def unwatch(self, prompt_id: str):
+        """
+        Drop interest in a prompt
+        
+        Args:
+            prompt_id: Prompt ID passed to watch()
+        """
+        with self._lock:
+            count = self._watchers.get(prompt_id, 0) - 1
+            if count > 0:
+                self._watchers[prompt_id] = count
+            else:
+                self._watchers.pop(prompt_id, None)
+                state = self._states.get(prompt_id)
+                if state is not None:
+                    state.progress_callback = None
+            self._last_watched = time.monotonic()
+    
+    def _state_locked(self, prompt_id: str) -> PromptState:
+        """Get or create the state for a prompt (lock must be held)"""
+        state = self._states.get(prompt_id)
+        if state is None:
+            state = PromptState(prompt_id)
+            self._states[prompt_id] = state
+            if len(self._states) > self.MAX_STATES:
+                # Forget the oldest states nobody is waiting on
+                for old_id in list(self._states):
+                    if len(self._states) <= self.MAX_STATES:
+                        break
+                    if old_id not in self._watchers:
+                        del self._states[old_id]
+        return state
+    
+    def _idle(self) -> bool:
+        """Whether nobody has watched a prompt for longer than the idle timeout"""
+        with self._lock:
+            return not self._watchers and time.monotonic() - self._last_watched > self.idle_timeout
+    
+    def _run(self):
+        """Listener thread: connect, dispatch events and reconnect on failure"""
+        retry_delay = 0.5
+        
+        while not self._stop.is_set() and not self._idle():
+            try:
+                self._ws = WebSocket.connect(self.url)
+            except OSError:
+                self._stop.wait(retry_delay)
+                retry_delay = min(retry_delay * 2, 10.0)
+                continue
+            
+            retry_delay = 0.5
+            self._ws.sock.settimeout(1.0)
+            self.connections += 1
+            self.connected.set()
+            try:
+                while not self._stop.is_set():
+                    try:
+                        message = self._ws.recv()
+                    except socket.timeout:
+                        if self._idle():
+                            break
+                        continue
+                    if message is None:
+                        break
+                    opcode, payload = message
+                    if opcode == OPCODE_TEXT:
+                        self._dispatch(payload)
+            except (OSError, ValueError) as e:
+                print(f"ComfyUI WebSocket disconnected: {e}")
+            finally:
+                self.connected.clear()
+                self._ws.close()
+                self._ws = None
+    
+    def _dispatch(self, payload: bytes):
+        """Apply one JSON event to the matching prompt state"""
+        try:
+            message = json.loads(payload.decode('utf-8'))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            return
+        
+        if not isinstance(message, dict):
+            return
+        
+        msg_type = message.get('type')
+        data = message.get('data') or {}
+        prompt_id = data.get('prompt_id') if isinstance(data, dict) else None
+        if not prompt_id:
+            return
+        
+        with self._lock:
+            state = self._state_locked(prompt_id)
+        
+        state.events += 1
+        if state.started_at is None and msg_type in ('execution_start', 'execution_cached',
+                                                     'executing', 'progress'):
+            state.started_at = time.perf_counter()
+        
+        if msg_type == 'executing':
+            node = data.get('node')
+            if node is None:
+                state._finish()
+            else:
+                state.current_node = node
+                state.progress = (0, 0)
+                state._notify()
+        elif msg_type == 'progress':
+            state.current_node = data.get('node', state.current_node)
+            state.progress = (int(data.get('value', 0)), int(data.get('max', 0)))
+            state._notify()
+        elif msg_type == 'executed':
+            node = data.get('node')
+            if node is not None and isinstance(data.get('output'), dict):
+                state.outputs[node] = data['output']
+        elif msg_type == 'execution_cached':
+            state.cached_nodes.extend(data.get('nodes') or [])
+        elif msg_type == 'execution_success':
+            state._finish()
+        elif msg_type in ('execution_error', 'execution_interrupted'):
+            state.error = data.get('exception_message') or msg_type
+            state._finish()
+
+
+_listeners: Dict[Tuple[str, str], ProgressListener] = {}
+_listeners_lock = threading.Lock()
+
+
+def get_progress_listener(server_address: str, client_id: str) -> ProgressListener:
+    """
+    Get the running listener for a client, starting it if needed
+    
+    Args:
+        server_address: HTTP URL of the ComfyUI server
+        client_id: Client ID sent with queued prompts
+        
+    Returns:
+        ProgressListener (check .connected before relying on it)
+    """
+    key = (server_address.rstrip('/'), client_id)
+    
+    with _listeners_lock:
+        listener = _listeners.get(key)
+        if listener is None:
+            listener = ProgressListener(key[0], client_id)
+            _listeners[key] = listener
+        
+        # Drop listeners whose threads exited after going idle
+        for other_key in [k for k, l in _listeners.items() if k != key and not l.alive]:
+            del _listeners[other_key]
+    
+    listener.start()
+    return listener
+
+
+def stop_all_listeners():
+    """Stop every progress listener"""
+    with _listeners_lock:
+        listeners = list(_listeners.values())
+        _listeners.clear()
+    
+    for listener in listeners:
+        listener.stop()
+
+
+def register():
+    """Register module"""
+    pass
+
+
+def unregister():
+    """Unregister module"""
+    stop_all_listeners()
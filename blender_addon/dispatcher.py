@@ -0,0 +1,307 @@
+"""
+Multi-server dispatch for ComfyUI
+Balances jobs over several servers with health checks, retries and failover
+"""
+
+import http.client
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+from . import comfyui_client
+from . import profiling
+
+
+T = TypeVar('T')
+
+
+class DispatchError(Exception):
+    """Raised when no server could run a job"""
+    pass
+
+
+class ServerNode:
+    """One ComfyUI server together with its circuit breaker state"""
+    
+    # Circuit breaker states
+    CLOSED = 'CLOSED'
+    OPEN = 'OPEN'
+    HALF_OPEN = 'HALF_OPEN'
+    
+    def __init__(self, client: comfyui_client.ComfyUIClient,
+                 failure_threshold: int = 3, reset_timeout: float = 30.0):
+        """
+        Initialize server node
+        
+        Args:
+            client: Client for the server
+            failure_threshold: Consecutive failures after which the node is taken out
+            reset_timeout: Seconds before an unhealthy node gets a trial job again
+        """
+        self.client = client
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.in_flight = 0
+        self.last_load: Optional[Tuple[int, float]] = None
+        self.last_load_time = 0.0
+        self._lock = threading.Lock()
+    
+    @property
+    def server_address(self) -> str:
+        """URL of the server"""
+        return self.client.server_address
+    
+    def available(self) -> bool:
+        """
+        Whether the node may receive a job right now
+        
+        Returns:
+            True if the breaker is closed or a half-open trial is due
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            # Half-open nodes only take the single trial job already in flight
+            return self.state == self.HALF_OPEN and self.in_flight == 0
+    
+    def record_success(self):
+        """Close the breaker after a successful request"""
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+    
+    def record_failure(self):
+        """Count a failure, opening the breaker past the threshold"""
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    print(f"ComfyUI server {self.server_address} marked unhealthy")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+    
+    def query_load(self, max_age: float = 2.0) -> Optional[Tuple[int, float]]:
+        """
+        Query the server's queue length and free VRAM
+        
+        Args:
+            max_age: Reuse a load sample younger than this many seconds
+            
+        Returns:
+            Tuple of (queued prompts, free VRAM in bytes), None if the server is unreachable
+        """
+        now = time.monotonic()
+        if self.last_load is not None and now - self.last_load_time < max_age:
+            return self.last_load
+        
+        queue = self.client.get_queue()
+        stats = self.client.get_system_stats() if queue is not None else None
+        
+        if queue is None or stats is None:
+            self.record_failure()
+            return None
+        
+        queued = len(queue.get('queue_running', [])) + len(queue.get('queue_pending', []))
+        vram_free = sum(float(device.get('vram_free', 0)) for device in stats.get('devices', []))
+        
+        self.last_load = (queued, vram_free)
+        self.last_load_time = now
+        return self.last_load
+
+
+class ServerDispatcher:
+    """Dispatches jobs to the least-loaded healthy ComfyUI server"""
+    
+    def __init__(self, clients: Sequence[comfyui_client.ComfyUIClient], max_attempts: int = 4,
+                 backoff: float = 0.5, max_backoff: float = 10.0,
+                 failure_threshold: int = 3, reset_timeout: float = 30.0):
+        """
+        Initialize dispatcher
+        
+        Args:
+            clients: One client per server
+            max_attempts: Maximum number of attempts per job, across servers
+            backoff: Initial delay in seconds between attempts
+            max_backoff: Upper bound for the delay between attempts
+            failure_threshold: Consecutive failures after which a server is taken out
+            reset_timeout: Seconds before an unhealthy server gets a trial job again
+        """
+        if not clients:
+            raise ValueError("At least one ComfyUI client is required")
+        
+        self.nodes = [ServerNode(client, failure_threshold, reset_timeout) for client in clients]
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+    
+    @property
+    def primary_client(self) -> comfyui_client.ComfyUIClient:
+        """Client of the first configured server"""
+        return self.nodes[0].client
+    
+    def pick_node(self, exclude: Sequence[ServerNode] = ()) -> Optional[ServerNode]:
+        """
+        Choose the least-loaded healthy node
+        
+        Load is the server's queue length plus the jobs this dispatcher has in
+        flight there; free VRAM breaks ties.
+        
+        Args:
+            exclude: Nodes that already failed this job
+            
+        Returns:
+            ServerNode, or None if no node is available
+        """
+        candidates = [node for node in self.nodes if node not in exclude and node.available()]
+        if not candidates:
+            return None
+        
+        if len(candidates) == 1:
+            loads = [candidates[0].query_load()]
+        else:
+            with ThreadPoolExecutor(max_workers=len(candidates)) as executor:
+                loads = list(executor.map(lambda node: node.query_load(), candidates))
+        
+        best = None
+        best_key = None
+        with self._lock:
+            for node, load in zip(candidates, loads):
+                if load is None:
+                    continue
+                queued, vram_free = load
+                key = (queued + node.in_flight, -vram_free)
+                if best_key is None or key < best_key:
+                    best, best_key = node, key
+            
+            if best is not None:
+                best.in_flight += 1
+        
+        return best
+    
+    def release_node(self, node: ServerNode):
+        """Mark a job picked with pick_node as no longer in flight"""
+        with self._lock:
+            node.in_flight -= 1
+    
+    def run(self, job: Callable[[comfyui_client.ComfyUIClient], T],
+            fatal_exceptions: Tuple[type, ...] = ()) -> T:
+        """
+        Run a job on the best server, failing over to others
+        
+        A job that raises on a server which then fails a health check is
+        re-queued on another server. Errors from a healthy server are the
+        job's own and are raised unchanged.
+        
+        Args:
+            job: Function taking the chosen client and running the whole job on it
+            fatal_exceptions: Exception types that are raised without retrying
+            
+        Returns:
+            The job's result
+            
+        Raises:
+            DispatchError: If every attempt failed because of server problems
+        """
+        tried: List[ServerNode] = []
+        delay = self.backoff
+        last_error: Optional[BaseException] = None
+        
+        for attempt in range(self.max_attempts):
+            # Prefer servers this job has not failed on, but allow retries
+            # once every server has been tried
+            with profiling.span('pick_server', attempt=attempt + 1):
+                node = self.pick_node(exclude=tried if len(tried) < len(self.nodes) else ())
+            
+            if node is not None:
+                try:
+                    result = job(node.client)
+                    node.record_success()
+                    return result
+                except fatal_exceptions:
+                    raise
+                except (OSError, http.client.HTTPException) as e:
+                    last_error = e
+                except Exception as e:
+                    success, _ = node.client.test_connection()
+                    if success:
+                        raise
+                    last_error = e
+                finally:
+                    self.release_node(node)
+                
+                print(f"ComfyUI server {node.server_address} failed, retrying elsewhere: {last_error}")
+                profiling.count('failovers')
+                node.record_failure()
+                tried.append(node)
+            
+            if attempt + 1 < self.max_attempts:
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_backoff)
+        
+        raise DispatchError(f"No ComfyUI server could run the job: {last_error or 'all servers unavailable'}")
+    
+    def test_connections(self) -> List[Tuple[str, bool, str]]:
+        """
+        Test every server
+        
+        Returns:
+            List of (server address, success, message)
+        """
+        results = []
+        for node in self.nodes:
+            success, message = node.client.test_connection()
+            if success:
+                node.record_success()
+            else:
+                node.record_failure()
+            results.append((node.server_address, success, message))
+        return results
+
+
+_dispatchers: Dict[Tuple, ServerDispatcher] = {}
+_dispatchers_lock = threading.Lock()
+
+
+def get_dispatcher(server_addresses: Sequence[str], **client_kwargs) -> ServerDispatcher:
+    """
+    Get a shared dispatcher for a set of servers
+    
+    Dispatchers are kept so health state carries over between jobs.
+    
+    Args:
+        server_addresses: URLs of the servers
+        **client_kwargs: Arguments for each ComfyUIClient
+        
+    Returns:
+        ServerDispatcher for those servers
+    """
+    addresses = tuple(address.rstrip('/') for address in server_addresses)
+    key = (addresses, tuple(sorted((k, id(v) if k == 'upload_index' else v) for k, v in client_kwargs.items())))
+    
+    with _dispatchers_lock:
+        dispatcher = _dispatchers.get(key)
+        if dispatcher is None:
+            clients = [comfyui_client.ComfyUIClient(address, **client_kwargs) for address in addresses]
+            dispatcher = ServerDispatcher(clients)
+            _dispatchers[key] = dispatcher
+        return dispatcher
+
+
+def register():
+    """Register module"""
+    pass
+
+
+def unregister():
+    """Unregister module"""
+    with _dispatchers_lock:
+        _dispatchers.clear()
@@ -0,0 +1,295 @@
+"""
+PNG decoding with NumPy and zlib
+Decodes image bytes in memory without OpenCV or bpy.data.images, so it is safe on worker threads
+"""
+
+import struct
+import zlib
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# Channels per PNG color type
+CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+# Bit depths allowed per PNG color type
+BIT_DEPTHS = {0: (1, 2, 4, 8, 16), 2: (8, 16), 3: (1, 2, 4, 8), 4: (8, 16), 6: (8, 16)}
+
+COLOR_TYPE_PALETTE = 3
+
+# Adam7 passes as (x start, y start, x step, y step)
+ADAM7_PASSES = (
+    (0, 0, 8, 8), (4, 0, 8, 8), (0, 4, 4, 8), (2, 0, 4, 4),
+    (0, 2, 2, 4), (1, 0, 2, 2), (0, 1, 1, 2),
+)
+
+# Row filter types
+FILTER_NONE = 0
+FILTER_SUB = 1
+FILTER_UP = 2
+FILTER_AVERAGE = 3
+FILTER_PAETH = 4
+
+
+def decode_png(data: bytes) -> np.ndarray:
+    """
+    Decode a PNG image
+    
+    Palette images are expanded to RGB, or RGBA when they have a tRNS chunk.
+    Samples below 8 bits are scaled up to 8 bits and 16-bit samples are
+    reduced to 8 bits.
+    
+    Args:
+        data: PNG file contents
+        
+    Returns:
+        uint8 array of shape (height, width, channels), first row at the top
+        
+    Raises:
+        ValueError: If the data is not a supported PNG
+    """
+    view = memoryview(data)
+    if bytes(view[:8]) != PNG_SIGNATURE:
+        raise ValueError("Not a PNG image")
+    
+    header = None
+    palette = None
+    transparency = None
+    idat = []
+    offset = 8
+    while offset + 8 <= len(view):
+        length, chunk_type = struct.unpack('>I4s', view[offset:offset + 8])
+        chunk = view[offset + 8:offset + 8 + length]
+        offset += 12 + length
+        
+        if chunk_type == b'IHDR':
+            header = struct.unpack('>IIBBBBB', chunk)
+        elif chunk_type == b'PLTE':
+            palette = np.frombuffer(chunk, dtype=np.uint8).reshape(-1, 3)
+        elif chunk_type == b'tRNS':
+            transparency = np.frombuffer(chunk, dtype=np.uint8)
+        elif chunk_type == b'IDAT':
+            idat.append(chunk)
+        elif chunk_type == b'IEND':
+            break
+    
+    if header is None:
+        raise ValueError("PNG has no header")
+    
+    width, height, bit_depth, color_type, _, _, interlace = header
+    if color_type not in CHANNELS:
+        raise ValueError(f"Unsupported PNG color type {color_type}")
+    if bit_depth not in BIT_DEPTHS[color_type]:
+        raise ValueError(f"Unsupported PNG bit depth {bit_depth} for color type {color_type}")
+    if interlace > 1:
+        raise ValueError(f"Unsupported PNG interlace method {interlace}")
+    
+    channels = CHANNELS[color_type]
+    raw = zlib.decompress(b''.join(idat))
+    
+    if interlace:
+        samples = np.zeros((height, width, channels), dtype=np.uint8)
+        offset = 0
+        for x_start, y_start, x_step, y_step in ADAM7_PASSES:
+            pass_width = max(0, -(-(width - x_start) // x_step))
+            pass_height = max(0, -(-(height - y_start) // y_step))
+            if not pass_width or not pass_height:
+                continue
+            pass_samples, offset = _decode_pass(raw, offset, pass_width, pass_height,
+                                                channels, bit_depth)
+            samples[y_start::y_step, x_start::x_step] = pass_samples
+    else:
+        samples, offset = _decode_pass(raw, 0, width, height, channels, bit_depth)
+    
+    if offset != len(raw):
+        raise ValueError("PNG image data has the wrong size")
+    
+    if color_type == COLOR_TYPE_PALETTE:
+        return _expand_palette(samples[:, :, 0], palette, transparency)
+    
+    if bit_depth < 8:
+        # Scale to the full 8-bit range, e.g. 1-bit 0/1 to 0/255
+        samples = samples * np.uint8(255 // ((1 << bit_depth) - 1))
+    
+    return np.ascontiguousarray(samples)
+
+
+def _decode_pass(raw: bytes, offset: int, width: int, height: int,
+                 channels: int, bit_depth: int) -> Tuple[np.ndarray, int]:
+    """
+    Unfilter and unpack one image, or one Adam7 pass of an interlaced image
+    
+    Args:
+        raw: Decompressed image data
+        offset: Start of this image's rows in raw
+        width: Width in pixels
+        height: Height in pixels
+        channels: Samples per pixel
+        bit_depth: Bits per sample
+        
+    Returns:
+        Tuple of (uint8 samples of shape (height, width, channels), end offset).
+        Samples below 8 bits are not scaled; 16-bit samples keep their high byte.
+    """
+    # Filters work on whole bytes, at least one per pixel
+    bpp = max(1, channels * bit_depth // 8)
+    row_bytes = (width * channels * bit_depth + 7) // 8
+    end = offset + height * (row_bytes + 1)
+    if end > len(raw):
+        raise ValueError("PNG image data has the wrong size")
+    
+    rows = np.frombuffer(raw, dtype=np.uint8, count=end - offset, offset=offset)
+    rows = rows.reshape(height, row_bytes + 1)
+    pixels = _unfilter(rows[:, 0], rows[:, 1:], bpp)
+    
+    if bit_depth == 16:
+        # Keep the most significant byte of each big-endian sample
+        pixels = pixels.reshape(height, width * channels, 2)[:, :, 0]
+    elif bit_depth < 8:
+        # Split each byte into its samples, most significant bits first
+        per_byte = 8 // bit_depth
+        shifts = np.arange(8 - bit_depth, -1, -bit_depth, dtype=np.uint8)
+        mask = np.uint8((1 << bit_depth) - 1)
+        pixels = (pixels[:, :, None] >> shifts) & mask
+        pixels = pixels.reshape(height, row_bytes * per_byte)[:, :width * channels]
+    
+    return pixels.reshape(height, width, channels), end
+
+
+def _expand_palette(indices: np.ndarray, palette: Optional[np.ndarray],
+                    transparency: Optional[np.ndarray]) -> np.ndarray:
+    """
+    Look up palette indices
+    
+    Args:
+        indices: uint8 palette indices of shape (height, width)
+        palette: PLTE entries of shape (entries, 3)
+        transparency: tRNS alpha of the first entries, if any
+        
+    Returns:
+        uint8 RGB array, or RGBA if there is transparency
+    """
+    if palette is None:
+        raise ValueError("PNG palette image has no palette")
+    if indices.size and int(indices.max()) >= len(palette):
+        raise ValueError("PNG palette index out of range")
+    
+    lut = palette
+    if transparency is not None:
+        alpha = np.full(len(palette), 255, dtype=np.uint8)
+        alpha[:min(len(transparency), len(palette))] = transparency[:len(palette)]
+        lut = np.concatenate([palette, alpha[:, None]], axis=1)
+    
+    return lut[indices]
+
+
+def _unfilter(filters: np.ndarray, data: np.ndarray, bpp: int) -> np.ndarray:
+    """
+    Reverse the PNG row filters
+    
+    None, Sub and Up rows are reconstructed with whole-row array operations.
+    Average and Paeth depend on the reconstructed pixel to the left, so runs of
+    such rows are reconstructed along anti-diagonals, each step handling every
+    pixel whose left, upper and upper-left neighbours are already known.
+    
+    Args:
+        filters: Filter type of each row
+        data: Filtered rows without the filter bytes, shape (height, row_bytes)
+        bpp: Bytes per complete pixel
+        
+    Returns:
+        Reconstructed uint8 rows, shape (height, row_bytes)
+    """
+    height, row_bytes = data.shape
+    width = row_bytes // bpp
+    
+    if np.any(filters > FILTER_PAETH):
+        raise ValueError("Invalid PNG filter type")
+    
+    out = np.empty((height, row_bytes), dtype=np.uint8)
+    previous = np.zeros(row_bytes, dtype=np.uint8)
+    
+    y = 0
+    while y < height:
+        filter_type = filters[y]
+        row = data[y]
+        
+        if filter_type == FILTER_NONE:
+            out[y] = row
+        elif filter_type == FILTER_SUB:
+            # Running sum per channel, wrapping at 256
+            sums = np.cumsum(row.reshape(width, bpp), axis=0, dtype=np.uint32)
+            out[y] = (sums & 0xFF).astype(np.uint8).reshape(row_bytes)
+        elif filter_type == FILTER_UP:
+            out[y] = row + previous
+        else:
+            end = y + 1
+            while end < height and filters[end] >= FILTER_AVERAGE:
+                end += 1
+            out[y:end] = _unfilter_diagonal(filters[y:end], data[y:end], previous, bpp)
+            y = end
+            previous = out[y - 1]
+            continue
+        
+        previous = out[y]
+        y += 1
+    
+    return out
+
+
+def _unfilter_diagonal(filters: np.ndarray, data: np.ndarray,
+                       previous: np.ndarray, bpp: int) -> np.ndarray:
+    """
+    Reconstruct a run of Average and Paeth rows along anti-diagonals
+    
+    Args:
+        filters: Filter type of each row in the run
+        data: Filtered rows of the run
+        previous: Reconstructed row above the run
+        bpp: Bytes per complete pixel
+        
+    Returns:
+        Reconstructed uint8 rows of the run
+    """
+    rows, row_bytes = data.shape
+    width = row_bytes // bpp
+    
+    # Padded with a zero column on the left and the known row on top
+    recon = np.zeros((rows + 1, width + 1, bpp), dtype=np.int16)
+    recon[0, 1:] = previous.reshape(width, bpp)
+    filtered = data.reshape(rows, width, bpp).astype(np.int16)
+    is_average = (filters == FILTER_AVERAGE)
+    
+    for diagonal in range(rows + width - 1):
+        y = np.arange(max(0, diagonal - width + 1), min(rows, diagonal + 1))
+        x = diagonal - y
+        
+        a = recon[y + 1, x]
+        b = recon[y, x + 1]
+        c = recon[y, x]
+        
+        # Paeth predictor
+        pa = np.abs(b - c)
+        pb = np.abs(a - c)
+        pc = np.abs(a + b - 2 * c)
+        predictor = np.where((pa <= pb) & (pa <= pc), a, np.where(pb <= pc, b, c))
+        
+        average = (a + b) >> 1
+        predictor = np.where(is_average[y][:, None], average, predictor)
+        
+        recon[y + 1, x + 1] = (filtered[y, x] + predictor) & 0xFF
+    
+    return recon[1:, 1:].astype(np.uint8).reshape(rows, row_bytes)
+
+
+def register():
+    """Register module"""
+    pass
+
+
+def unregister():
+    """Unregister module"""
+    pass
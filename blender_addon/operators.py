@@ -6,12 +6,94 @@ import bpy
 import os
 from bpy.types import Operator
 from bpy.props import StringProperty
+from typing import Optional
 
 from . import comfyui_client
-from . import render_utils
-from . import pose_processor
+from . import dispatcher
+from . import result_cache
 from . import workflow_manager
 from . import preferences
+from . import pose_job
+from . import pose_processor
+
+
+def get_client_settings(context) -> dict:
+    """
+    Get ComfyUIClient keyword arguments from the add-on preferences
+    
+    Args:
+        context: Blender context
+        
+    Returns:
+        Dictionary of client keyword arguments
+    """
+    prefs = preferences.get_addon_preferences(context)
+    settings = {
+        "upload_index": comfyui_client.get_upload_index(
+            os.path.join(preferences.get_cache_directory(context), "uploads.json")
+        ),
+    }
+    
+    if prefs is not None:
+        settings["pool_size"] = prefs.connection_pool_size
+        settings["idle_timeout"] = prefs.connection_idle_timeout
+    
+    return settings
+
+
+def create_dispatcher(context) -> dispatcher.ServerDispatcher:
+    """
+    Get the dispatcher for all servers configured in the add-on preferences
+    
+    Args:
+        context: Blender context
+        
+    Returns:
+        ServerDispatcher balancing jobs over the configured servers
+    """
+    return dispatcher.get_dispatcher(
+        preferences.get_server_addresses(context), **get_client_settings(context)
+    )
+
+
+def get_result_cache_directory(context) -> str:
+    """Get the directory the result cache is stored in"""
+    return os.path.join(preferences.get_cache_directory(context), "results")
+
+
+def get_result_cache(context) -> Optional[result_cache.ResultCache]:
+    """
+    Get the result cache configured in the add-on preferences
+    
+    Args:
+        context: Blender context
+        
+    Returns:
+        ResultCache, or None if caching is disabled
+    """
+    prefs = preferences.get_addon_preferences(context)
+    size_mb = prefs.result_cache_size if prefs is not None else 512
+    if size_mb <= 0:
+        return None
+    
+    return result_cache.get_result_cache(get_result_cache_directory(context), size_mb * 1024 * 1024)
+
+
+def get_trace_path(context) -> Optional[str]:
+    """
+    Get the file job traces are exported to
+    
+    Args:
+        context: Blender context
+        
+    Returns:
+        Path of the JSON-lines trace file, or None if export is disabled
+    """
+    prefs = preferences.get_addon_preferences(context)
+    if prefs is None or not prefs.export_traces:
+        return None
+    
+    return os.path.join(preferences.get_cache_directory(context), "traces.jsonl")
 
 
 class AIPOSE_OT_TestConnection(Operator):
@@ -22,15 +104,21 @@ class AIPOSE_OT_TestConnection(Operator):
     bl_options = {'REGISTER'}
     
     def execute(self, context):
-        prefs = preferences.get_addon_preferences(context)
-        server_address = prefs.comfyui_server if prefs else "http://localhost:8188"
+        # Test every configured server
+        results = create_dispatcher(context).test_connections()
+        failed = [(address, message) for address, success, message in results if not success]
         
-        # Create client and test connection
-        client = comfyui_client.ComfyUIClient(server_address)
-        success, message = client.test_connection()
+        if len(results) == 1:
+            success = not failed
+            message = results[0][2]
+        else:
+            success = len(failed) < len(results)
+            message = f"{len(results) - len(failed)} of {len(results)} ComfyUI servers reachable"
+            for address, error in failed:
+                print(f"{address}: {error}")
         
         if success:
-            self.report({'INFO'}, message)
+            self.report({'INFO'} if not failed else {'WARNING'}, message)
             context.scene.ai_pose_status = "Connected"
         else:
             self.report({'ERROR'}, message)
@@ -95,7 +183,7 @@ class AIPOSE_OT_GeneratePose(Operator):
     bl_idname = "aipose.generate_pose"
     bl_label = "Generate Pose"
     bl_description = "Generate and apply pose using ComfyUI and AI"
-    bl_options = {'REGISTER', 'UNDO'}
+    bl_options = {'REGISTER'}
     
     def execute(self, context):
         scene = context.scene
@@ -117,153 +205,146 @@ class AIPOSE_OT_GeneratePose(Operator):
             self.report({'ERROR'}, "Please load a valid workflow JSON file")
             return {'CANCELLED'}
         
-        # Get preferences
-        prefs = preferences.get_addon_preferences(context)
-        server_address = prefs.comfyui_server if prefs else "http://localhost:8188"
-        
-        try:
-            # Update status
-            scene.ai_pose_status = "Rendering views..."
-            context.area.tag_redraw()
-            
-            # Render front and side views with armature
-            self.report({'INFO'}, "Rendering rest pose views...")
-            front_rest, side_rest = render_utils.render_both_views(
-                scene.ai_pose_target_object,
-                scene.ai_pose_armature,
-                scene.ai_pose_render_resolution,
-                scene.ai_pose_show_bones
-            )
-            
-            # Load workflow
-            scene.ai_pose_status = "Loading workflow..."
-            wm = workflow_manager.WorkflowManager()
-            workflow, error = wm.load_workflow(scene.ai_pose_workflow_path)
-            
-            if workflow is None:
-                self.report({'ERROR'}, f"Failed to load workflow: {error}")
-                return {'CANCELLED'}
-            
-            # Create ComfyUI client
-            client = comfyui_client.ComfyUIClient(server_address)
-            
-            # Upload images to ComfyUI
-            scene.ai_pose_status = "Uploading images..."
-            self.report({'INFO'}, "Uploading images to ComfyUI...")
-            
-            with open(front_rest, 'rb') as f:
-                front_data = f.read()
-            with open(side_rest, 'rb') as f:
-                side_data = f.read()
-            
-            front_result = client.upload_image(front_data, "front_rest.png")
-            side_result = client.upload_image(side_data, "side_rest.png")
-            
-            if not front_result or not side_result:
-                self.report({'ERROR'}, "Failed to upload images to ComfyUI")
-                return {'CANCELLED'}
-            
-            # Update workflow with inputs
-            scene.ai_pose_status = "Processing with AI..."
-            updated_workflow = wm.update_workflow_inputs(
-                workflow,
-                "front_rest.png",
-                "side_rest.png",
-                scene.ai_pose_prompt
-            )
-            
-            # Validate updated workflow before sending
-            is_valid, validation_error = wm.validate_workflow_structure(updated_workflow)
-            if not is_valid:
-                self.report({'ERROR'}, f"Workflow validation failed: {validation_error}")
-                return {'CANCELLED'}
-            
-            # Queue prompt
-            self.report({'INFO'}, "Sending to ComfyUI for processing...")
-            
-            # Debug: Print workflow structure
-            print(f"Workflow has {len(updated_workflow)} nodes")
-            for node_id in updated_workflow.keys():
-                print(f"  Node {node_id}: {updated_workflow[node_id].get('class_type', 'NO CLASS_TYPE')}")
-            
-            prompt_id = client.queue_prompt(updated_workflow)
-            
-            if not prompt_id:
-                self.report({'ERROR'}, "Failed to queue prompt in ComfyUI")
-                return {'CANCELLED'}
-            
-            # Wait for completion
-            scene.ai_pose_status = "Waiting for AI processing..."
-            self.report({'INFO'}, f"Prompt queued (ID: {prompt_id}). Waiting for completion...")
-            
-            history = client.wait_for_completion(prompt_id, timeout=300)
-            
-            if not history:
-                self.report({'ERROR'}, "Timeout waiting for ComfyUI to complete")
-                return {'CANCELLED'}
-            
-            # Get output images
-            scene.ai_pose_status = "Downloading results..."
-            output_images = client.get_output_images(history)
-            
-            if len(output_images) < 2:
-                self.report({'ERROR'}, f"Expected 2 output images, got {len(output_images)}")
-                return {'CANCELLED'}
-            
-            # Download images
-            self.report({'INFO'}, "Downloading generated images...")
-            import tempfile
-            
-            front_posed_path = os.path.join(tempfile.gettempdir(), "front_posed.png")
-            side_posed_path = os.path.join(tempfile.gettempdir(), "side_posed.png")
-            
-            front_image_data = client.get_image(*output_images[0])
-            side_image_data = client.get_image(*output_images[1])
-            
-            if not front_image_data or not side_image_data:
-                self.report({'ERROR'}, "Failed to download output images")
-                return {'CANCELLED'}
-            
-            with open(front_posed_path, 'wb') as f:
-                f.write(front_image_data)
-            with open(side_posed_path, 'wb') as f:
-                f.write(side_image_data)
-            
-            # Process images and apply pose
-            scene.ai_pose_status = "Applying pose..."
-            self.report({'INFO'}, "Extracting pose and applying to armature...")
-            
-            success = pose_processor.process_ai_generated_images(
-                scene.ai_pose_armature,
-                front_rest, side_rest,
-                front_posed_path, side_posed_path,
-                influence=1.0
-            )
-            
-            if success:
-                scene.ai_pose_status = "Pose applied successfully!"
-                self.report({'INFO'}, "Pose generated and applied successfully!")
-            else:
-                scene.ai_pose_status = "Failed to apply pose"
-                self.report({'ERROR'}, "Failed to process pose from AI images")
-                return {'CANCELLED'}
-            
-            # Cleanup temp files
-            for path in [front_rest, side_rest, front_posed_path, side_posed_path]:
-                try:
-                    if os.path.exists(path):
-                        os.remove(path)
-                except:
-                    pass
-            
-            return {'FINISHED'}
-            
-        except Exception as e:
-            scene.ai_pose_status = f"Error: {str(e)}"
-            self.report({'ERROR'}, f"Error during pose generation: {str(e)}")
-            import traceback
-            traceback.print_exc()
+        if pose_job.get_active_job() is not None:
+            self.report({'ERROR'}, "A pose generation job is already running")
             return {'CANCELLED'}
+        
+        # Network and image work runs on a worker thread; rendering and
+        # applying the pose are handed back to the main thread by timers
+        job = pose_job.PoseJob(
+            create_dispatcher(context),
+            scene.name,
+            scene.ai_pose_target_object.name,
+            scene.ai_pose_armature.name,
+            scene.ai_pose_prompt,
+            scene.ai_pose_workflow_path,
+            resolution=scene.ai_pose_render_resolution,
+            show_bones=scene.ai_pose_show_bones,
+            fast_capture=scene.ai_pose_fast_capture,
+            bone_mask=scene.ai_pose_bone_mask,
+            influence=1.0,
+            timeout=300,
+            cache=get_result_cache(context),
+            trace_path=get_trace_path(context)
+        )
+        job.start()
+        
+        scene.ai_pose_status = "Starting..."
+        self.report({'INFO'}, "Pose generation started in the background")
+        
+        return {'FINISHED'}
+
+
+def parse_batch_prompts(text: bpy.types.Text) -> list:
+    """
+    Read pose prompts from a text block
+    
+    Args:
+        text: Text block with one prompt per line
+        
+    Returns:
+        List of non-empty prompts, skipping '#' comment lines
+    """
+    prompts = []
+    for line in text.lines:
+        prompt = line.body.strip()
+        if prompt and not prompt.startswith('#'):
+            prompts.append(prompt)
+    return prompts
+
+
+class AIPOSE_OT_GenerateBatch(Operator):
+    """Generate one pose per prompt from a text block"""
+    bl_idname = "aipose.generate_batch"
+    bl_label = "Generate Batch"
+    bl_description = "Render once and generate a stored pose action for every prompt in the text block"
+    bl_options = {'REGISTER'}
+    
+    def execute(self, context):
+        scene = context.scene
+        
+        # Validate inputs
+        if not scene.ai_pose_target_object:
+            self.report({'ERROR'}, "Please select a target model")
+            return {'CANCELLED'}
+        
+        if not scene.ai_pose_armature:
+            self.report({'ERROR'}, "Please select an armature")
+            return {'CANCELLED'}
+        
+        if not scene.ai_pose_batch_prompts:
+            self.report({'ERROR'}, "Please select a text block with prompts")
+            return {'CANCELLED'}
+        
+        prompts = parse_batch_prompts(scene.ai_pose_batch_prompts)
+        if not prompts:
+            self.report({'ERROR'}, "The prompt text block is empty")
+            return {'CANCELLED'}
+        
+        if not scene.ai_pose_workflow_path or not os.path.exists(scene.ai_pose_workflow_path):
+            self.report({'ERROR'}, "Please load a valid workflow JSON file")
+            return {'CANCELLED'}
+        
+        if pose_job.get_active_job() is not None:
+            self.report({'ERROR'}, "A pose generation job is already running")
+            return {'CANCELLED'}
+        
+        job = pose_job.BatchPoseJob(
+            create_dispatcher(context),
+            scene.name,
+            scene.ai_pose_target_object.name,
+            scene.ai_pose_armature.name,
+            prompts,
+            scene.ai_pose_workflow_path,
+            max_in_flight=scene.ai_pose_batch_max_in_flight,
+            resolution=scene.ai_pose_render_resolution,
+            show_bones=scene.ai_pose_show_bones,
+            fast_capture=scene.ai_pose_fast_capture,
+            bone_mask=scene.ai_pose_bone_mask,
+            influence=1.0,
+            timeout=300,
+            cache=get_result_cache(context),
+            trace_path=get_trace_path(context)
+        )
+        job.start()
+        
+        scene.ai_pose_status = "Starting batch..."
+        self.report({'INFO'}, f"Batch of {len(prompts)} prompts started in the background")
+        
+        return {'FINISHED'}
+
+
+class AIPOSE_OT_CancelJob(Operator):
+    """Cancel the running pose generation job"""
+    bl_idname = "aipose.cancel_job"
+    bl_label = "Cancel"
+    bl_description = "Cancel the running pose generation job"
+    bl_options = {'REGISTER'}
+    
+    @classmethod
+    def poll(cls, context):
+        return pose_job.get_active_job() is not None
+    
+    def execute(self, context):
+        pose_job.cancel_all_jobs()
+        context.scene.ai_pose_status = "Cancelling..."
+        self.report({'INFO'}, "Cancelling pose generation")
+        return {'FINISHED'}
+
+
+class AIPOSE_OT_ClearResultCache(Operator):
+    """Remove all cached generation results"""
+    bl_idname = "aipose.clear_result_cache"
+    bl_label = "Clear Cache"
+    bl_description = "Remove all cached generation results"
+    bl_options = {'REGISTER'}
+    
+    def execute(self, context):
+        # Entries are removed even while caching is disabled
+        cache = get_result_cache(context) or result_cache.ResultCache(get_result_cache_directory(context))
+        cache.clear()
+        self.report({'INFO'}, "Result cache cleared")
+        return {'FINISHED'}
 
 
 class AIPOSE_OT_ResetPose(Operator):
@@ -280,18 +361,8 @@ class AIPOSE_OT_ResetPose(Operator):
             self.report({'ERROR'}, "No valid armature selected")
             return {'CANCELLED'}
         
-        # Set active and enter pose mode
-        context.view_layer.objects.active = armature
-        bpy.ops.object.mode_set(mode='POSE')
-        
-        # Select all bones
-        bpy.ops.pose.select_all(action='SELECT')
-        
-        # Clear transforms
-        bpy.ops.pose.transforms_clear()
-        
-        # Return to object mode
-        bpy.ops.object.mode_set(mode='OBJECT')
+        # Clear transforms through the data API, without mode switches
+        pose_processor.reset_pose(armature)
         
         context.scene.ai_pose_status = "Pose reset to rest position"
         self.report({'INFO'}, "Pose reset to rest position")
@@ -304,6 +375,9 @@ classes = [
     AIPOSE_OT_TestConnection,
     AIPOSE_OT_LoadWorkflow,
     AIPOSE_OT_GeneratePose,
+    AIPOSE_OT_GenerateBatch,
+    AIPOSE_OT_CancelJob,
+    AIPOSE_OT_ClearResultCache,
     AIPOSE_OT_ResetPose,
 ]
 
@@ -0,0 +1,813 @@
+"""
+Background pose generation jobs
+Runs network and image work on a worker thread and hands bpy work back to the main thread
+"""
+
+import bpy
+import os
+import queue
+import tempfile
+import threading
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+from . import comfyui_client
+from . import dispatcher
+from . import render_utils
+from . import pose_processor
+from . import profiling
+from . import result_cache
+from . import workflow_manager
+
+
+T = TypeVar('T')
+
+
+# Interval at which queued main thread calls are executed
+TIMER_INTERVAL = 0.05
+
+_main_thread_calls = queue.Queue()
+_jobs: List['PoseJob'] = []
+_jobs_lock = threading.Lock()
+
+
+class PoseJobError(Exception):
+    """Raised when a pipeline step of a pose job fails"""
+    pass
+
+
+class JobCancelled(Exception):
+    """Raised inside a worker when its job was cancelled"""
+    pass
+
+
+def call_on_main_thread(func: Callable, *args, wait: bool = True, **kwargs):
+    """
+    Run a function on Blender's main thread
+    
+    The call is picked up by a bpy.app.timers callback, so this must not be
+    used from the main thread itself with wait=True.
+    
+    Args:
+        func: Function to call
+        *args: Positional arguments
+        wait: Block until the call finished and return its result
+        **kwargs: Keyword arguments
+        
+    Returns:
+        The function's result if wait is True, otherwise a Future
+    """
+    future = Future()
+    _main_thread_calls.put((future, func, args, kwargs))
+    
+    if wait:
+        return future.result()
+    return future
+
+
+def _process_main_thread_calls() -> float:
+    """Timer callback executing queued main thread calls"""
+    while True:
+        try:
+            future, func, args, kwargs = _main_thread_calls.get_nowait()
+        except queue.Empty:
+            break
+        
+        if not future.set_running_or_notify_cancel():
+            continue
+        
+        try:
+            future.set_result(func(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+    
+    return TIMER_INTERVAL
+
+
+def redraw_ui():
+    """Tag all 3D viewport sidebars for redraw"""
+    window_manager = bpy.context.window_manager
+    if window_manager is None:
+        return
+    
+    for window in window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+
+
+def _set_scene_status(scene_name: str, text: str):
+    """Update a scene's status text (main thread only)"""
+    scene = bpy.data.scenes.get(scene_name)
+    if scene is not None:
+        scene.ai_pose_status = text
+    redraw_ui()
+
+
+def get_active_job() -> Optional['PoseJob']:
+    """
+    Get the job currently in flight
+    
+    Returns:
+        The running PoseJob, or None
+    """
+    with _jobs_lock:
+        return _jobs[-1] if _jobs else None
+
+
+def cancel_all_jobs():
+    """Request cancellation of every running job"""
+    with _jobs_lock:
+        jobs = list(_jobs)
+    
+    for job in jobs:
+        job.cancel()
+
+
+class PoseJob:
+    """Generate a pose for one prompt without blocking Blender's UI"""
+    
+    def __init__(self, server_dispatcher: dispatcher.ServerDispatcher, scene_name: str,
+                 object_name: str, armature_name: str, prompt: str, workflow_path: str,
+                 resolution: int = 1024, show_bones: bool = True, fast_capture: bool = True,
+                 bone_mask: bool = False, influence: float = 1.0, timeout: int = 300,
+                 cache: Optional[result_cache.ResultCache] = None,
+                 trace_path: Optional[str] = None):
+        """
+        Initialize pose job
+        
+        Blender data is referenced by name and only resolved on the main thread.
+        
+        Args:
+            server_dispatcher: Dispatcher choosing the ComfyUI server for each prompt
+            scene_name: Name of the scene whose status is updated
+            object_name: Name of the mesh object to render
+            armature_name: Name of the armature to pose
+            prompt: Pose prompt text
+            workflow_path: Path to the workflow JSON file
+            resolution: Render resolution
+            show_bones: Whether to show armature bones
+            fast_capture: Render the rest views with Workbench instead of the scene's engine
+            bone_mask: Render a bone mask of the rest views; bones are named by its ID colours, or detected in it without them
+            influence: Pose influence factor (0-1)
+            timeout: Maximum time to wait for ComfyUI in seconds
+            cache: Result cache to reuse earlier generations from, None to disable
+            trace_path: JSON-lines file the job's timing trace is appended to, None to skip
+        """
+        self.dispatcher = server_dispatcher
+        self.scene_name = scene_name
+        self.object_name = object_name
+        self.armature_name = armature_name
+        self.prompt = prompt
+        self.workflow_path = workflow_path
+        self.resolution = resolution
+        self.show_bones = show_bones
+        self.fast_capture = fast_capture
+        self.bone_mask = bone_mask
+        self.influence = influence
+        self.timeout = timeout
+        self.cache = cache
+        self.trace_path = trace_path
+        
+        self.state = 'QUEUED'
+        self.message = ""
+        self.temp_files: List[str] = []
+        self.trace = profiling.JobTrace(type(self).__name__, {
+            'object': object_name,
+            'armature': armature_name,
+            'resolution': resolution,
+            'fast_capture': fast_capture,
+            'bone_mask': bone_mask,
+        })
+        
+        self._cancel = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def running(self) -> bool:
+        """Whether the job has not finished yet"""
+        return self.state in ('QUEUED', 'RUNNING')
+    
+    def start(self):
+        """Start the job on a worker thread"""
+        with _jobs_lock:
+            _jobs.append(self)
+        
+        self.state = 'RUNNING'
+        self._thread = threading.Thread(target=self._run, name="AIPose-Job", daemon=True)
+        self._thread.start()
+    
+    def cancel(self):
+        """Request cancellation; the worker stops at its next checkpoint"""
+        self._cancel.set()
+    
+    def check_cancelled(self):
+        """Raise JobCancelled if cancellation was requested"""
+        if self._cancel.is_set():
+            raise JobCancelled()
+    
+    def set_status(self, text: str):
+        """
+        Show a status message in the scene without waiting for the main thread
+        
+        Args:
+            text: Status text
+        """
+        self.message = text
+        call_on_main_thread(_set_scene_status, self.scene_name, text, wait=False)
+    
+    def _run(self):
+        """Worker thread entry point"""
+        try:
+            with profiling.activate(self.trace):
+                self.run_pipeline()
+            self.state = 'FINISHED'
+        except JobCancelled:
+            self.state = 'CANCELLED'
+            self.set_status("Cancelled")
+        except Exception as e:
+            self.state = 'FAILED'
+            self.set_status(f"Error: {str(e)}")
+            print(f"Error during pose generation: {str(e)}")
+            traceback.print_exc()
+        finally:
+            self._cleanup()
+            self._finish_trace()
+            with _jobs_lock:
+                if self in _jobs:
+                    _jobs.remove(self)
+    
+    def _cleanup(self):
+        """Remove temporary files"""
+        for path in self.temp_files:
+            try:
+                if os.path.exists(path):
+                    os.remove(path)
+            except OSError:
+                pass
+    
+    def _finish_trace(self):
+        """Close the timing trace and export it if requested"""
+        self.trace.finish(self.state)
+        profiling.set_last_trace(self.trace)
+        
+        if self.trace_path:
+            self.trace.export(self.trace_path)
+        
+        summary = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.trace.phase_totals())
+        print(f"Pose job {self.state.lower()} in {self.trace.duration:.2f}s: {summary}")
+    
+    def _on_progress(self, node: Optional[str], value: int, maximum: int):
+        """Progress callback from the WebSocket listener"""
+        if maximum:
+            self.set_status(f"Processing with AI... node {node}: {value}/{maximum}")
+        elif node:
+            self.set_status(f"Processing with AI... node {node}")
+    
+    def _render_views(self):
+        """Render the rest views (main thread only)"""
+        obj = bpy.data.objects.get(self.object_name)
+        armature = bpy.data.objects.get(self.armature_name)
+        
+        if obj is None or armature is None:
+            raise PoseJobError("Target model or armature no longer exists")
+        
+        return render_utils.capture_both_views(obj, armature, self.resolution,
+                                               self.show_bones, self.fast_capture,
+                                               bone_mask=self.bone_mask)
+    
+    def _extract_rotations(self, images: List, rest_ids: Optional[List] = None,
+                           rest_bone_names: Optional[List[str]] = None,
+                           cameras: Optional[List[Dict]] = None) -> Optional[Dict]:
+        """Extract bone rotations from decoded images (main thread only)"""
+        armature = bpy.data.objects.get(self.armature_name)
+        if armature is None:
+            raise PoseJobError("Armature no longer exists")
+        
+        try:
+            return pose_processor.extract_pose_rotations(armature, *images, influence=self.influence,
+                                                         rest_ids=rest_ids,
+                                                         rest_bone_names=rest_bone_names,
+                                                         cameras=cameras)
+        except Exception as e:
+            print(f"Error processing images: {e}")
+            traceback.print_exc()
+            return None
+    
+    def _apply_rotations(self, rotations: Dict):
+        """Apply bone rotations to the armature (main thread only)"""
+        armature = bpy.data.objects.get(self.armature_name)
+        if armature is None:
+            raise PoseJobError("Armature no longer exists")
+        
+        pose_processor.apply_rotations_to_armature(armature, rotations)
+        
+        try:
+            bpy.ops.ed.undo_push(message="AI Pose")
+        except RuntimeError:
+            pass
+    
+    def render_rest_views(self) -> Tuple[render_utils.CapturedView, render_utils.CapturedView]:
+        """Render the rest views on the main thread and return them in memory"""
+        self.set_status("Rendering views...")
+        with profiling.span('render'):
+            front_rest, side_rest = call_on_main_thread(self._render_views)
+        self.check_cancelled()
+        return front_rest, side_rest
+    
+    def load_workflow(self) -> Dict:
+        """Load the workflow JSON file"""
+        self.set_status("Loading workflow...")
+        with profiling.span('load_workflow'):
+            workflow, error = workflow_manager.WorkflowManager.load_workflow(self.workflow_path)
+        
+        if workflow is None:
+            raise PoseJobError(f"Failed to load workflow: {error}")
+        return workflow
+    
+    def upload_rest_views(self, client: comfyui_client.ComfyUIClient,
+                          front_rest: render_utils.CapturedView,
+                          side_rest: render_utils.CapturedView) -> Tuple[str, str]:
+        """
+        Upload the rest views to ComfyUI
+        
+        Args:
+            client: Client of the server running the prompt
+            front_rest: Front view capture
+            side_rest: Side view capture
+            
+        Returns:
+            Tuple of (front name, side name) as stored on the server
+        """
+        self.set_status("Uploading images...")
+        
+        # Names are derived from the image content, so unchanged renders are
+        # not sent again
+        with profiling.span('upload', server=client.server_address):
+            front_name = client.upload_image_deduplicated(front_rest.png_bytes)
+            side_name = client.upload_image_deduplicated(side_rest.png_bytes)
+        
+        if not front_name or not side_name:
+            raise PoseJobError("Failed to upload images to ComfyUI")
+        self.check_cancelled()
+        
+        return front_name, side_name
+    
+    def build_workflow(self, workflow: Dict, front_name: str, side_name: str, prompt: str) -> Dict:
+        """Fill the workflow inputs for one prompt and validate the result"""
+        updated_workflow = workflow_manager.WorkflowManager.update_workflow_inputs(
+            workflow,
+            front_name,
+            side_name,
+            prompt
+        )
+        
+        # Validate updated workflow before sending
+        is_valid, validation_error = workflow_manager.WorkflowManager.validate_workflow_structure(updated_workflow)
+        if not is_valid:
+            raise PoseJobError(f"Workflow validation failed: {validation_error}")
+        
+        return updated_workflow
+    
+    def queue_and_wait(self, client: comfyui_client.ComfyUIClient, workflow: Dict,
+                       progress_callback: Optional[Callable[[Optional[str], int, int], None]] = None) -> Dict:
+        """
+        Queue a workflow and wait until ComfyUI finished it
+        
+        Args:
+            client: Client of the server running the prompt
+            workflow: Workflow with inputs filled in
+            progress_callback: Called as (node, value, max) while the prompt runs
+            
+        Returns:
+            History dictionary of the finished prompt
+        """
+        with profiling.span('queue_prompt', server=client.server_address):
+            prompt_id = client.queue_prompt(workflow)
+        
+        if not prompt_id:
+            raise PoseJobError("Failed to queue prompt in ComfyUI")
+        
+        try:
+            with profiling.span('server_wait', prompt_id=prompt_id):
+                history = client.wait_for_completion(
+                    prompt_id,
+                    timeout=self.timeout,
+                    progress_callback=progress_callback,
+                    cancel_event=self._cancel
+                )
+            self.check_cancelled()
+        except JobCancelled:
+            client.cancel_prompt(prompt_id)
+            raise
+        
+        if not history:
+            raise PoseJobError("Timeout waiting for ComfyUI to complete")
+        return history
+    
+    def posed_paths(self, prefix: str) -> Tuple[str, str]:
+        """
+        Get the temporary paths the posed images of a prompt are written to
+        
+        Args:
+            prefix: Prefix for the temporary file names
+            
+        Returns:
+            Tuple of (front posed path, side posed path), removed when the job cleans up
+        """
+        front_posed_path = os.path.join(tempfile.gettempdir(), f"{prefix}front_posed.png")
+        side_posed_path = os.path.join(tempfile.gettempdir(), f"{prefix}side_posed.png")
+        for path in (front_posed_path, side_posed_path):
+            if path not in self.temp_files:
+                self.temp_files.append(path)
+        return front_posed_path, side_posed_path
+    
+    def download_outputs(self, client: comfyui_client.ComfyUIClient,
+                         history: Dict, prefix: str) -> Tuple[str, str]:
+        """
+        Download the front and side output images of a finished prompt
+        
+        Args:
+            client: Client of the server that ran the prompt
+            history: History dictionary of the finished prompt
+            prefix: Prefix for the temporary file names
+            
+        Returns:
+            Tuple of (front posed path, side posed path)
+        """
+        output_images = client.get_output_images(history)
+        
+        if len(output_images) < 2:
+            raise PoseJobError(f"Expected 2 output images, got {len(output_images)}")
+        
+        front_posed_path, side_posed_path = self.posed_paths(prefix)
+        
+        # Both images are streamed to disk concurrently
+        with profiling.span('download'):
+            digests = client.download_images([
+                (output_images[0], front_posed_path),
+                (output_images[1], side_posed_path),
+            ])
+        
+        if not all(digests):
+            raise PoseJobError("Failed to download output images")
+        self.check_cancelled()
+        
+        return front_posed_path, side_posed_path
+    
+    def load_images(self, *paths: str) -> List:
+        """Decode downloaded images on the worker thread"""
+        with profiling.span('decode_images', count=len(paths)):
+            images = [pose_processor.load_image_file(path) for path in paths]
+        
+        if any(img is None for img in images):
+            raise PoseJobError("Failed to load generated images")
+        return images
+    
+    def rest_pixels(self, front_rest: render_utils.CapturedView,
+                    side_rest: render_utils.CapturedView) -> List:
+        """Decode the rest views, or their bone masks, once; later calls reuse the arrays
+        
+        With bone IDs the rest views themselves are measured like the
+        generated images, and the IDs only name the bones.
+        """
+        with profiling.span('decode_images', count=2):
+            try:
+                if self.bone_mask and front_rest.bone_ids is None:
+                    return [front_rest.mask, side_rest.mask]
+                return [front_rest.pixels, side_rest.pixels]
+            except ValueError as e:
+                raise PoseJobError(str(e))
+    
+    @staticmethod
+    def rest_cameras(front_rest: render_utils.CapturedView,
+                     side_rest: render_utils.CapturedView) -> Optional[List[Dict]]:
+        """Cameras of the rest views for triangulation, or None if not recorded"""
+        if front_rest.camera is None or side_rest.camera is None:
+            return None
+        return [front_rest.camera, side_rest.camera]
+    
+    def rest_ids(self, front_rest: render_utils.CapturedView,
+                 side_rest: render_utils.CapturedView) -> Optional[List]:
+        """Decode the rest bone ID maps once, or None when rest bones are thresholded"""
+        if self.rest_bone_names(front_rest) is None:
+            return None
+        with profiling.span('decode_images', count=2):
+            try:
+                return [front_rest.id_map, side_rest.id_map]
+            except ValueError as e:
+                raise PoseJobError(str(e))
+    
+    def rest_bone_names(self, front_rest: render_utils.CapturedView) -> Optional[List[str]]:
+        """Bone names indexing the rest ID maps, or None when rest bones are thresholded"""
+        if self.bone_mask and front_rest.bone_ids is not None:
+            return front_rest.bone_ids['names']
+        return None
+    
+    def run_remote(self, remote: Callable[[comfyui_client.ComfyUIClient], T]) -> T:
+        """
+        Run the server side of a prompt on the best available server
+        
+        The whole remote part is re-run on another server if the chosen one
+        goes down, since a dead server also loses the uploads and the queue.
+        
+        Args:
+            remote: Function taking the chosen client
+            
+        Returns:
+            The function's result
+        """
+        try:
+            return self.dispatcher.run(remote, fatal_exceptions=(JobCancelled,))
+        except dispatcher.DispatchError as e:
+            raise PoseJobError(str(e))
+    
+    @property
+    def rotation_variant(self) -> str:
+        """Identifies the armature and settings cached rotations were extracted for"""
+        # Tagged so rotations from older normalized-space extraction are not reused
+        variant = f"{self.armature_name}:{self.influence:g}:world"
+        return f"{variant}:mask" if self.bone_mask else variant
+    
+    def result_key(self, workflow: Dict, rest_digests: Optional[List[str]], prompt: str) -> Optional[str]:
+        """
+        Compute the result cache key of one prompt
+        
+        The workflow is filled with the content-derived upload names, so the
+        key does not depend on which server the images end up on.
+        
+        Args:
+            workflow: Workflow as loaded from disk
+            rest_digests: SHA-256 digests of the front and side rest views
+            prompt: Pose prompt text
+            
+        Returns:
+            Cache key, or None if caching is disabled
+        """
+        if self.cache is None or not rest_digests:
+            return None
+        
+        names = [comfyui_client.input_image_name(digest) for digest in rest_digests]
+        keyed_workflow = self.build_workflow(workflow, names[0], names[1], prompt)
+        return result_cache.compute_result_key(keyed_workflow, rest_digests, prompt)
+    
+    def hash_rest_views(self, front_rest: render_utils.CapturedView,
+                        side_rest: render_utils.CapturedView) -> Optional[List[str]]:
+        """Hash the rest views for the result cache; None if caching is disabled"""
+        if self.cache is None:
+            return None
+        
+        try:
+            with profiling.span('hash_inputs'):
+                return [comfyui_client.hash_image(front_rest.png_bytes),
+                        comfyui_client.hash_image(side_rest.png_bytes)]
+        except OSError as e:
+            print(f"Error hashing rest views: {str(e)}")
+            return None
+    
+    def generate_images(self, key: Optional[str], workflow: Dict,
+                        front_rest: render_utils.CapturedView, side_rest: render_utils.CapturedView,
+                        prompt: str, prefix: str,
+                        progress_callback: Optional[Callable[[Optional[str], int, int], None]] = None
+                        ) -> Tuple[str, str]:
+        """
+        Get the posed images for one prompt, from the cache or from ComfyUI
+        
+        Args:
+            key: Result cache key, None to skip the cache
+            workflow: Workflow as loaded from disk
+            front_rest: Front view capture
+            side_rest: Side view capture
+            prompt: Pose prompt text
+            prefix: Prefix for the temporary file names
+            progress_callback: Called as (node, value, max) while the prompt runs
+            
+        Returns:
+            Tuple of (front posed path, side posed path)
+        """
+        if key is not None:
+            # Copied out of the cache, so eviction by another job can't remove them
+            cached = self.posed_paths(prefix)
+            if self.cache.get_images(key, *cached):
+                profiling.count('cache_hits')
+                print(f"Using cached result for prompt: {prompt}")
+                return cached
+            profiling.count('cache_misses')
+        
+        def remote(client: comfyui_client.ComfyUIClient) -> Tuple[str, str]:
+            front_name, side_name = self.upload_rest_views(client, front_rest, side_rest)
+            
+            updated_workflow = self.build_workflow(workflow, front_name, side_name, prompt)
+            
+            # Debug: Print workflow structure
+            print(f"Workflow has {len(updated_workflow)} nodes")
+            for node_id in updated_workflow.keys():
+                print(f"  Node {node_id}: {updated_workflow[node_id].get('class_type', 'NO CLASS_TYPE')}")
+            
+            self.set_status("Processing with AI...")
+            history = self.queue_and_wait(client, updated_workflow, progress_callback)
+            
+            self.set_status("Downloading results...")
+            return self.download_outputs(client, history, prefix)
+        
+        front_posed, side_posed = self.run_remote(remote)
+        
+        if key is not None:
+            with profiling.span('cache_store'):
+                self.cache.put_images(key, front_posed, side_posed)
+        
+        return front_posed, side_posed
+    
+    def cache_rotations(self, key: Optional[str], rotations: Dict):
+        """Store extracted rotations in the result cache"""
+        if key is not None and rotations:
+            self.cache.put_rotations(key, self.rotation_variant, {
+                name: tuple(rotation) for name, rotation in rotations.items()
+            })
+    
+    def run_pipeline(self):
+        """Run all pipeline steps; called on the worker thread"""
+        front_rest, side_rest = self.render_rest_views()
+        workflow = self.load_workflow()
+        key = self.result_key(workflow, self.hash_rest_views(front_rest, side_rest), self.prompt)
+        
+        # Rotations already extracted for this armature skip image processing too
+        rotations = self.cache.get_rotations(key, self.rotation_variant) if key else None
+        if rotations is not None:
+            profiling.count('cache_hits')
+            self.set_status("Applying cached pose...")
+            with profiling.span('apply_pose'):
+                call_on_main_thread(self._apply_rotations, rotations)
+            self.set_status("Pose applied from cache!")
+            return
+        
+        front_posed, side_posed = self.generate_images(
+            key, workflow, front_rest, side_rest, self.prompt, "", self._on_progress
+        )
+        
+        self.set_status("Applying pose...")
+        images = self.rest_pixels(front_rest, side_rest) + self.load_images(front_posed, side_posed)
+        
+        with profiling.span('extract_pose'):
+            rotations = call_on_main_thread(self._extract_rotations, images,
+                                            self.rest_ids(front_rest, side_rest),
+                                            self.rest_bone_names(front_rest),
+                                            self.rest_cameras(front_rest, side_rest))
+        if rotations is None:
+            raise PoseJobError("Failed to process pose from AI images")
+        
+        with profiling.span('apply_pose'):
+            call_on_main_thread(self._apply_rotations, rotations)
+        
+        self.cache_rotations(key, rotations)
+        self.set_status("Pose applied successfully!")
+
+
+class BatchPoseJob(PoseJob):
+    """Generate one pose per prompt, sharing a single render and upload"""
+    
+    def __init__(self, server_dispatcher: dispatcher.ServerDispatcher, scene_name: str,
+                 object_name: str, armature_name: str, prompts: List[str], workflow_path: str,
+                 max_in_flight: int = 4, **kwargs):
+        """
+        Initialize batch pose job
+        
+        Args:
+            server_dispatcher: Dispatcher choosing the ComfyUI server for each prompt
+            scene_name: Name of the scene whose status is updated
+            object_name: Name of the mesh object to render
+            armature_name: Name of the armature to pose
+            prompts: Pose prompts, one pose is stored per prompt
+            workflow_path: Path to the workflow JSON file
+            max_in_flight: Maximum number of prompts queued on ComfyUI at once
+            **kwargs: Further PoseJob arguments
+        """
+        super().__init__(server_dispatcher, scene_name, object_name, armature_name,
+                         "", workflow_path, **kwargs)
+        self.prompts = prompts
+        self.max_in_flight = max(1, max_in_flight)
+        self.completed = 0
+        self.failed = 0
+        self.actions: List[str] = []
+    
+    def _batch_status(self, running: int):
+        """Show batch progress in the scene"""
+        self.set_status(
+            f"Batch: {self.completed}/{len(self.prompts)} done, "
+            f"{running} in flight, {self.failed} failed"
+        )
+    
+    def _store_pose(self, index: int, prompt: str, rotations: Dict) -> Optional[str]:
+        """Store extracted rotations as an action (main thread only)"""
+        armature = bpy.data.objects.get(self.armature_name)
+        if armature is None:
+            raise PoseJobError("Armature no longer exists")
+        
+        action = pose_processor.store_pose_as_action(
+            armature, rotations, f"AIPose_{index + 1:03d}_{prompt[:40]}"
+        )
+        return action.name if action else None
+    
+    def _generate_one(self, index: int, prompt: str, workflow: Dict,
+                      front_rest: render_utils.CapturedView, side_rest: render_utils.CapturedView,
+                      rest_digests: Optional[List[str]]) -> Tuple:
+        """
+        Get the result of one prompt; runs on a pool thread
+        
+        Returns:
+            Tuple of (index, prompt, cache key, posed image paths, cached rotations),
+            where either the paths or the rotations are None
+        """
+        self.check_cancelled()
+        
+        key = self.result_key(workflow, rest_digests, prompt)
+        rotations = self.cache.get_rotations(key, self.rotation_variant) if key else None
+        if rotations is not None:
+            profiling.count('cache_hits')
+            return index, prompt, key, None, rotations
+        
+        # Uploads are deduplicated, so only the first prompt per server uploads
+        front_posed, side_posed = self.generate_images(
+            key, workflow, front_rest, side_rest, prompt, f"batch_{index}_"
+        )
+        return index, prompt, key, [front_posed, side_posed], None
+    
+    def run_pipeline(self):
+        """Render once, then run all prompts concurrently"""
+        front_rest, side_rest = self.render_rest_views()
+        workflow = self.load_workflow()
+        rest_digests = self.hash_rest_views(front_rest, side_rest)
+        
+        self._batch_status(0)
+        
+        with ThreadPoolExecutor(max_workers=self.max_in_flight,
+                                thread_name_prefix="AIPose-Batch") as executor:
+            futures = [
+                executor.submit(profiling.bind(self._generate_one), index, prompt, workflow,
+                                front_rest, side_rest, rest_digests)
+                for index, prompt in enumerate(self.prompts)
+            ]
+            
+            try:
+                for future in as_completed(futures):
+                    running = sum(1 for f in futures if f.running())
+                    try:
+                        index, prompt, key, posed_paths, rotations = future.result()
+                        
+                        if rotations is None:
+                            # Rest views are only decoded once a prompt needs them
+                            rest_images = self.rest_pixels(front_rest, side_rest)
+                            posed_images = self.load_images(*posed_paths)
+                            with profiling.span('extract_pose'):
+                                rotations = call_on_main_thread(self._extract_rotations,
+                                                                rest_images + posed_images,
+                                                                self.rest_ids(front_rest, side_rest),
+                                                                self.rest_bone_names(front_rest),
+                                                                self.rest_cameras(front_rest, side_rest))
+                            if rotations is None:
+                                raise PoseJobError("Failed to process pose from AI images")
+                            self.cache_rotations(key, rotations)
+                        
+                        with profiling.span('store_action'):
+                            name = call_on_main_thread(self._store_pose, index, prompt, rotations)
+                        if name:
+                            self.actions.append(name)
+                        self.completed += 1
+                    except JobCancelled:
+                        raise
+                    except Exception as e:
+                        self.failed += 1
+                        print(f"Batch prompt failed: {str(e)}")
+                    self._batch_status(running)
+            except JobCancelled:
+                for f in futures:
+                    f.cancel()
+                raise
+        
+        if self.completed == 0:
+            raise PoseJobError(f"All {len(self.prompts)} prompts failed")
+        
+        self.set_status(f"Batch finished: {self.completed} poses stored, {self.failed} failed")
+
+
+def register():
+    """Register module"""
+    if not bpy.app.timers.is_registered(_process_main_thread_calls):
+        bpy.app.timers.register(_process_main_thread_calls, first_interval=TIMER_INTERVAL, persistent=True)
+
+
+def unregister():
+    """Unregister module"""
+    cancel_all_jobs()
+    
+    if bpy.app.timers.is_registered(_process_main_thread_calls):
+        bpy.app.timers.unregister(_process_main_thread_calls)
+    
+    # Fail calls nobody will execute anymore so their workers can exit
+    while True:
+        try:
+            future, _, _, _ = _main_thread_calls.get_nowait()
+        except queue.Empty:
+            break
+        future.set_exception(JobCancelled())
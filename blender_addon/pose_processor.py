@@ -10,6 +10,11 @@ from typing import List, Tuple, Dict, Optional
 import tempfile
 import os
 
+from . import bone_detection
+from . import image_codec
+from . import profiling
+from . import triangulation
+
 
 try:
     # Try to import OpenCV if available (optional dependency)
@@ -20,6 +25,28 @@ except ImportError:
     print("OpenCV not available. Some features may be limited.")
 
 
+def image_to_array(img: bpy.types.Image) -> np.ndarray:
+    """
+    Read the pixels of a Blender image in bulk
+    
+    foreach_get fills a preallocated float32 buffer instead of building a
+    Python list of every channel value through img.pixels[:].
+    
+    Args:
+        img: Loaded Blender image
+        
+    Returns:
+        float32 array of shape (height, width, channels) in 0-1, first row at the top
+    """
+    width, height = img.size
+    channels = img.channels
+    pixels = np.empty(width * height * channels, dtype=np.float32)
+    img.pixels.foreach_get(pixels)
+    
+    # Blender stores the bottom row first
+    return pixels.reshape(height, width, channels)[::-1]
+
+
 def load_image_as_array(image_path: str) -> Optional[np.ndarray]:
     """
     Load image as numpy array
@@ -28,17 +55,19 @@ def load_image_as_array(image_path: str) -> Optional[np.ndarray]:
         image_path: Path to image file
         
     Returns:
-        Image as numpy array or None if failed
+        uint8 RGB(A) array with the first row at the top, or None if failed
     """
     if not HAS_CV2:
         # Fallback: Load using Blender's image API
         try:
             img = bpy.data.images.load(image_path)
-            pixels = np.array(img.pixels[:])
-            w, h = img.size
-            arr = pixels.reshape((h, w, 4))
-            bpy.data.images.remove(img)
-            return arr
+            try:
+                pixels = image_to_array(img)
+            finally:
+                bpy.data.images.remove(img)
+            
+            # Match the 8-bit arrays OpenCV and the PNG codec return
+            return np.clip(pixels * 255.0 + 0.5, 0, 255).astype(np.uint8)
         except Exception as e:
             print(f"Error loading image: {e}")
             return None
@@ -55,50 +84,170 @@ def load_image_as_array(image_path: str) -> Optional[np.ndarray]:
             return None
 
 
+def decode_image_bytes(data: bytes) -> Optional[np.ndarray]:
+    """
+    Decode an encoded image held in memory
+    
+    Does not touch bpy, so it is safe to call from a worker thread.
+    
+    Args:
+        data: Encoded image file contents
+        
+    Returns:
+        uint8 RGB(A) array with the first row at the top, or None if failed
+    """
+    try:
+        if HAS_CV2:
+            img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+            if img is not None and len(img.shape) == 3:
+                if img.shape[2] == 4:
+                    img = cv2.cvtColor(img, cv2.COLOR_BGRA2RGBA)
+                elif img.shape[2] == 3:
+                    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+            return img
+        
+        return image_codec.decode_png(data)
+    except Exception as e:
+        print(f"Error decoding image: {e}")
+        return None
+
+
+def load_image_file(image_path: str) -> Optional[np.ndarray]:
+    """
+    Read and decode an image file without going through bpy.data.images
+    
+    Args:
+        image_path: Path to image file
+        
+    Returns:
+        uint8 RGB(A) array with the first row at the top, or None if failed
+    """
+    try:
+        with open(image_path, 'rb') as f:
+            data = f.read()
+    except OSError as e:
+        print(f"Error loading image: {e}")
+        return None
+    
+    return decode_image_bytes(data)
+
+
 def detect_bone_positions(image: np.ndarray, threshold: int = 100) -> List[Tuple[int, int]]:
     """
     Detect bone positions in image (simplified version using red channel detection)
     
     Args:
-        image: Image array
-        threshold: Threshold for detecting bones (red channel intensity)
+        image: Image array, or a single-channel bone mask from render_bone_masks
+        threshold: Threshold for detecting bones (red channel or mask intensity)
         
     Returns:
-        List of (x, y) positions where bones are detected
+        List of (x, y) centroids of the detected bone components, in raster order
     """
     if image is None:
         return []
     
-    # For images with bone overlays (red emission shader), detect red pixels
-    if len(image.shape) == 3 and image.shape[2] >= 3:
-        # Extract red channel and look for bright red pixels
-        red_channel = image[:, :, 0]
-        
-        if HAS_CV2:
-            # Use OpenCV for better detection
-            _, binary = cv2.threshold(red_channel, threshold, 255, cv2.THRESH_BINARY)
-            contours, _ = cv2.findContours(binary.astype(np.uint8), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    components = bone_detection.detect_components(image, threshold)
+    return [(int(round(x)), int(round(y))) for x, y in components['centroid']]
+
+
+# Margin around the armature's projected bounds when cropping, as a fraction
+# of their larger side; posed bones may reach well beyond their rest bounds
+REST_ROI_MARGIN = 0.1
+POSED_ROI_MARGIN = 0.5
+
+# Smallest margin in render pixels, for bounds that are flat in one view
+ROI_MIN_PADDING = 16
+
+# Triangulated points that reproject further than this from their keypoints,
+# in render pixels, come from keypoints that don't correspond across views
+MAX_REPROJECTION_ERROR = 10.0
+
+
+def crop_to_roi(image: np.ndarray, camera: Optional[Dict],
+                margin: float = REST_ROI_MARGIN) -> Tuple[np.ndarray, Tuple[int, int]]:
+    """
+    Crop an image to the armature bounds recorded with its camera
+    
+    The crop is a slice of the image, so no pixels are copied.
+    
+    Args:
+        image: Image array, first row at the top
+        camera: Camera from CapturedView.camera with 'armature_bbox', or None
+        margin: Extra space around the bounds, as a fraction of their larger
+            side and at least ROI_MIN_PADDING render pixels
             
-            positions = []
-            for contour in contours:
-                M = cv2.moments(contour)
-                if M["m00"] != 0:
-                    cx = int(M["m10"] / M["m00"])
-                    cy = int(M["m01"] / M["m00"])
-                    positions.append((cx, cy))
+    Returns:
+        Tuple of (cropped view, (x, y) of its top-left pixel in the image);
+        the whole image when no bounds were recorded
+    """
+    bbox = camera.get('armature_bbox') if camera else None
+    if bbox is None:
+        return image, (0, 0)
+    
+    height, width = image.shape[:2]
+    resolution = camera.get('resolution', width)
+    x_min, y_min, x_max, y_max = bbox
+    # Pad both axes alike; a T-pose seen from the side is only a few pixels wide
+    pad = max(max(x_max - x_min, y_max - y_min) * margin, ROI_MIN_PADDING)
+    
+    # Bounds are in render pixels; generated images may be another size
+    scale_x, scale_y = width / resolution, height / resolution
+    left = max(0, int(np.floor((x_min - pad) * scale_x)))
+    top = max(0, int(np.floor((y_min - pad) * scale_y)))
+    right = min(width, int(np.ceil((x_max + pad) * scale_x)))
+    bottom = min(height, int(np.ceil((y_max + pad) * scale_y)))
+    if left >= right or top >= bottom:
+        return image, (0, 0)
+    
+    return image[top:bottom, left:right], (left, top)
+
+
+def triangulate_keypoints(keypoints: List[np.ndarray], image_shapes: List[Tuple[int, ...]],
+                          cameras: List[Dict],
+                          max_error: Optional[float] = MAX_REPROJECTION_ERROR
+                          ) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Triangulate corresponding keypoints of several views into world space
+    
+    Keypoints are scaled from each image to the render resolution its
+    camera was recorded at, so generated images of another size still line
+    up with the projection. Points reprojecting further than max_error
+    are rejected and counted as 'keypoints_rejected' in the current trace.
+    
+    Args:
+        keypoints: (x, y) pixel centers of shape (points, 2) per view, row i
+            of every view being the same point
+        image_shapes: Shape of the image each view's keypoints come from
+        cameras: Camera of each view, from CapturedView.camera
+        max_error: Largest accepted reprojection error in render pixels,
+            None to keep every point
             
-            return positions
-        else:
-            # Simple threshold-based detection
-            positions = np.argwhere(red_channel > threshold)
-            # Convert to list of tuples and subsample if too many points
-            positions = [(int(y), int(x)) for x, y in positions[::10]]  # Subsample every 10th point
-            return positions
+    Returns:
+        Tuple of (world positions of shape (points, 3), NaN where rejected,
+        and reprojection errors in render pixels of shape (points,))
+    """
+    projections = np.array([camera['projection'] for camera in cameras], dtype=np.float64)
+    pixels = []
+    for points, shape, camera in zip(keypoints, image_shapes, cameras):
+        resolution = camera.get('resolution', shape[1])
+        scale = np.array([resolution / shape[1], resolution / shape[0]])
+        # Pixel centers sit half a pixel from the projection's corner origin
+        pixels.append((np.asarray(points, dtype=np.float64).reshape(-1, 2) + 0.5) * scale)
+    
+    points, errors = triangulation.triangulate_points(projections, np.stack(pixels))
     
-    return []
+    if max_error is not None:
+        rejected = errors > max_error
+        points[rejected] = np.nan
+        if rejected.any():
+            profiling.count('keypoints_rejected', int(rejected.sum()))
+    
+    return points, errors
 
 
-def extract_bone_structure(front_image: np.ndarray, side_image: np.ndarray) -> Dict[str, Tuple[float, float, float]]:
+def extract_bone_structure(front_image: np.ndarray, side_image: np.ndarray,
+                           cameras: Optional[List[Dict]] = None,
+                           roi_margin: float = REST_ROI_MARGIN) -> Dict[str, Tuple[float, float, float]]:
     """
     Extract 3D bone positions from front and side views
     This is a simplified version - in production, you'd use more sophisticated computer vision
@@ -106,18 +255,35 @@ def extract_bone_structure(front_image: np.ndarray, side_image: np.ndarray) -> D
     Args:
         front_image: Front view image array
         side_image: Side view image array
+        cameras: Front and side cameras from CapturedView.camera; positions
+            are triangulated into world space when given, and only the region
+            around the armature is searched
+        roi_margin: Margin around the armature's bounds, see crop_to_roi
         
     Returns:
         Dictionary mapping bone identifiers to 3D positions
     """
+    front_roi, (front_x, front_y) = crop_to_roi(front_image, cameras[0] if cameras else None, roi_margin)
+    side_roi, (side_x, side_y) = crop_to_roi(side_image, cameras[1] if cameras else None, roi_margin)
+    
     # Detect bone positions in both views
-    front_positions = detect_bone_positions(front_image)
-    side_positions = detect_bone_positions(side_image)
+    front_positions = [(x + front_x, y + front_y) for x, y in detect_bone_positions(front_roi)]
+    side_positions = [(x + side_x, y + side_y) for x, y in detect_bone_positions(side_roi)]
     
     # This is a simplified reconstruction
     # In production, you'd use proper correspondence matching between views
     bone_structure = {}
     
+    if cameras is not None:
+        count = min(len(front_positions), len(side_positions))
+        points, _ = triangulate_keypoints([front_positions[:count], side_positions[:count]],
+                                          [front_image.shape, side_image.shape], cameras)
+        # Rejected keypoints don't correspond across the views; leave them out
+        for i, point in enumerate(points):
+            if np.isfinite(point).all():
+                bone_structure[f"bone_{i}"] = tuple(map(float, point))
+        return bone_structure
+    
     # For now, we'll create a simple mapping
     # This would need to be much more sophisticated in practice
     for i, (front_pos, side_pos) in enumerate(zip(front_positions, side_positions)):
@@ -136,6 +302,153 @@ def extract_bone_structure(front_image: np.ndarray, side_image: np.ndarray) -> D
     return bone_structure
 
 
+def rest_bone_directions(armature: bpy.types.Object, bone_names: List[str],
+                         cameras: Optional[List[Dict]] = None) -> np.ndarray:
+    """
+    Get the on-screen head-to-tail direction of rest bones in the front and side views
+    
+    Args:
+        armature: Armature object
+        bone_names: Names of bones in the armature
+        cameras: Front and side cameras from CapturedView.camera; without
+            them the default front and side camera axes are assumed
+            
+    Returns:
+        Array of shape (2, bones, 2), (dx, dy) per view and bone
+    """
+    bones = armature.data.bones
+    matrix = np.array(armature.matrix_world, dtype=np.float64)
+    heads = np.array([bones[name].head_local for name in bone_names], dtype=np.float64).reshape(-1, 3)
+    tails = np.array([bones[name].tail_local for name in bone_names], dtype=np.float64).reshape(-1, 3)
+    heads = heads @ matrix[:3, :3].T + matrix[:3, 3]
+    tails = tails @ matrix[:3, :3].T + matrix[:3, 3]
+    
+    if cameras is not None:
+        projections = np.array([camera['projection'] for camera in cameras], dtype=np.float64)
+        segments = np.stack([heads, tails], axis=1).reshape(-1, 3)
+        projected = triangulation.project_points(projections, segments).reshape(2, -1, 2, 2)
+        return projected[:, :, 1] - projected[:, :, 0]
+    
+    # Front camera: image x along world X, image y along -Z; side camera: x along Y
+    vectors = tails - heads
+    return np.stack([vectors[:, [0, 2]], vectors[:, [1, 2]]]) * (1, -1)
+
+
+def segment_positions(ends: np.ndarray, image_shapes: List[Tuple[int, ...]],
+                      cameras: Optional[List[Dict]] = None) -> np.ndarray:
+    """
+    Turn the head and tail pixels of bones in the front and side views into 3D positions
+    
+    Args:
+        ends: (x, y) of head and tail, shape (2 views, bones, 2, 2)
+        image_shapes: Shape of the front and side images
+        cameras: Front and side cameras; positions are triangulated in world
+            space when given, otherwise normalized like extract_bone_structure
+            
+    Returns:
+        Array of shape (bones, 2, 3) with head and tail positions; NaN for
+        ends whose triangulation was rejected, see triangulate_keypoints
+    """
+    if cameras is not None:
+        keypoints = [view_ends.reshape(-1, 2) for view_ends in ends]
+        points, _ = triangulate_keypoints(keypoints, image_shapes, cameras)
+        return points.reshape(-1, 2, 3)
+    
+    front_h, front_w = image_shapes[0][:2]
+    side_w = image_shapes[1][1]
+    return np.stack([
+        (ends[0, :, :, 0] / front_w) * 2 - 1,
+        (ends[1, :, :, 0] / side_w) * 2 - 1,
+        (ends[0, :, :, 1] / front_h) * 2 - 1,
+    ], axis=2)
+
+
+def extract_paired_bone_positions(armature: bpy.types.Object, rest_images: List[np.ndarray],
+                                  posed_images: List[np.ndarray], rest_ids: List[np.ndarray],
+                                  bone_names: List[str], cameras: Optional[List[Dict]] = None
+                                  ) -> Tuple[Dict[str, Tuple[mathutils.Vector, mathutils.Vector]],
+                                             Dict[str, Tuple[mathutils.Vector, mathutils.Vector]]]:
+    """
+    Measure bones in the rest and posed views the same way, paired by the rest ID maps
+    
+    Rest and posed images go through the same component detection, so an
+    unchanged pose measures identically. The rest ID maps only name the
+    rest components: a component showing a single bone is that bone, and
+    posed components are paired with rest components by nearest centroid
+    in every view. Bones that share a component with another bone, or are
+    not paired in both views, are left out.
+    
+    Args:
+        armature: Armature object the rest views were rendered from
+        rest_images: Front and side rest images
+        posed_images: Front and side posed images
+        rest_ids: Front and side bone indices from CapturedView.id_map
+        bone_names: Bone name of every index
+        cameras: Front and side cameras from CapturedView.camera
+        
+    Returns:
+        Tuple of (rest, posed) dictionaries mapping bone names to (head, tail) positions
+    """
+    bones = armature.data.bones
+    names = [name for name in bone_names if name in bones]
+    index = {name: i for i, name in enumerate(bone_names)}
+    count = len(bone_names)
+    
+    rest_ends = np.full((2, count, 2, 2), np.nan)
+    posed_ends = np.full((2, count, 2, 2), np.nan)
+    
+    for view in range(2):
+        camera = cameras[view] if cameras else None
+        
+        # The same crop margin on both sides, so nothing is cut differently
+        rest_roi, rest_offset = crop_to_roi(rest_images[view], camera, POSED_ROI_MARGIN)
+        ids_roi, _ = crop_to_roi(rest_ids[view], camera, POSED_ROI_MARGIN)
+        posed_roi, posed_offset = crop_to_roi(posed_images[view], camera, POSED_ROI_MARGIN)
+        
+        rest_components, labels = bone_detection.label_components(rest_roi)
+        owners = bone_detection.component_bones(labels, ids_roi, len(rest_components), count)
+        posed_components = bone_detection.detect_components(posed_roi)
+        
+        # Compare centroids in rest image pixels; generated images may be another size
+        scale = np.array(rest_images[view].shape[1::-1], dtype=np.float64)
+        scale = scale / np.array(posed_images[view].shape[1::-1], dtype=np.float64)
+        matches = bone_detection.match_components(rest_components['centroid'] + rest_offset,
+                                                  (posed_components['centroid'] + posed_offset) * scale)
+        
+        paired = (owners >= 0) & (matches >= 0)
+        rest_ends[view, owners[paired]] = rest_components['endpoints'][paired] + rest_offset
+        posed_ends[view, owners[paired]] = posed_components['endpoints'][matches[paired]] + posed_offset
+    
+    indices = [index[name] for name in names]
+    rest_ends = rest_ends[:, indices]
+    posed_ends = posed_ends[:, indices]
+    
+    # Rest endpoints run head to tail along the rest bone. A bone rotates
+    # about its head, so posed endpoints take the order that keeps them
+    # closest to the rest endpoints
+    directions = rest_bone_directions(armature, names, cameras)
+    flip = np.einsum('vbk,vbk->vb', rest_ends[:, :, 1] - rest_ends[:, :, 0], directions) < 0
+    rest_ends = np.where(flip[:, :, None, None], rest_ends[:, :, ::-1], rest_ends)
+    scales = np.array([np.array(rest.shape[1::-1], dtype=np.float64) / posed.shape[1::-1]
+                       for rest, posed in zip(rest_images, posed_images)])[:, None, None, :]
+    scaled = posed_ends * scales
+    kept = np.linalg.norm(scaled - rest_ends, axis=3).sum(axis=2)
+    swapped = np.linalg.norm(scaled[:, :, ::-1] - rest_ends, axis=3).sum(axis=2)
+    posed_ends = np.where((swapped < kept)[:, :, None, None], posed_ends[:, :, ::-1], posed_ends)
+    
+    rest_points = segment_positions(rest_ends, [image.shape for image in rest_images], cameras)
+    posed_points = segment_positions(posed_ends, [image.shape for image in posed_images], cameras)
+    
+    rest_positions = {}
+    posed_positions = {}
+    for name, rest_point, posed_point in zip(names, rest_points, posed_points):
+        if np.isfinite(rest_point).all() and np.isfinite(posed_point).all():
+            rest_positions[name] = (mathutils.Vector(rest_point[0]), mathutils.Vector(rest_point[1]))
+            posed_positions[name] = (mathutils.Vector(posed_point[0]), mathutils.Vector(posed_point[1]))
+    
+    return rest_positions, posed_positions
+
+
 def calculate_bone_rotation(rest_head: mathutils.Vector, rest_tail: mathutils.Vector,
                            new_head: mathutils.Vector, new_tail: mathutils.Vector) -> mathutils.Quaternion:
     """
@@ -160,35 +473,26 @@ def calculate_bone_rotation(rest_head: mathutils.Vector, rest_tail: mathutils.Ve
     return rotation
 
 
-def apply_pose_to_armature(armature: bpy.types.Object, 
-                          rest_bone_positions: Dict[str, Tuple[mathutils.Vector, mathutils.Vector]],
-                          new_bone_positions: Dict[str, Tuple[mathutils.Vector, mathutils.Vector]],
-                          influence: float = 1.0):
+def compute_pose_rotations(rest_bone_positions: Dict[str, Tuple[mathutils.Vector, mathutils.Vector]],
+                           new_bone_positions: Dict[str, Tuple[mathutils.Vector, mathutils.Vector]],
+                           influence: float = 1.0) -> Dict[str, mathutils.Quaternion]:
     """
-    Apply extracted pose to armature
+    Compute the rotation of every bone present in both poses
     
     Args:
-        armature: Armature object
         rest_bone_positions: Dictionary of bone names to (head, tail) in rest pose
         new_bone_positions: Dictionary of bone names to (head, tail) in new pose
         influence: Influence factor (0-1)
+        
+    Returns:
+        Dictionary mapping bone names to rotation quaternions
     """
-    if armature.type != 'ARMATURE':
-        return
+    rotations = {}
     
-    # Enter pose mode
-    bpy.context.view_layer.objects.active = armature
-    bpy.ops.object.mode_set(mode='POSE')
-    
-    # Apply rotations to bones
     for bone_name in rest_bone_positions:
         if bone_name not in new_bone_positions:
             continue
         
-        pose_bone = armature.pose.bones.get(bone_name)
-        if not pose_bone:
-            continue
-        
         rest_head, rest_tail = rest_bone_positions[bone_name]
         new_head, new_tail = new_bone_positions[bone_name]
         
@@ -200,11 +504,221 @@ def apply_pose_to_armature(armature: bpy.types.Object,
             identity = mathutils.Quaternion()
             rotation = identity.slerp(rotation, influence)
         
-        # Set bone rotation
-        pose_bone.rotation_quaternion = rotation
+        rotations[bone_name] = rotation
+    
+    return rotations
+
+
+def quaternions_to_matrices(quaternions: np.ndarray) -> np.ndarray:
+    """
+    Convert (w, x, y, z) quaternions to rotation matrices
+    
+    Args:
+        quaternions: Array of shape (count, 4), normalized here
+        
+    Returns:
+        Array of shape (count, 3, 3)
+    """
+    q = np.asarray(quaternions, dtype=np.float64).reshape(-1, 4)
+    norms = np.linalg.norm(q, axis=1, keepdims=True)
+    w, x, y, z = (q / np.where(norms > 0, norms, 1.0)).T
     
-    # Return to object mode
-    bpy.ops.object.mode_set(mode='OBJECT')
+    return np.stack([
+        1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y),
+        2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x),
+        2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y),
+    ], axis=1).reshape(-1, 3, 3)
+
+
+def matrices_to_quaternions(matrices: np.ndarray) -> np.ndarray:
+    """
+    Convert rotation matrices to (w, x, y, z) quaternions with w >= 0
+    
+    Args:
+        matrices: Array of shape (count, 3, 3)
+        
+    Returns:
+        Array of shape (count, 4)
+    """
+    m = np.asarray(matrices, dtype=np.float64).reshape(-1, 3, 3)
+    m00, m11, m22 = m[:, 0, 0], m[:, 1, 1], m[:, 2, 2]
+    
+    # Component magnitudes from the diagonal, signs from the off-diagonal
+    w = np.sqrt(np.maximum(0.0, 1 + m00 + m11 + m22)) / 2
+    x = np.copysign(np.sqrt(np.maximum(0.0, 1 + m00 - m11 - m22)) / 2, m[:, 2, 1] - m[:, 1, 2])
+    y = np.copysign(np.sqrt(np.maximum(0.0, 1 - m00 + m11 - m22)) / 2, m[:, 0, 2] - m[:, 2, 0])
+    z = np.copysign(np.sqrt(np.maximum(0.0, 1 - m00 - m11 + m22)) / 2, m[:, 1, 0] - m[:, 0, 1])
+    
+    q = np.stack([w, x, y, z], axis=1)
+    return q / np.linalg.norm(q, axis=1, keepdims=True)
+
+
+def compute_local_rotations(armature: bpy.types.Object,
+                            rotations: Dict[str, mathutils.Quaternion]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Turn extracted rotations into pose bone rotations for every bone at once
+    
+    Extracted rotations turn a bone's rest direction into its posed
+    direction in world space. A pose bone's rotation is relative to its
+    rest orientation and to whatever its parents already turned it by, so
+    each rotation is conjugated into the bone's rest frame after removing
+    the rotation it inherits. Bones are solved one hierarchy level at a
+    time, all bones of a level in one batch. Bones without an extracted
+    rotation keep their current one and pass it on to their children.
+    
+    Args:
+        armature: Armature object
+        rotations: Dictionary mapping bone names to world-space rotations
+        
+    Returns:
+        Tuple of ((bones, 4) quaternions in pose bone order, (bones,) mask of
+        the bones that had an extracted rotation)
+    """
+    bones = armature.data.bones
+    count = len(bones)
+    
+    rest = np.empty(count * 16, dtype=np.float32)
+    bones.foreach_get('matrix_local', rest)
+    rest = rest.reshape(count, 4, 4).transpose(0, 2, 1)[:, :3, :3].astype(np.float64)
+    
+    current = np.empty(count * 4, dtype=np.float32)
+    armature.pose.bones.foreach_get('rotation_quaternion', current)
+    current = current.reshape(count, 4).astype(np.float64)
+    
+    inherit = np.empty(count, dtype=bool)
+    bones.foreach_get('use_inherit_rotation', inherit)
+    
+    index = {bone.name: i for i, bone in enumerate(bones)}
+    parents = np.array([index[bone.parent.name] if bone.parent else -1 for bone in bones], dtype=np.int64)
+    depth = np.array([len(bone.parent_recursive) for bone in bones], dtype=np.int64)
+    
+    targeted = np.zeros(count, dtype=bool)
+    deltas = np.tile(np.eye(3), (count, 1, 1))
+    names = [name for name in rotations if name in index]
+    if names:
+        # World-space rotations seen from armature space
+        world = np.array(armature.matrix_world.to_3x3().normalized(), dtype=np.float64)
+        targets = [index[name] for name in names]
+        deltas[targets] = world.T @ quaternions_to_matrices([tuple(rotations[name]) for name in names]) @ world
+        targeted[targets] = True
+    
+    local = quaternions_to_matrices(current) if count else np.empty((0, 3, 3))
+    # Rotation every bone has turned by from rest, in armature space
+    posed = np.empty((count, 3, 3))
+    
+    for level in range(int(depth.max()) + 1 if count else 0):
+        level_bones = np.flatnonzero(depth == level)
+        parent = parents[level_bones]
+        has_parent = ((parent >= 0) & inherit[level_bones])[:, None, None]
+        inherited = np.where(has_parent, posed[np.maximum(parent, 0)], np.eye(3))
+        
+        rest_frame = rest[level_bones]
+        rest_inverse = rest_frame.transpose(0, 2, 1)
+        solved = rest_inverse @ inherited.transpose(0, 2, 1) @ deltas[level_bones] @ rest_frame
+        local[level_bones] = np.where(targeted[level_bones, None, None], solved, local[level_bones])
+        posed[level_bones] = inherited @ rest_frame @ local[level_bones] @ rest_inverse
+    
+    quaternions = np.where(targeted[:, None], matrices_to_quaternions(local), current)
+    return quaternions, targeted
+
+
+def apply_rotations_to_armature(armature: bpy.types.Object, rotations: Dict[str, mathutils.Quaternion]):
+    """
+    Set pose bone rotations on an armature
+    
+    All rotations are written in one foreach_set through the data API, so no
+    mode switch or operator context is needed and it also works headless.
+    
+    Args:
+        armature: Armature object
+        rotations: Dictionary mapping bone names to world-space rotation quaternions
+    """
+    if armature.type != 'ARMATURE':
+        return
+    
+    quaternions, _ = compute_local_rotations(armature, rotations)
+    armature.pose.bones.foreach_set('rotation_quaternion', quaternions.astype(np.float32).ravel())
+    armature.update_tag()
+
+
+def reset_pose(armature: bpy.types.Object):
+    """
+    Clear the location, rotation and scale of every pose bone
+    
+    Args:
+        armature: Armature object
+    """
+    if armature.type != 'ARMATURE':
+        return
+    
+    pose_bones = armature.pose.bones
+    count = len(pose_bones)
+    pose_bones.foreach_set('location', np.zeros(count * 3, dtype=np.float32))
+    pose_bones.foreach_set('rotation_quaternion', np.tile(np.float32([1, 0, 0, 0]), count))
+    pose_bones.foreach_set('rotation_euler', np.zeros(count * 3, dtype=np.float32))
+    pose_bones.foreach_set('rotation_axis_angle', np.tile(np.float32([0, 0, 1, 0]), count))
+    pose_bones.foreach_set('scale', np.ones(count * 3, dtype=np.float32))
+    armature.update_tag()
+
+
+def apply_pose_to_armature(armature: bpy.types.Object, 
+                          rest_bone_positions: Dict[str, Tuple[mathutils.Vector, mathutils.Vector]],
+                          new_bone_positions: Dict[str, Tuple[mathutils.Vector, mathutils.Vector]],
+                          influence: float = 1.0):
+    """
+    Apply extracted pose to armature
+    
+    Args:
+        armature: Armature object
+        rest_bone_positions: Dictionary of bone names to (head, tail) in rest pose
+        new_bone_positions: Dictionary of bone names to (head, tail) in new pose
+        influence: Influence factor (0-1)
+    """
+    if armature.type != 'ARMATURE':
+        return
+    
+    rotations = compute_pose_rotations(rest_bone_positions, new_bone_positions, influence)
+    apply_rotations_to_armature(armature, rotations)
+
+
+def store_pose_as_action(armature: bpy.types.Object, rotations: Dict[str, mathutils.Quaternion],
+                         name: str, frame: int = 1) -> Optional[bpy.types.Action]:
+    """
+    Store a pose as a single-frame action without touching the current pose
+    
+    The action is kept with a fake user and marked as an asset when the
+    Blender version supports pose assets.
+    
+    Args:
+        armature: Armature the pose belongs to
+        rotations: Dictionary mapping bone names to world-space rotation quaternions
+        name: Action name
+        frame: Frame to key the pose on
+        
+    Returns:
+        The new action, or None if the armature is invalid
+    """
+    if armature.type != 'ARMATURE':
+        return None
+    
+    quaternions, targeted = compute_local_rotations(armature, rotations)
+    
+    action = bpy.data.actions.new(name=name)
+    action.use_fake_user = True
+    
+    for bone_index in np.flatnonzero(targeted):
+        bone_name = armature.pose.bones[bone_index].name
+        rotation = quaternions[bone_index]
+        
+        data_path = f'pose.bones["{bpy.utils.escape_identifier(bone_name)}"].rotation_quaternion'
+        for index in range(4):
+            fcurve = action.fcurves.new(data_path, index=index, action_group=bone_name)
+            fcurve.keyframe_points.insert(frame, float(rotation[index]), options={'FAST'})
+    
+    if hasattr(action, "asset_mark"):
+        action.asset_mark()
+    
+    return action
 
 
 def match_bones_to_structure(armature: bpy.types.Object, 
@@ -246,45 +760,101 @@ def match_bones_to_structure(armature: bpy.types.Object,
     return bone_positions
 
 
-def process_ai_generated_images(armature: bpy.types.Object,
-                                front_rest_path: str, side_rest_path: str,
-                                front_posed_path: str, side_posed_path: str,
-                                influence: float = 1.0) -> bool:
+def load_pose_images(front_rest_path: str, side_rest_path: str,
+                     front_posed_path: str, side_posed_path: str) -> Optional[List[np.ndarray]]:
     """
-    Main function to process AI-generated images and apply pose
+    Load the rest and posed images of a job
+    
+    Safe to call from a worker thread when OpenCV is available; the fallback
+    loader goes through bpy.data and must run on the main thread.
     
     Args:
-        armature: Armature object to pose
         front_rest_path: Path to front view rest pose image
         side_rest_path: Path to side view rest pose image
         front_posed_path: Path to front view posed image
         side_posed_path: Path to side view posed image
+        
+    Returns:
+        List of [front_rest, side_rest, front_posed, side_posed] arrays, or None if any failed
+    """
+    images = [
+        load_image_as_array(path)
+        for path in (front_rest_path, side_rest_path, front_posed_path, side_posed_path)
+    ]
+    
+    if any(img is None for img in images):
+        print("Failed to load one or more images")
+        return None
+    
+    return images
+
+
+def extract_pose_rotations(armature: bpy.types.Object,
+                           front_rest: np.ndarray, side_rest: np.ndarray,
+                           front_posed: np.ndarray, side_posed: np.ndarray,
+                           influence: float = 1.0,
+                           rest_ids: Optional[List[np.ndarray]] = None,
+                           rest_bone_names: Optional[List[str]] = None,
+                           cameras: Optional[List[Dict]] = None) -> Dict[str, mathutils.Quaternion]:
+    """
+    Extract bone rotations from decoded rest and posed images
+    
+    Args:
+        armature: Armature object to pose
+        front_rest: Front view rest pose image
+        side_rest: Side view rest pose image
+        front_posed: Front view posed image
+        side_posed: Side view posed image
+        influence: Pose influence factor (0-1)
+        rest_ids: Front and side bone ID maps of the rest views, if rendered
+        rest_bone_names: Bone name of every index in rest_ids
+        cameras: Front and side cameras of the rest views, from CapturedView.camera;
+            generated images share them. Bones are triangulated in world space when given.
+            
+    Returns:
+        Dictionary mapping bone names to rotation quaternions
+    """
+    # Bones are named through the rest ID colours when available
+    if rest_ids is not None and rest_bone_names is not None:
+        rest_bone_positions, posed_bone_positions = extract_paired_bone_positions(
+            armature, [front_rest, side_rest], [front_posed, side_posed], rest_ids,
+            rest_bone_names, cameras
+        )
+        return compute_pose_rotations(rest_bone_positions, posed_bone_positions, influence)
+    
+    rest_structure = extract_bone_structure(front_rest, side_rest, cameras)
+    rest_bone_positions = match_bones_to_structure(armature, rest_structure)
+    
+    posed_structure = extract_bone_structure(front_posed, side_posed, cameras, POSED_ROI_MARGIN)
+    posed_bone_positions = match_bones_to_structure(armature, posed_structure)
+    
+    return compute_pose_rotations(rest_bone_positions, posed_bone_positions, influence)
+
+
+def apply_pose_from_arrays(armature: bpy.types.Object,
+                           front_rest: np.ndarray, side_rest: np.ndarray,
+                           front_posed: np.ndarray, side_posed: np.ndarray,
+                           influence: float = 1.0) -> bool:
+    """
+    Extract the pose from decoded images and apply it to the armature
+    
+    Args:
+        armature: Armature object to pose
+        front_rest: Front view rest pose image
+        side_rest: Side view rest pose image
+        front_posed: Front view posed image
+        side_posed: Side view posed image
         influence: Pose influence factor (0-1)
         
     Returns:
         True if successful, False otherwise
     """
     try:
-        # Load images
-        front_rest = load_image_as_array(front_rest_path)
-        side_rest = load_image_as_array(side_rest_path)
-        front_posed = load_image_as_array(front_posed_path)
-        side_posed = load_image_as_array(side_posed_path)
-        
-        if any(img is None for img in [front_rest, side_rest, front_posed, side_posed]):
-            print("Failed to load one or more images")
-            return False
-        
-        # Extract bone structures
-        rest_structure = extract_bone_structure(front_rest, side_rest)
-        posed_structure = extract_bone_structure(front_posed, side_posed)
-        
-        # Match to armature bones
-        rest_bone_positions = match_bones_to_structure(armature, rest_structure)
-        posed_bone_positions = match_bones_to_structure(armature, posed_structure)
+        rotations = extract_pose_rotations(armature, front_rest, side_rest,
+                                           front_posed, side_posed, influence)
         
         # Apply pose
-        apply_pose_to_armature(armature, rest_bone_positions, posed_bone_positions, influence)
+        apply_rotations_to_armature(armature, rotations)
         
         return True
         
@@ -295,6 +865,31 @@ def process_ai_generated_images(armature: bpy.types.Object,
         return False
 
 
+def process_ai_generated_images(armature: bpy.types.Object,
+                                front_rest_path: str, side_rest_path: str,
+                                front_posed_path: str, side_posed_path: str,
+                                influence: float = 1.0) -> bool:
+    """
+    Main function to process AI-generated images and apply pose
+    
+    Args:
+        armature: Armature object to pose
+        front_rest_path: Path to front view rest pose image
+        side_rest_path: Path to side view rest pose image
+        front_posed_path: Path to front view posed image
+        side_posed_path: Path to side view posed image
+        influence: Pose influence factor (0-1)
+        
+    Returns:
+        True if successful, False otherwise
+    """
+    images = load_pose_images(front_rest_path, side_rest_path, front_posed_path, side_posed_path)
+    if images is None:
+        return False
+    
+    return apply_pose_from_arrays(armature, *images, influence=influence)
+
+
 def register():
     """Register module"""
     pass
@@ -3,8 +3,11 @@ Blender add-on preferences and settings
 """
 
 import bpy
+import os
+import re
+import tempfile
 from bpy.types import AddonPreferences
-from bpy.props import StringProperty
+from bpy.props import StringProperty, IntProperty, FloatProperty, BoolProperty
 
 
 class AIPoseAddonPreferences(AddonPreferences):
@@ -18,6 +21,31 @@ class AIPoseAddonPreferences(AddonPreferences):
         default="http://localhost:8188",
     )
     
+    additional_servers: StringProperty(
+        name="Additional Servers",
+        description="Further ComfyUI server URLs, separated by commas or spaces. "
+                    "Jobs go to the least-loaded healthy server",
+        default="",
+    )
+    
+    connection_pool_size: IntProperty(
+        name="Connection Pool Size",
+        description="Maximum number of idle keep-alive connections kept open per server",
+        default=4,
+        min=1,
+        max=32,
+    )
+    
+    connection_idle_timeout: FloatProperty(
+        name="Idle Timeout",
+        description="Seconds after which an idle keep-alive connection is closed",
+        default=30.0,
+        min=1.0,
+        max=600.0,
+        subtype='TIME_ABSOLUTE',
+        unit='TIME_ABSOLUTE',
+    )
+    
     default_workflow_path: StringProperty(
         name="Default Workflow",
         description="Path to default ComfyUI workflow JSON file",
@@ -25,17 +53,52 @@ class AIPoseAddonPreferences(AddonPreferences):
         subtype='FILE_PATH',
     )
     
+    cache_directory: StringProperty(
+        name="Cache Directory",
+        description="Directory for the add-on's local caches (defaults to the system temp directory)",
+        default="",
+        subtype='DIR_PATH',
+    )
+    
+    result_cache_size: IntProperty(
+        name="Result Cache Size (MB)",
+        description="Size cap of the cache of generated poses; 0 disables it. "
+                    "Least recently used results are removed first",
+        default=512,
+        min=0,
+        max=100000,
+    )
+    
+    export_traces: BoolProperty(
+        name="Export Job Traces",
+        description="Append a timing trace of every pose job to traces.jsonl in the cache "
+                    "directory (one Chrome trace per line)",
+        default=False,
+    )
+    
     def draw(self, context):
         layout = self.layout
         
         box = layout.box()
         box.label(text="ComfyUI Connection Settings:", icon='NETWORK_DRIVE')
         box.prop(self, "comfyui_server")
+        box.prop(self, "additional_servers")
+        row = box.row()
+        row.prop(self, "connection_pool_size")
+        row.prop(self, "connection_idle_timeout")
         
         box = layout.box()
         box.label(text="Default Workflow:", icon='FILE')
         box.prop(self, "default_workflow_path")
         
+        box = layout.box()
+        box.label(text="Caching:", icon='FILE_CACHE')
+        box.prop(self, "cache_directory")
+        row = box.row()
+        row.prop(self, "result_cache_size")
+        row.operator("aipose.clear_result_cache", icon='TRASH')
+        box.prop(self, "export_traces")
+        
         layout.separator()
         
         # Add link to documentation
@@ -56,6 +119,50 @@ def get_addon_preferences(context=None):
     return None
 
 
+def get_server_addresses(context=None) -> list:
+    """
+    Get all configured ComfyUI server URLs
+    
+    Args:
+        context: Blender context
+        
+    Returns:
+        List of server URLs, the primary server first
+    """
+    prefs = get_addon_preferences(context)
+    if prefs is None:
+        return ["http://localhost:8188"]
+    
+    addresses = []
+    for address in [prefs.comfyui_server] + re.split(r"[\s,;]+", prefs.additional_servers):
+        address = address.strip().rstrip('/')
+        if address and address not in addresses:
+            addresses.append(address)
+    
+    return addresses or ["http://localhost:8188"]
+
+
+def get_cache_directory(context=None) -> str:
+    """
+    Get the directory for local caches, creating it if needed
+    
+    Args:
+        context: Blender context
+        
+    Returns:
+        Absolute path of the cache directory
+    """
+    prefs = get_addon_preferences(context)
+    
+    if prefs and prefs.cache_directory:
+        directory = bpy.path.abspath(prefs.cache_directory)
+    else:
+        directory = os.path.join(tempfile.gettempdir(), "ai_pose_cache")
+    
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
 def register():
     """Register preferences"""
     bpy.utils.register_class(AIPoseAddonPreferences)
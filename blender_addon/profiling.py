@@ -0,0 +1,282 @@
+"""
+Timing instrumentation for pose jobs
+Records per-phase spans and counters and exports them as Chrome trace records
+"""
+
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class JobTrace:
+    """Timing spans and counters of one pose job"""
+    
+    def __init__(self, name: str, metadata: Optional[Dict] = None):
+        """
+        Initialize job trace
+        
+        Args:
+            name: Job name shown in trace viewers
+            metadata: Extra values stored with the exported record
+        """
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.metadata = dict(metadata or {})
+        self.started_at = time.time()
+        self.status: Optional[str] = None
+        
+        # Span times are perf_counter values relative to this origin
+        self.origin = time.perf_counter()
+        self.end: Optional[float] = None
+        self.spans: List[Dict] = []
+        self.counters: Dict[str, float] = {}
+        self.threads: Dict[int, str] = {}
+        self._lock = threading.Lock()
+    
+    @property
+    def duration(self) -> float:
+        """Wall time of the job in seconds, so far if it is still running"""
+        end = self.end if self.end is not None else time.perf_counter()
+        return end - self.origin
+    
+    @contextlib.contextmanager
+    def span(self, name: str, **args):
+        """
+        Time a block as a named phase
+        
+        Args:
+            name: Phase name
+            **args: Values shown with the span in trace viewers
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(name, start, time.perf_counter(), **args)
+    
+    def add_span(self, name: str, start: float, end: float, **args):
+        """
+        Record a phase measured elsewhere
+        
+        Args:
+            name: Phase name
+            start: perf_counter value at the start of the phase
+            end: perf_counter value at the end of the phase
+            **args: Values shown with the span in trace viewers
+        """
+        thread = threading.current_thread()
+        with self._lock:
+            self.threads.setdefault(thread.ident, thread.name)
+            self.spans.append({
+                'name': name,
+                'start': start - self.origin,
+                'end': end - self.origin,
+                'tid': thread.ident,
+                'args': args,
+            })
+    
+    def count(self, name: str, value: float = 1):
+        """
+        Add to a counter such as bytes transferred
+        
+        Args:
+            name: Counter name
+            value: Amount to add
+        """
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+    
+    def finish(self, status: str):
+        """Mark the job as ended"""
+        self.end = time.perf_counter()
+        self.status = status
+    
+    def phase_totals(self) -> List[Tuple[str, float]]:
+        """
+        Sum span durations per phase
+        
+        Phases of concurrent prompts overlap, so in batch jobs the totals may
+        add up to more than the wall time.
+        
+        Returns:
+            List of (phase name, seconds) in order of first occurrence
+        """
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span['start'])
+        
+        totals: Dict[str, float] = {}
+        for span in spans:
+            totals[span['name']] = totals.get(span['name'], 0.0) + span['end'] - span['start']
+        return list(totals.items())
+    
+    def to_chrome_trace(self) -> Dict:
+        """
+        Convert to the Chrome trace event format
+        
+        Returns:
+            Dictionary loadable by chrome://tracing and Perfetto
+        """
+        pid = os.getpid()
+        end = self.duration
+        
+        with self._lock:
+            spans = list(self.spans)
+            counters = dict(self.counters)
+            threads = dict(self.threads)
+        
+        events = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+            for tid, name in threads.items()
+        ]
+        for span in spans:
+            events.append({
+                'name': span['name'],
+                'cat': 'aipose',
+                'ph': 'X',
+                'ts': round(span['start'] * 1e6, 3),
+                'dur': round((span['end'] - span['start']) * 1e6, 3),
+                'pid': pid,
+                'tid': span['tid'],
+                'args': span['args'],
+            })
+        if counters:
+            events.append({
+                'name': 'counters', 'ph': 'C', 'ts': round(end * 1e6, 3),
+                'pid': pid, 'args': counters,
+            })
+        
+        return {
+            'traceEvents': events,
+            'displayTimeUnit': 'ms',
+            'otherData': dict(self.metadata, **{
+                'trace_id': self.trace_id,
+                'job': self.name,
+                'status': self.status,
+                'started_at': self.started_at,
+                'duration': end,
+                'counters': counters,
+                'phases': dict(self.phase_totals()),
+            }),
+        }
+    
+    def export(self, path: str) -> bool:
+        """
+        Append the trace to a JSON-lines file, one Chrome trace per line
+        
+        Args:
+            path: File to append to
+            
+        Returns:
+            True if the record was written
+        """
+        line = json.dumps(self.to_chrome_trace(), separators=(',', ':'))
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with _export_lock, open(path, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+            return True
+        except OSError as e:
+            print(f"Error exporting job trace: {e}")
+            return False
+
+
+_local = threading.local()
+_export_lock = threading.Lock()
+_last_trace: Optional[JobTrace] = None
+
+
+def current_trace() -> Optional[JobTrace]:
+    """Get the trace recording on this thread, if any"""
+    return getattr(_local, 'trace', None)
+
+
+@contextlib.contextmanager
+def activate(trace: Optional[JobTrace]):
+    """
+    Record spans and counters of this thread into a trace
+    
+    Args:
+        trace: Trace to record into, None to stop recording
+    """
+    previous = current_trace()
+    _local.trace = trace
+    try:
+        yield trace
+    finally:
+        _local.trace = previous
+
+
+def span(name: str, **args):
+    """
+    Time a block as a phase of the current trace; does nothing without one
+    
+    Args:
+        name: Phase name
+        **args: Values shown with the span in trace viewers
+    """
+    trace = current_trace()
+    if trace is None:
+        return contextlib.nullcontext()
+    return trace.span(name, **args)
+
+
+def add_span(name: str, start: float, end: float, **args):
+    """Record a phase measured elsewhere in the current trace, if any"""
+    trace = current_trace()
+    if trace is not None:
+        trace.add_span(name, start, end, **args)
+
+
+def count(name: str, value: float = 1):
+    """Add to a counter of the current trace, if any"""
+    trace = current_trace()
+    if trace is not None:
+        trace.count(name, value)
+
+
+def bind(func: Callable) -> Callable:
+    """
+    Carry the current trace over to another thread
+    
+    Args:
+        func: Function that will run on a pool thread
+        
+    Returns:
+        Wrapper recording into the caller's trace
+    """
+    trace = current_trace()
+    if trace is None:
+        return func
+    
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with activate(trace):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def set_last_trace(trace: JobTrace):
+    """Remember the trace of the most recently finished job"""
+    global _last_trace
+    _last_trace = trace
+
+
+def get_last_trace() -> Optional[JobTrace]:
+    """Get the trace of the most recently finished job"""
+    return _last_trace
+
+
+def register():
+    """Register module"""
+    pass
+
+
+def unregister():
+    """Unregister module"""
+    global _last_trace
+    _last_trace = None
@@ -0,0 +1,449 @@
+"""
+Headless bulk capture of rest views
+Renders front and side views of many .blend files with a pool of background Blender processes
+
+Driver, run with any Python 3 interpreter:
+    python render_farm.py manifest.json output_dir --blender /path/to/blender
+
+Worker, started by the driver once per manifest entry:
+    blender -b character.blend --python render_farm.py -- --object Body --armature Rig --output out/character
+
+The manifest is a JSON list of entries such as
+    {"blend": "characters/knight.blend", "object": "Knight", "armature": "Knight_Rig"}
+with an optional "name" used as the entry's output directory. Relative
+.blend paths are resolved against the manifest's directory.
+"""
+
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Sequence
+
+
+METADATA_NAME = "metadata.json"
+RESULTS_NAME = "results.json"
+DEFAULT_VIEWS = "FRONT,SIDE"
+
+# Lines of worker output kept in the results of failed entries
+ERROR_TAIL_LINES = 20
+
+
+def _addon_module(name: str):
+    """
+    Import a module of the add-on, also when this file runs as a script
+    
+    Args:
+        name: Module name inside the add-on package
+        
+    Returns:
+        Imported module
+    """
+    if __package__:
+        return importlib.import_module(f"{__package__}.{name}")
+    
+    # Run by Blender as a script: import the add-on package from its parent directory
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    parent_dir = os.path.dirname(package_dir)
+    if parent_dir not in sys.path:
+        sys.path.insert(0, parent_dir)
+    return importlib.import_module(f"{os.path.basename(package_dir)}.{name}")
+
+
+def load_manifest(path: str) -> List[Dict]:
+    """
+    Load and validate a capture manifest
+    
+    Args:
+        path: Path to the manifest JSON file
+        
+    Returns:
+        List of entries with absolute .blend paths and unique names
+        
+    Raises:
+        ValueError: If the manifest is malformed
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    
+    if not isinstance(data, list):
+        raise ValueError("Manifest must be a JSON list of entries")
+    
+    base_dir = os.path.dirname(os.path.abspath(path))
+    entries = []
+    names = set()
+    
+    for index, item in enumerate(data):
+        if not isinstance(item, dict):
+            raise ValueError(f"Manifest entry {index} is not an object")
+        
+        missing = [key for key in ('blend', 'object', 'armature') if not item.get(key)]
+        if missing:
+            raise ValueError(f"Manifest entry {index} is missing {', '.join(missing)}")
+        
+        blend = os.path.normpath(os.path.join(base_dir, item['blend']))
+        name = item.get('name') or f"{os.path.splitext(os.path.basename(blend))[0]}_{item['object']}"
+        name = re.sub(r'[^\w.-]+', '_', name)
+        if name in names:
+            raise ValueError(f"Manifest entry {index} has duplicate name '{name}'")
+        names.add(name)
+        
+        entries.append({
+            'name': name,
+            'blend': blend,
+            'object': item['object'],
+            'armature': item['armature'],
+        })
+    
+    return entries
+
+
+def build_worker_command(blender: str, entry: Dict, output_dir: str, resolution: int,
+                         show_bones: bool, fast: bool, threads: int,
+                         views: str = DEFAULT_VIEWS, bone_mask: bool = False) -> List[str]:
+    """
+    Build the command line of a background Blender process capturing one entry
+    
+    Args:
+        blender: Path to the Blender executable
+        entry: Manifest entry from load_manifest
+        output_dir: Directory the entry's captures are written to
+        resolution: Render resolution
+        show_bones: Whether to show armature bones
+        fast: Capture with flat-shaded Workbench instead of the file's engine
+        threads: Render threads of the process
+        views: View list understood by render_utils.parse_views
+        bone_mask: Also write a bone mask of every view
+        
+    Returns:
+        Command as a list of arguments
+    """
+    command = [
+        blender, '-b', entry['blend'],
+        '--factory-startup',
+        '-t', str(threads),
+        '--python-exit-code', '1',
+        '--python', os.path.abspath(__file__),
+        '--',
+        '--object', entry['object'],
+        '--armature', entry['armature'],
+        '--output', output_dir,
+        '--resolution', str(resolution),
+        '--views', views,
+    ]
+    if not show_bones:
+        command.append('--hide-bones')
+    if not fast:
+        command.append('--full-render')
+    if bone_mask:
+        command.append('--bone-mask')
+    return command
+
+
+def run_entry(blender: str, entry: Dict, output_root: str, resolution: int = 1024,
+              show_bones: bool = True, fast: bool = True, threads: int = 1,
+              timeout: Optional[float] = None, skip_existing: bool = True,
+              views: str = DEFAULT_VIEWS, bone_mask: bool = False) -> Dict:
+    """
+    Capture one manifest entry in a background Blender process
+    
+    Args:
+        blender: Path to the Blender executable
+        entry: Manifest entry from load_manifest
+        output_root: Directory holding one subdirectory per entry
+        resolution: Render resolution
+        show_bones: Whether to show armature bones
+        fast: Capture with flat-shaded Workbench instead of the file's engine
+        threads: Render threads of the process
+        timeout: Seconds before the process is killed, None to wait forever
+        skip_existing: Keep captures of the same views that are newer than their .blend file
+        views: View list understood by render_utils.parse_views
+        bone_mask: Also write a bone mask of every view
+        
+    Returns:
+        Result dictionary with the entry's name, status and metadata or error
+    """
+    output_dir = os.path.join(output_root, entry['name'])
+    metadata_path = os.path.join(output_dir, METADATA_NAME)
+    result = {'name': entry['name'], 'blend': entry['blend']}
+    
+    if skip_existing and os.path.exists(metadata_path) and os.path.exists(entry['blend']):
+        if os.path.getmtime(metadata_path) >= os.path.getmtime(entry['blend']):
+            try:
+                with open(metadata_path, 'r', encoding='utf-8') as f:
+                    metadata = json.load(f)
+                if metadata.get('views') == views and metadata.get('bone_mask', False) == bone_mask:
+                    result.update(status='skipped', metadata=metadata)
+                    return result
+            except (OSError, ValueError):
+                pass
+    
+    command = build_worker_command(blender, entry, output_dir, resolution, show_bones, fast,
+                                   threads, views, bone_mask)
+    start_time = time.perf_counter()
+    
+    try:
+        process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                 timeout=timeout, encoding='utf-8', errors='replace')
+    except subprocess.TimeoutExpired:
+        result.update(status='failed', error=f"Timed out after {timeout} seconds")
+        return result
+    except OSError as e:
+        result.update(status='failed', error=f"Could not start Blender: {e}")
+        return result
+    finally:
+        result['duration'] = time.perf_counter() - start_time
+    
+    if process.returncode != 0 or not os.path.exists(metadata_path):
+        tail = process.stdout.strip().splitlines()[-ERROR_TAIL_LINES:]
+        result.update(status='failed', error="\n".join(tail) or f"Exit code {process.returncode}")
+        return result
+    
+    with open(metadata_path, 'r', encoding='utf-8') as f:
+        result.update(status='done', metadata=json.load(f))
+    return result
+
+
+def run_farm(manifest_path: str, output_root: str, blender: str = 'blender',
+             jobs: Optional[int] = None, resolution: int = 1024, show_bones: bool = True,
+             fast: bool = True, timeout: Optional[float] = None,
+             skip_existing: bool = True, views: str = DEFAULT_VIEWS,
+             bone_mask: bool = False) -> List[Dict]:
+    """
+    Capture every manifest entry with a pool of background Blender processes
+    
+    The cores are split between the processes, so all of them are used
+    whether the pool is wide or each render is multi-threaded.
+    
+    Args:
+        manifest_path: Path to the manifest JSON file
+        output_root: Directory holding one subdirectory per entry
+        blender: Path to the Blender executable
+        jobs: Number of concurrent Blender processes, all cores by default
+        resolution: Render resolution
+        show_bones: Whether to show armature bones
+        fast: Capture with flat-shaded Workbench instead of the file's engine
+        timeout: Seconds before a process is killed, None to wait forever
+        skip_existing: Keep captures of the same views that are newer than their .blend file
+        views: View list understood by render_utils.parse_views
+        bone_mask: Also write a bone mask of every view
+        
+    Returns:
+        List of result dictionaries in manifest order, also written to results.json
+    """
+    entries = load_manifest(manifest_path)
+    cores = os.cpu_count() or 1
+    jobs = max(1, min(jobs or cores, len(entries) or 1))
+    threads = max(1, cores // jobs)
+    
+    os.makedirs(output_root, exist_ok=True)
+    print(f"Capturing {len(entries)} entries with {jobs} Blender processes, {threads} threads each")
+    
+    results: List[Optional[Dict]] = [None] * len(entries)
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {
+            executor.submit(run_entry, blender, entry, output_root, resolution,
+                            show_bones, fast, threads, timeout, skip_existing, views,
+                            bone_mask): index
+            for index, entry in enumerate(entries)
+        }
+        for completed, future in enumerate(as_completed(futures), start=1):
+            result = future.result()
+            results[futures[future]] = result
+            print(f"[{completed}/{len(entries)}] {result['name']}: {result['status']}")
+            if result['status'] == 'failed':
+                print(result['error'])
+    
+    with open(os.path.join(output_root, RESULTS_NAME), 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    
+    return results
+
+
+def capture_rest_views(object_name: str, armature_name: str, output_dir: str,
+                       resolution: int = 1024, show_bones: bool = True,
+                       fast: bool = True, views: str = DEFAULT_VIEWS,
+                       bone_mask: bool = False) -> Dict:
+    """
+    Capture rest views of the open file (runs inside Blender)
+    
+    Each view is written to '<view>_rest.png', e.g. front_rest.png, and its
+    camera matrices are recorded in the metadata next to the image. Bone
+    masks are written to '<view>_mask.png', and the bone ID colours they are
+    drawn with to the metadata as 'bone_palette'.
+    
+    Args:
+        object_name: Name of the mesh object
+        armature_name: Name of the armature object
+        output_dir: Directory the captures and metadata are written to
+        resolution: Render resolution
+        show_bones: Whether to show armature bones
+        fast: Capture with flat-shaded Workbench instead of the file's engine
+        views: View list understood by render_utils.parse_views
+        bone_mask: Also write a bone mask of every view
+        
+    Returns:
+        Metadata dictionary, also written to metadata.json
+        
+    Raises:
+        ValueError: If the objects are missing or of the wrong type, or views are invalid
+    """
+    import bpy
+    render_utils = _addon_module('render_utils')
+    
+    obj = bpy.data.objects.get(object_name)
+    armature = bpy.data.objects.get(armature_name)
+    if obj is None or obj.type != 'MESH':
+        raise ValueError(f"No mesh object named '{object_name}'")
+    if armature is None or armature.type != 'ARMATURE':
+        raise ValueError(f"No armature object named '{armature_name}'")
+    
+    view_types = render_utils.parse_views(views)
+    start_time = time.perf_counter()
+    captures = render_utils.capture_views(view_types, obj, armature, resolution,
+                                          show_bones, fast, use_cache=False, bone_mask=bone_mask)
+    render_time = time.perf_counter() - start_time
+    
+    os.makedirs(output_dir, exist_ok=True)
+    images = {}
+    for capture in captures:
+        file_name = f"{capture.view_type.lower()}_rest.png"
+        with open(os.path.join(output_dir, file_name), 'wb') as f:
+            f.write(capture.png_bytes)
+        images[capture.view_type] = {
+            'file': file_name,
+            'sha256': hashlib.sha256(capture.png_bytes).hexdigest(),
+            'camera': capture.camera,
+        }
+        if capture.mask_png is not None:
+            mask_name = f"{capture.view_type.lower()}_mask.png"
+            with open(os.path.join(output_dir, mask_name), 'wb') as f:
+                f.write(capture.mask_png)
+            images[capture.view_type]['mask'] = mask_name
+    
+    bone_palette = None
+    if captures[0].bone_ids is not None:
+        bone_ids = captures[0].bone_ids
+        bone_palette = {name: color.tolist() for name, color in zip(bone_ids['names'], bone_ids['palette'])}
+    
+    bounds = render_utils.compute_world_bounds(obj, armature)
+    metadata = {
+        'blend': bpy.data.filepath,
+        'object': object_name,
+        'armature': armature_name,
+        'bones': [bone.name for bone in armature.data.bones],
+        'resolution': resolution,
+        'show_bones': show_bones,
+        'fast': fast,
+        'views': views,
+        'bone_mask': bone_mask,
+        'bone_palette': bone_palette,
+        'engine': 'BLENDER_WORKBENCH' if fast else bpy.context.scene.render.engine,
+        'bounds': [list(map(float, corner)) for corner in bounds] if bounds else None,
+        'images': images,
+        'render_time': render_time,
+        'blender_version': bpy.app.version_string,
+    }
+    
+    # Written last, so its presence marks a complete capture
+    with open(os.path.join(output_dir, METADATA_NAME), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2)
+    
+    return metadata
+
+
+def worker_main(argv: Sequence[str]) -> int:
+    """
+    Entry point of a background Blender process
+    
+    Args:
+        argv: Arguments after Blender's '--' separator
+        
+    Returns:
+        Process exit code
+    """
+    parser = argparse.ArgumentParser(prog="blender -b FILE --python render_farm.py --")
+    parser.add_argument('--object', required=True, help="Mesh object to capture")
+    parser.add_argument('--armature', required=True, help="Armature object to capture")
+    parser.add_argument('--output', required=True, help="Directory for captures and metadata")
+    parser.add_argument('--resolution', type=int, default=1024, help="Render resolution")
+    parser.add_argument('--hide-bones', action='store_true', help="Render without the bone overlay")
+    parser.add_argument('--full-render', action='store_true', help="Use the file's render engine")
+    parser.add_argument('--bone-mask', action='store_true', help="Also write bone masks")
+    parser.add_argument('--views', default=DEFAULT_VIEWS, help="Views to capture, e.g. FRONT,SIDE,BACK")
+    args = parser.parse_args(argv)
+    
+    try:
+        capture_rest_views(args.object, args.armature, args.output, args.resolution,
+                           show_bones=not args.hide_bones, fast=not args.full_render,
+                           views=args.views, bone_mask=args.bone_mask)
+    except Exception as e:
+        print(f"Error capturing rest views: {e}")
+        return 1
+    
+    print(f"Captured rest views to {args.output}")
+    return 0
+
+
+def driver_main(argv: Sequence[str]) -> int:
+    """
+    Entry point of the command-line driver
+    
+    Args:
+        argv: Command-line arguments
+        
+    Returns:
+        Process exit code, 1 if any entry failed
+    """
+    parser = argparse.ArgumentParser(description="Capture rest views of many .blend files")
+    parser.add_argument('manifest', help="JSON list of blend/object/armature entries")
+    parser.add_argument('output', help="Directory holding one subdirectory per entry")
+    parser.add_argument('--blender', default='blender', help="Blender executable")
+    parser.add_argument('--jobs', type=int, default=None,
+                        help="Concurrent Blender processes (default: number of cores)")
+    parser.add_argument('--resolution', type=int, default=1024, help="Render resolution")
+    parser.add_argument('--timeout', type=float, default=None, help="Seconds per entry")
+    parser.add_argument('--hide-bones', action='store_true', help="Render without the bone overlay")
+    parser.add_argument('--full-render', action='store_true', help="Use each file's render engine")
+    parser.add_argument('--bone-mask', action='store_true', help="Also write bone masks")
+    parser.add_argument('--force', action='store_true', help="Recapture entries that are up to date")
+    parser.add_argument('--views', default=DEFAULT_VIEWS,
+                        help="Views to capture: preset names, orbit:<count>[:<elevation>] "
+                             "or <name>:<azimuth>[:<elevation>], comma-separated")
+    args = parser.parse_args(argv)
+    
+    try:
+        results = run_farm(args.manifest, args.output, args.blender, args.jobs, args.resolution,
+                           show_bones=not args.hide_bones, fast=not args.full_render,
+                           timeout=args.timeout, skip_existing=not args.force, views=args.views,
+                           bone_mask=args.bone_mask)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+    
+    failed = sum(1 for result in results if result['status'] == 'failed')
+    print(f"{len(results) - failed} captured, {failed} failed")
+    return 1 if failed else 0
+
+
+def register():
+    """Register module"""
+    pass
+
+
+def unregister():
+    """Unregister module"""
+    pass
+
+
+if __name__ == "__main__":
+    if '--' in sys.argv:
+        # Started by Blender; its own arguments come before the separator
+        sys.exit(worker_main(sys.argv[sys.argv.index('--') + 1:]))
+    sys.exit(driver_main(sys.argv[1:]))
@@ -5,17 +5,45 @@ Rendering utilities for capturing model and armature views
 import bpy
 import mathutils
 import math
+import hashlib
 import os
+import re
 import tempfile
-from typing import Tuple, Optional
+import threading
+import numpy as np
+from bpy.app.handlers import persistent
+from typing import Dict, Iterable, List, Sequence, Set, Tuple, Optional
+
+from . import bone_detection
+from . import triangulation
 
 
 class RenderSetup:
     """Context manager for setting up and cleaning up render settings"""
     
-    def __init__(self, resolution: int = 1024):
+    # Workbench display settings changed by fast capture mode
+    FAST_DISPLAY_SETTINGS = {
+        'light': 'FLAT',
+        'color_type': 'MATERIAL',
+        'show_shadows': False,
+        'show_cavity': False,
+        'show_object_outline': False,
+        'show_specular_highlight': False,
+        'show_xray': False,
+    }
+    
+    def __init__(self, resolution: int = 1024, fast: bool = False):
+        """
+        Initialize render setup
+        
+        Args:
+            resolution: Render resolution
+            fast: Render with flat-shaded Workbench instead of the scene's engine
+        """
         self.resolution = resolution
+        self.fast = fast
         self.original_settings = {}
+        self.original_display = {}
         
     def __enter__(self):
         """Store original render settings"""
@@ -31,6 +59,26 @@ class RenderSetup:
             'image_settings_color_mode': render.image_settings.color_mode,
         }
         
+        # Metadata stamps such as the date and render time end up in the PNG,
+        # so identical scenes would hash differently for the caches
+        for key in self.stamp_settings(render):
+            self.original_settings[key] = getattr(render, key)
+            setattr(render, key, False)
+        
+        if self.fast:
+            shading = scene.display.shading
+            self.original_settings['engine'] = render.engine
+            self.original_display = {
+                key: getattr(shading, key) for key in self.FAST_DISPLAY_SETTINGS
+            }
+            self.original_display['render_aa'] = scene.display.render_aa
+            
+            # A silhouette with bones needs no lighting or sampling
+            render.engine = 'BLENDER_WORKBENCH'
+            for key, value in self.FAST_DISPLAY_SETTINGS.items():
+                setattr(shading, key, value)
+            scene.display.render_aa = 'FXAA'
+        
         # Set new render settings
         render.resolution_x = self.resolution
         render.resolution_y = self.resolution
@@ -41,6 +89,13 @@ class RenderSetup:
         
         return self
     
+    @staticmethod
+    def stamp_settings(render) -> List[str]:
+        """Names of the render settings that burn in or embed metadata stamps"""
+        return [prop.identifier for prop in render.bl_rna.properties
+                if prop.identifier.startswith('use_stamp') and prop.type == 'BOOLEAN'
+                and not prop.is_readonly]
+    
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Restore original render settings"""
         scene = bpy.context.scene
@@ -53,23 +108,393 @@ class RenderSetup:
                 setattr(render.image_settings, attr_name, value)
             else:
                 setattr(render, key, value)
+        
+        for key, value in self.original_display.items():
+            if key == 'render_aa':
+                scene.display.render_aa = value
+            else:
+                setattr(scene.display.shading, key, value)
+
+
+class BoneMaskSetup:
+    """Context manager rendering only the bone overlay on black
+    
+    Enter inside a fast RenderSetup. Without a palette every bone is white,
+    so pixels are either 0 or 255. With a palette each bone is drawn in its
+    ID colour from the overlay's colour attribute, under the Standard view
+    transform so the colours reach the PNG unchanged. Output is an 8-bit PNG
+    without anti-aliasing, single-channel unless the palette is RGB.
+    """
+    
+    # Workbench display settings of the mask pass
+    MASK_DISPLAY_SETTINGS = {
+        'light': 'FLAT',
+        'color_type': 'SINGLE',
+        'single_color': (1.0, 1.0, 1.0),
+        'show_shadows': False,
+        'show_cavity': False,
+        'show_object_outline': False,
+        'show_specular_highlight': False,
+        'show_xray': False,
+    }
+    
+    # Colour management that leaves ID colours untouched
+    ID_VIEW_SETTINGS = {
+        'view_transform': 'Standard',
+        'look': 'None',
+        'exposure': 0.0,
+        'gamma': 1.0,
+        'use_curve_mapping': False,
+    }
+    
+    WORLD_NAME = "AI_Pose_Mask_World"
+    
+    def __init__(self, bone_overlay: bpy.types.Object, palette: Optional[np.ndarray] = None):
+        """
+        Initialize bone mask setup
+        
+        Args:
+            bone_overlay: Overlay object from create_bone_mesh_overlay
+            palette: ID palette the overlay's colour attribute was written with, if any
+        """
+        self.bone_overlay = bone_overlay
+        self.palette = palette
+        self.original_settings = {}
+        self.original_display = {}
+        self.original_view = {}
+        self.original_world = None
+        self.original_world_color = None
+        self.temp_world = None
+        self.hidden_objects = []
+    
+    def __enter__(self):
+        """Store original settings and hide everything but the overlay"""
+        scene = bpy.context.scene
+        render = scene.render
+        shading = scene.display.shading
+        
+        self.original_settings = {
+            'film_transparent': render.film_transparent,
+            'image_settings_color_mode': render.image_settings.color_mode,
+            'image_settings_color_depth': render.image_settings.color_depth,
+        }
+        self.original_display = {key: getattr(shading, key) for key in self.MASK_DISPLAY_SETTINGS}
+        self.original_display['single_color'] = tuple(shading.single_color)
+        self.original_display['render_aa'] = scene.display.render_aa
+        
+        for key, value in self.MASK_DISPLAY_SETTINGS.items():
+            setattr(shading, key, value)
+        scene.display.render_aa = 'OFF'
+        
+        color_mode = 'BW'
+        if self.palette is not None:
+            shading.color_type = 'VERTEX'
+            
+            self.original_view = {key: getattr(scene.view_settings, key) for key in self.ID_VIEW_SETTINGS}
+            self.original_settings['dither_intensity'] = render.dither_intensity
+            for key, value in self.ID_VIEW_SETTINGS.items():
+                setattr(scene.view_settings, key, value)
+            render.dither_intensity = 0.0
+            
+            if self.palette.shape[1] == 3:
+                color_mode = 'RGB'
+        
+        # Black background from the world color Workbench renders with
+        self.original_world = scene.world
+        if scene.world is None:
+            self.temp_world = bpy.data.worlds.new(self.WORLD_NAME)
+            scene.world = self.temp_world
+        else:
+            self.original_world_color = tuple(scene.world.color)
+        scene.world.color = (0.0, 0.0, 0.0)
+        
+        render.film_transparent = False
+        render.image_settings.color_mode = color_mode
+        render.image_settings.color_depth = '8'
+        
+        for obj in scene.objects:
+            if obj != self.bone_overlay and not obj.hide_render:
+                obj.hide_render = True
+                self.hidden_objects.append(obj.name)
+        
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Restore original settings and visibility"""
+        scene = bpy.context.scene
+        render = scene.render
+        
+        for name in self.hidden_objects:
+            obj = bpy.data.objects.get(name)
+            if obj is not None:
+                obj.hide_render = False
+        self.hidden_objects = []
+        
+        if self.temp_world is not None:
+            scene.world = self.original_world
+            bpy.data.worlds.remove(self.temp_world)
+            self.temp_world = None
+        elif scene.world is not None:
+            scene.world.color = self.original_world_color
+        
+        for key, value in self.original_settings.items():
+            if key.startswith('image_settings_'):
+                attr_name = key.replace('image_settings_', '')
+                setattr(render.image_settings, attr_name, value)
+            else:
+                setattr(render, key, value)
+        
+        for key, value in self.original_display.items():
+            if key == 'render_aa':
+                scene.display.render_aa = value
+            else:
+                setattr(scene.display.shading, key, value)
+        
+        for key, value in self.original_view.items():
+            setattr(scene.view_settings, key, value)
+        self.original_view = {}
+
+
+class MultiViewSetup:
+    """Context manager rendering one camera per view in a single render pass
+    
+    Uses Blender's multi-view rendering: each view gets the file suffix
+    '_<VIEW>', which also selects the camera 'AI_Pose_Camera_<VIEW>'.
+    """
+    
+    VIEW_PREFIX = "AIPose_"
+    
+    def __init__(self, view_types: Sequence[str]):
+        self.view_types = list(view_types)
+        self.original_settings = {}
+        self.original_views = {}
+        self.added_views = []
+    
+    def __enter__(self):
+        """Store original multi-view settings and enable one view per camera"""
+        render = bpy.context.scene.render
+        
+        self.original_settings = {
+            'use_multiview': render.use_multiview,
+            'views_format': render.views_format,
+            'image_settings_views_format': render.image_settings.views_format,
+        }
+        self.original_views = {view.name: view.use for view in render.views}
+        
+        render.use_multiview = True
+        render.views_format = 'MULTIVIEW'
+        render.image_settings.views_format = 'INDIVIDUAL'
+        
+        # Only our views are rendered
+        for view in render.views:
+            view.use = False
+        
+        for view_type in self.view_types:
+            view = render.views.new(f"{self.VIEW_PREFIX}{view_type}")
+            view.file_suffix = f"_{view_type}"
+            view.use = True
+            self.added_views.append(view.name)
+        
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Remove the added views and restore original multi-view settings"""
+        render = bpy.context.scene.render
+        
+        for name in self.added_views:
+            view = render.views.get(name)
+            if view is not None:
+                render.views.remove(view)
+        self.added_views = []
+        
+        for name, use in self.original_views.items():
+            view = render.views.get(name)
+            if view is not None:
+                view.use = use
+        
+        for key, value in self.original_settings.items():
+            if key.startswith('image_settings_'):
+                attr_name = key.replace('image_settings_', '')
+                setattr(render.image_settings, attr_name, value)
+            else:
+                setattr(render, key, value)
+    
+    @staticmethod
+    def view_output_path(output_path: str, view_type: str) -> str:
+        """
+        Get the file a view is written to
+        
+        Blender inserts the view suffix before the file extension.
+        
+        Args:
+            output_path: Render output path
+            view_type: View the file belongs to
+            
+        Returns:
+            Path of the view's image file
+        """
+        root, ext = os.path.splitext(output_path)
+        return f"{root}_{view_type}{ext}"
+
+
+class ViewSpec:
+    """A camera orbiting the model, given by azimuth and elevation
+    
+    Azimuth 0 looks at the model's front from -Y, 90 at its side from +X.
+    Positive elevation looks down from above.
+    """
+    
+    def __init__(self, name: str, azimuth: float = 0.0, elevation: float = 0.0):
+        """
+        Initialize view spec
+        
+        Args:
+            name: View name, used in camera, render view and file names
+            azimuth: Degrees around the vertical axis
+            elevation: Degrees above the horizontal plane
+        """
+        if not re.fullmatch(r'[A-Za-z0-9_]+', name):
+            raise ValueError(f"Invalid view name '{name}'")
+        self.name = name
+        self.azimuth = float(azimuth)
+        self.elevation = float(elevation)
+    
+    def __repr__(self) -> str:
+        return f"ViewSpec({self.name!r}, {self.azimuth:g}, {self.elevation:g})"
+    
+    @property
+    def camera_name(self) -> str:
+        """Name of the camera object rendering this view"""
+        return f"AI_Pose_Camera_{self.name}"
+    
+    @property
+    def direction(self) -> np.ndarray:
+        """Unit vector from the model towards the camera"""
+        azimuth, elevation = math.radians(self.azimuth), math.radians(self.elevation)
+        return np.array([
+            math.sin(azimuth) * math.cos(elevation),
+            -math.cos(azimuth) * math.cos(elevation),
+            math.sin(elevation),
+        ])
+    
+    @property
+    def rotation(self) -> Tuple[float, float, float]:
+        """Camera rotation as XYZ Euler angles in radians"""
+        return (math.radians(90.0 - self.elevation), 0.0, math.radians(self.azimuth))
+
+
+# Named views; FRONT and SIDE are the views the workflows are built for
+VIEW_PRESETS = {
+    'FRONT': ViewSpec('FRONT', 0),
+    'SIDE': ViewSpec('SIDE', 90),
+    'BACK': ViewSpec('BACK', 180),
+    'SIDE_OPPOSITE': ViewSpec('SIDE_OPPOSITE', -90),
+    'QUARTER_FRONT': ViewSpec('QUARTER_FRONT', 45),
+    'QUARTER_FRONT_OPPOSITE': ViewSpec('QUARTER_FRONT_OPPOSITE', -45),
+    'QUARTER_BACK': ViewSpec('QUARTER_BACK', 135),
+    'QUARTER_BACK_OPPOSITE': ViewSpec('QUARTER_BACK_OPPOSITE', -135),
+    'HIGH_FRONT': ViewSpec('HIGH_FRONT', 0, 30),
+}
+
+
+def resolve_view(view) -> ViewSpec:
+    """
+    Get the spec of a view
+    
+    Args:
+        view: ViewSpec or name of a preset in VIEW_PRESETS
+        
+    Returns:
+        ViewSpec
+        
+    Raises:
+        ValueError: If the name is not a preset
+    """
+    if isinstance(view, ViewSpec):
+        return view
+    try:
+        return VIEW_PRESETS[view]
+    except KeyError:
+        raise ValueError(f"Unknown view '{view}'") from None
 
 
-def setup_camera_for_view(view_type: str = 'FRONT', distance: float = 5.0) -> bpy.types.Object:
+def orbit_views(count: int, elevation: float = 0.0, start: float = 0.0) -> List[ViewSpec]:
+    """
+    Spread views evenly around the model
+    
+    Args:
+        count: Number of views
+        elevation: Degrees above the horizontal plane
+        start: Azimuth of the first view in degrees
+        
+    Returns:
+        List of views named ORBIT_<index>, e.g. ORBIT_000
+    """
+    views = []
+    for index in range(count):
+        azimuth = (start + 360.0 * index / count) % 360.0
+        views.append(ViewSpec(f"ORBIT_{index:03d}", azimuth, elevation))
+    return views
+
+
+def parse_views(text: str) -> List[ViewSpec]:
+    """
+    Parse a comma-separated list of views
+    
+    Items are preset names, 'orbit:<count>[:<elevation>]' for views spread
+    around the model, or '<name>:<azimuth>[:<elevation>]' for custom views.
+    
+    Args:
+        text: View list, e.g. 'FRONT,SIDE,BACK' or 'orbit:8:15'
+        
+    Returns:
+        List of views
+        
+    Raises:
+        ValueError: If an item cannot be parsed
+    """
+    views = []
+    for item in filter(None, (part.strip() for part in text.split(','))):
+        name, *angles = item.split(':')
+        if not angles:
+            views.append(resolve_view(name))
+            continue
+        
+        if len(angles) > 2:
+            raise ValueError(f"Invalid view '{item}'")
+        try:
+            values = [float(angle) for angle in angles]
+        except ValueError:
+            raise ValueError(f"Invalid view '{item}'") from None
+        
+        if name.lower() == 'orbit':
+            if values[0] < 1 or not values[0].is_integer():
+                raise ValueError(f"Invalid view count in '{item}'")
+            views.extend(orbit_views(int(values[0]), *values[1:]))
+        else:
+            views.append(ViewSpec(name, *values))
+    
+    if not views:
+        raise ValueError("No views given")
+    return views
+
+
+def setup_camera_for_view(view_type='FRONT', distance: float = 5.0) -> bpy.types.Object:
     """
     Set up or get camera for specific view
     
     Args:
-        view_type: 'FRONT' or 'SIDE'
+        view_type: ViewSpec or preset name such as 'FRONT' or 'SIDE'
         distance: Distance from origin
         
     Returns:
         Camera object
     """
     scene = bpy.context.scene
+    view = resolve_view(view_type)
     
     # Create or get camera
-    camera_name = f"AI_Pose_Camera_{view_type}"
+    camera_name = view.camera_name
     if camera_name in bpy.data.objects:
         camera = bpy.data.objects[camera_name]
     else:
@@ -78,12 +503,8 @@ def setup_camera_for_view(view_type: str = 'FRONT', distance: float = 5.0) -> bp
         scene.collection.objects.link(camera)
     
     # Position camera
-    if view_type == 'FRONT':
-        camera.location = (0, -distance, 0)
-        camera.rotation_euler = (1.5708, 0, 0)  # 90 degrees in radians
-    elif view_type == 'SIDE':
-        camera.location = (distance, 0, 0)
-        camera.rotation_euler = (1.5708, 0, 1.5708)
+    camera.location = tuple(view.direction * distance)
+    camera.rotation_euler = view.rotation
     
     # Set as active camera
     scene.camera = camera
@@ -91,46 +512,212 @@ def setup_camera_for_view(view_type: str = 'FRONT', distance: float = 5.0) -> bp
     return camera
 
 
-def frame_object_in_camera(obj: bpy.types.Object, camera: bpy.types.Object, margin: float = 1.2):
+class ViewCameras:
+    """Context manager removing the view cameras a capture created
+    
+    Cameras that existed before are kept, and the scene camera is restored,
+    so captures with many views do not leave cameras behind in the file.
     """
-    Adjust camera distance to frame object properly
+    
+    def __init__(self, view_types: Sequence):
+        """
+        Initialize view cameras
+        
+        Args:
+            view_types: ViewSpecs or preset names the capture renders
+        """
+        self.camera_names = [resolve_view(view_type).camera_name for view_type in view_types]
+        self.existing = set()
+        self.original_camera = None
+    
+    def __enter__(self):
+        """Remember the cameras that already exist"""
+        self.existing = {name for name in self.camera_names if name in bpy.data.objects}
+        self.original_camera = bpy.context.scene.camera
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Remove new cameras and restore the scene camera"""
+        scene = bpy.context.scene
+        if self.original_camera is not None and self.original_camera.name in bpy.data.objects:
+            scene.camera = self.original_camera
+        
+        for name in self.camera_names:
+            camera = bpy.data.objects.get(name)
+            if camera is None or name in self.existing:
+                continue
+            camera_data = camera.data
+            bpy.data.objects.remove(camera, do_unlink=True)
+            if camera_data is not None and camera_data.users == 0:
+                bpy.data.cameras.remove(camera_data)
+
+
+def compute_camera_matrices(camera: bpy.types.Object, resolution: int) -> Dict:
+    """
+    Describe where a camera's pixels come from
+    
+    The projection maps homogeneous world points to homogeneous pixel
+    coordinates with the origin at the top-left corner and y pointing down,
+    matching top-down decoded images.
     
     Args:
-        obj: Object to frame
-        camera: Camera object
-        margin: Margin multiplier for framing
+        camera: Camera object, with an up-to-date matrix_world
+        resolution: Square render resolution
+        
+    Returns:
+        Dictionary with 'matrix_world' (4x4), 'intrinsics' (3x3) and
+        'projection' (3x4) as nested lists, and the 'resolution' they apply to
     """
-    # Calculate bounding box
-    bbox_corners = [obj.matrix_world @ mathutils.Vector(corner) for corner in obj.bound_box]
+    matrix_world = np.array(camera.matrix_world, dtype=np.float64)
+    world_to_camera = np.linalg.inv(matrix_world)
+    
+    focal = (resolution / 2) / math.tan(camera.data.angle / 2)
+    intrinsics = np.array([
+        [focal, 0.0, resolution / 2],
+        [0.0, focal, resolution / 2],
+        [0.0, 0.0, 1.0],
+    ])
     
-    # Calculate center and size
-    center = sum(bbox_corners, mathutils.Vector()) / 8
+    # Blender cameras look down -Z with +Y up; image rows grow downwards
+    flip = np.diag([1.0, -1.0, -1.0])
+    projection = intrinsics @ flip @ world_to_camera[:3]
     
-    # Calculate maximum dimension
-    max_dim = max(
-        max(corner.x for corner in bbox_corners) - min(corner.x for corner in bbox_corners),
-        max(corner.y for corner in bbox_corners) - min(corner.y for corner in bbox_corners),
-        max(corner.z for corner in bbox_corners) - min(corner.z for corner in bbox_corners)
-    )
+    return {
+        'matrix_world': matrix_world.tolist(),
+        'intrinsics': intrinsics.tolist(),
+        'projection': projection.tolist(),
+        'resolution': resolution,
+    }
+
+
+def compute_projected_bounds(points: np.ndarray, camera: Dict) -> Optional[List[float]]:
+    """
+    Find the pixel rectangle a set of world points projects into
     
-    # Calculate camera distance
-    camera_data = camera.data
-    sensor_fit = camera_data.sensor_fit
+    Args:
+        points: World points of shape (points, 3)
+        camera: Dictionary from compute_camera_matrices
+        
+    Returns:
+        [x_min, y_min, x_max, y_max] in render pixels, clipped to the image,
+        or None if no point is in front of the camera and inside the image
+    """
+    projection = np.array(camera['projection'], dtype=np.float64)
+    resolution = camera['resolution']
     
-    if sensor_fit == 'AUTO':
-        sensor_fit = 'HORIZONTAL' if camera_data.sensor_width > camera_data.sensor_height else 'VERTICAL'
+    # Only points in front of the camera project meaningfully
+    depth = points @ projection[2, :3] + projection[2, 3]
+    pixels = triangulation.project_points(projection[None], points[depth > 0])[0]
+    if not len(pixels):
+        return None
     
-    if sensor_fit == 'HORIZONTAL':
-        sensor_size = camera_data.sensor_width
-    else:
-        sensor_size = camera_data.sensor_height
+    x_min, y_min = np.clip(pixels.min(axis=0), 0, resolution)
+    x_max, y_max = np.clip(pixels.max(axis=0), 0, resolution)
+    if x_min >= x_max or y_min >= y_max:
+        return None
+    return [float(x_min), float(y_min), float(x_max), float(y_max)]
+
+
+def get_world_points(obj: Optional[bpy.types.Object],
+                     armature: Optional[bpy.types.Object] = None) -> np.ndarray:
+    """
+    Gather the posed world-space points a capture has to frame
+    
+    Evaluated mesh vertices and bone heads and tails are read in bulk with
+    foreach_get and transformed to world space in one matrix product each.
+    
+    Args:
+        obj: Mesh object
+        armature: Armature object
+        
+    Returns:
+        float32 array of shape (points, 3)
+    """
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    points = []
+    
+    if obj is not None:
+        obj_eval = obj.evaluated_get(depsgraph)
+        if obj_eval.type == 'MESH':
+            vertices = obj_eval.data.vertices
+            coords = np.empty(len(vertices) * 3, dtype=np.float32)
+            vertices.foreach_get('co', coords)
+            
+            matrix = np.array(obj_eval.matrix_world, dtype=np.float32)
+            points.append(coords.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3])
+    
+    if armature is not None and armature.type == 'ARMATURE':
+        points.extend(get_bone_segments(armature))
     
-    fov = camera_data.angle
-    distance = (max_dim * margin) / (2 * math.tan(fov / 2))
+    if not points:
+        return np.zeros((0, 3), dtype=np.float32)
+    return np.concatenate(points)
+
+
+def compute_world_bounds(obj: Optional[bpy.types.Object],
+                         armature: Optional[bpy.types.Object] = None) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Compute tight world-space bounds of the posed mesh and bones
+    
+    Unlike obj.bound_box, this covers the deformed mesh and bones reaching
+    outside it, so posed limbs are not clipped.
     
-    # Update camera position maintaining direction
-    direction = (camera.location - center).normalized()
-    camera.location = center + direction * distance
+    Args:
+        obj: Mesh object
+        armature: Armature object
+        
+    Returns:
+        Tuple of (minimum, maximum) corners, None if there is nothing to frame
+    """
+    points = get_world_points(obj, armature)
+    if not len(points):
+        return None
+    return points.min(axis=0), points.max(axis=0)
+
+
+def frame_bounds_in_camera(bounds: Tuple[np.ndarray, np.ndarray], camera: bpy.types.Object,
+                           margin: float = 1.2):
+    """
+    Move a camera along its view axis so that bounds fill the frame
+    
+    The camera is centered on the bounds and pulled back just far enough that
+    every corner fits, nearer corners taking up more of the frame.
+    
+    Args:
+        bounds: Tuple of (minimum, maximum) world-space corners
+        camera: Camera object, rotated to its view direction
+        margin: Margin multiplier for framing
+    """
+    bounds_min, bounds_max = (np.asarray(corner, dtype=np.float64) for corner in bounds)
+    center = (bounds_min + bounds_max) / 2
+    corners = np.stack(np.meshgrid(*zip(bounds_min, bounds_max), indexing='ij'), axis=-1).reshape(8, 3)
+    
+    # Camera axes as columns: right, up and backwards (it looks down -Z).
+    # matrix_world may be stale right after setting the rotation.
+    axes = np.array(camera.rotation_euler.to_matrix(), dtype=np.float64)
+    offsets = (corners - center) @ axes
+    
+    # Distance at which each corner fits, measured from the center
+    extent = np.abs(offsets[:, :2]).max(axis=1) * margin
+    distance = float(np.max(offsets[:, 2] + extent / math.tan(camera.data.angle / 2)))
+    
+    camera.location = center + axes[:, 2] * distance
+
+
+def frame_object_in_camera(obj: bpy.types.Object, camera: bpy.types.Object, margin: float = 1.2,
+                           armature: Optional[bpy.types.Object] = None):
+    """
+    Adjust camera distance to frame object properly
+    
+    Args:
+        obj: Object to frame
+        camera: Camera object
+        margin: Margin multiplier for framing
+        armature: Armature whose bones are framed as well
+    """
+    bounds = compute_world_bounds(obj, armature)
+    if bounds is not None:
+        frame_bounds_in_camera(bounds, camera, margin)
 
 
 def setup_armature_visualization(armature: bpy.types.Object, visible: bool = True):
@@ -154,50 +741,87 @@ def setup_armature_visualization(armature: bpy.types.Object, visible: bool = Tru
     armature.hide_render = not visible
 
 
-def create_bone_mesh_overlay(armature: bpy.types.Object) -> Optional[bpy.types.Object]:
+# Name of the material shared by all bone overlays
+OVERLAY_MATERIAL_NAME = "AI_Pose_BoneOverlay_Material"
+
+# Custom property marking overlay objects, holding the armature name
+OVERLAY_PROPERTY = "ai_pose_overlay"
+
+# Colour attribute holding every overlay vertex's bone ID colour
+BONE_ID_ATTRIBUTE = "AIPose_BoneID"
+
+# Faces of a bone prism as indices into its 4 head and 4 tail corners
+PRISM_FACES = np.array([
+    [0, 1, 5, 4], [1, 2, 6, 5], [2, 3, 7, 6], [3, 0, 4, 7],
+    [3, 2, 1, 0], [4, 5, 6, 7],
+], dtype=np.int32)
+
+
+def get_bone_segments(armature: bpy.types.Object) -> Tuple[np.ndarray, np.ndarray]:
     """
-    Create a mesh overlay that shows bone positions clearly
+    Read the posed world-space head and tail of every bone in bulk
     
     Args:
         armature: Armature object
         
     Returns:
-        Mesh object representing bones, or None if failed
+        Tuple of (heads, tails) as float32 arrays of shape (bones, 3)
     """
-    if armature.type != 'ARMATURE':
-        return None
-    
-    # Create a new mesh
-    mesh_name = f"{armature.name}_BoneOverlay"
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    pose_bones = armature.evaluated_get(depsgraph).pose.bones
+    count = len(pose_bones)
     
-    # Remove existing overlay if present
-    if mesh_name in bpy.data.objects:
-        old_obj = bpy.data.objects[mesh_name]
-        bpy.data.objects.remove(old_obj, do_unlink=True)
+    heads = np.empty(count * 3, dtype=np.float32)
+    tails = np.empty(count * 3, dtype=np.float32)
+    pose_bones.foreach_get('head', heads)
+    pose_bones.foreach_get('tail', tails)
     
-    mesh = bpy.data.meshes.new(mesh_name)
-    obj = bpy.data.objects.new(mesh_name, mesh)
-    bpy.context.scene.collection.objects.link(obj)
+    matrix = np.array(armature.matrix_world, dtype=np.float32)
+    rotation, translation = matrix[:3, :3].T, matrix[:3, 3]
     
-    # Build mesh from bone positions
-    verts = []
-    edges = []
+    return heads.reshape(count, 3) @ rotation + translation, tails.reshape(count, 3) @ rotation + translation
+
+
+def compute_bone_prisms(heads: np.ndarray, tails: np.ndarray, thickness: float = 0.05) -> np.ndarray:
+    """
+    Compute the corners of a thin square prism around every bone
     
-    for bone in armature.data.bones:
-        # Get world space positions
-        head = armature.matrix_world @ bone.head_local
-        tail = armature.matrix_world @ bone.tail_local
+    Args:
+        heads: Bone heads, shape (bones, 3)
+        tails: Bone tails, shape (bones, 3)
+        thickness: Prism half-width relative to the bone length
         
-        start_idx = len(verts)
-        verts.append(head)
-        verts.append(tail)
-        edges.append((start_idx, start_idx + 1))
+    Returns:
+        Corners of shape (bones, 8, 3): 4 around the head, then 4 around the tail
+    """
+    axis = tails - heads
+    length = np.linalg.norm(axis, axis=1, keepdims=True)
+    direction = axis / np.maximum(length, 1e-8)
     
-    mesh.from_pydata(verts, edges, [])
-    mesh.update()
+    # Any vector not parallel to the bone gives the cross-section axes
+    reference = np.where(np.abs(direction[:, 2:3]) < 0.9, [[0.0, 0.0, 1.0]], [[1.0, 0.0, 0.0]])
+    u = np.cross(direction, reference)
+    u /= np.maximum(np.linalg.norm(u, axis=1, keepdims=True), 1e-8)
+    v = np.cross(direction, u)
+    
+    radius = np.maximum(length * thickness, 1e-4)[:, :, None]
+    ring = np.stack([u + v, u - v, -u - v, -u + v], axis=1) * radius
+    
+    return np.concatenate([heads[:, None, :] + ring, tails[:, None, :] + ring], axis=1)
+
+
+def get_overlay_material() -> bpy.types.Material:
+    """
+    Get the material shared by all bone overlays, creating it once
     
-    # Create material for bones
-    mat = bpy.data.materials.new(name=f"{mesh_name}_Material")
+    Returns:
+        Bright red emission material
+    """
+    mat = bpy.data.materials.get(OVERLAY_MATERIAL_NAME)
+    if mat is not None:
+        return mat
+    
+    mat = bpy.data.materials.new(name=OVERLAY_MATERIAL_NAME)
     mat.use_nodes = True
     nodes = mat.node_tree.nodes
     nodes.clear()
@@ -210,29 +834,166 @@ def create_bone_mesh_overlay(armature: bpy.types.Object) -> Optional[bpy.types.O
     
     mat.node_tree.links.new(emission.outputs['Emission'], output.inputs['Surface'])
     
-    obj.data.materials.append(mat)
+    # Workbench ignores shader nodes and uses the viewport display color
+    mat.diffuse_color = (1.0, 0.0, 0.0, 1.0)
+    
+    return mat
+
+
+def _build_prism_topology(mesh: bpy.types.Mesh, bone_count: int):
+    """Rebuild the overlay faces for a number of bones in bulk"""
+    mesh.clear_geometry()
+    mesh.vertices.add(bone_count * 8)
+    mesh.loops.add(bone_count * 24)
+    mesh.polygons.add(bone_count * 6)
+    
+    loop_vertices = PRISM_FACES[None, :, :] + 8 * np.arange(bone_count, dtype=np.int32)[:, None, None]
+    mesh.loops.foreach_set('vertex_index', loop_vertices.ravel())
+    mesh.polygons.foreach_set('loop_start', np.arange(0, bone_count * 24, 4, dtype=np.int32))
+    try:
+        mesh.polygons.foreach_set('loop_total', np.full(bone_count * 6, 4, dtype=np.int32))
+    except (AttributeError, TypeError, RuntimeError):
+        # Derived from loop_start and read-only in newer Blender versions
+        pass
+    
+    mesh.update(calc_edges=True)
+
+
+def srgb_to_linear(values: np.ndarray) -> np.ndarray:
+    """Convert sRGB colour values in [0, 1] to linear values"""
+    values = np.asarray(values, dtype=np.float64)
+    return np.where(values <= 0.04045, values / 12.92, ((values + 0.055) / 1.055) ** 2.4)
+
+
+def _write_bone_ids(mesh: bpy.types.Mesh, bone_count: int) -> bool:
+    """
+    Colour every bone's prism with its ID from make_id_palette
+    
+    Args:
+        mesh: Overlay mesh
+        bone_count: Number of bones, 8 vertices each
+        
+    Returns:
+        True if written, False if this Blender version has no colour attributes
+    """
+    if not hasattr(mesh, 'color_attributes'):
+        return False
+    
+    attribute = mesh.color_attributes.get(BONE_ID_ATTRIBUTE)
+    if attribute is not None and (attribute.domain != 'POINT' or attribute.data_type != 'FLOAT_COLOR'):
+        mesh.color_attributes.remove(attribute)
+        attribute = None
+    if attribute is None:
+        attribute = mesh.color_attributes.new(BONE_ID_ATTRIBUTE, 'FLOAT_COLOR', 'POINT')
+    
+    # Float colours are linear; the Standard view transform maps them back to the palette
+    palette = bone_detection.make_id_palette(bone_count)
+    rgb = np.broadcast_to(palette, (bone_count, 3)) / 255.0
+    colors = np.concatenate([srgb_to_linear(rgb), np.ones((bone_count, 1))], axis=1)
+    attribute.data.foreach_set('color', np.repeat(colors, 8, axis=0).astype(np.float32).ravel())
+    mesh.color_attributes.active_color = attribute
+    
+    return True
+
+
+def get_bone_id_palette(armature: bpy.types.Object) -> Dict:
+    """
+    Get the ID colours the bone overlay of an armature is drawn with in masks
+    
+    Args:
+        armature: Armature object
+        
+    Returns:
+        Dictionary with 'names', the bone names in pose bone order, and
+        'palette', the matching uint8 array from make_id_palette
+    """
+    names = [bone.name for bone in armature.pose.bones]
+    return {'names': names, 'palette': bone_detection.make_id_palette(len(names))}
+
+
+def create_bone_mesh_overlay(armature: bpy.types.Object) -> Optional[bpy.types.Object]:
+    """
+    Get the mesh overlay that shows bone positions clearly, updated to the current pose
+    
+    The overlay is created once per armature and kept, hidden from renders
+    outside captures. Later calls only rewrite its vertex positions. Each
+    bone's prism also carries its ID colour for bone masks.
+    
+    Args:
+        armature: Armature object
+        
+    Returns:
+        Mesh object representing bones, or None if failed
+    """
+    if armature.type != 'ARMATURE':
+        return None
+    
+    mesh_name = f"{armature.name}_BoneOverlay"
+    
+    obj = bpy.data.objects.get(mesh_name)
+    if obj is None or obj.type != 'MESH' or obj.get(OVERLAY_PROPERTY) != armature.name:
+        if obj is not None:
+            bpy.data.objects.remove(obj, do_unlink=True)
+        
+        mesh = bpy.data.meshes.new(mesh_name)
+        mesh.materials.append(get_overlay_material())
+        obj = bpy.data.objects.new(mesh_name, mesh)
+        obj[OVERLAY_PROPERTY] = armature.name
+        obj.hide_select = True
+        obj.hide_viewport = True
+        obj.hide_render = True
+        obj.show_in_front = True
+        bpy.context.scene.collection.objects.link(obj)
+    
+    mesh = obj.data
+    corners = compute_bone_prisms(*get_bone_segments(armature))
+    
+    if len(mesh.vertices) != corners.shape[0] * 8:
+        _build_prism_topology(mesh, corners.shape[0])
+        _write_bone_ids(mesh, corners.shape[0])
+    elif hasattr(mesh, 'color_attributes') and mesh.color_attributes.get(BONE_ID_ATTRIBUTE) is None:
+        _write_bone_ids(mesh, corners.shape[0])
+    
+    mesh.vertices.foreach_set('co', corners.astype(np.float32).ravel())
+    mesh.update()
     
     return obj
 
 
+def remove_bone_overlays():
+    """Remove all bone overlays and their shared material"""
+    for obj in [obj for obj in bpy.data.objects if OVERLAY_PROPERTY in obj]:
+        mesh = obj.data
+        bpy.data.objects.remove(obj, do_unlink=True)
+        if mesh is not None and mesh.users == 0:
+            bpy.data.meshes.remove(mesh)
+    
+    mat = bpy.data.materials.get(OVERLAY_MATERIAL_NAME)
+    if mat is not None and mat.users == 0:
+        bpy.data.materials.remove(mat)
+
+
 def render_view(view_type: str, obj: bpy.types.Object, armature: bpy.types.Object, 
-                resolution: int = 1024, show_bones: bool = True) -> str:
+                resolution: int = 1024, show_bones: bool = True, fast: bool = False) -> str:
     """
     Render a view of the model with armature
     
     Args:
-        view_type: 'FRONT' or 'SIDE'
+        view_type: ViewSpec or preset name such as 'FRONT' or 'SIDE'
         obj: Mesh object to render
         armature: Armature object
         resolution: Render resolution
         show_bones: Whether to show armature bones
+        fast: Capture with flat-shaded Workbench instead of the scene's engine
         
     Returns:
         Path to rendered image file
     """
+    view = resolve_view(view_type)
+    
     # Setup camera
-    camera = setup_camera_for_view(view_type, distance=5.0)
-    frame_object_in_camera(obj, camera)
+    camera = setup_camera_for_view(view, distance=5.0)
+    frame_object_in_camera(obj, camera, armature=armature)
     
     # Setup armature visualization
     if show_bones:
@@ -242,47 +1003,495 @@ def render_view(view_type: str, obj: bpy.types.Object, armature: bpy.types.Objec
         setup_armature_visualization(armature, visible=False)
         bone_overlay = None
     
-    # Render with settings
-    with RenderSetup(resolution):
-        # Create temp file
-        temp_dir = tempfile.gettempdir()
-        output_path = os.path.join(temp_dir, f"ai_pose_{view_type.lower()}_{bpy.context.scene.frame_current}.png")
+    if bone_overlay:
+        bone_overlay.hide_render = False
+    
+    try:
+        # Render with settings
+        with RenderSetup(resolution, fast):
+            # Create temp file
+            temp_dir = tempfile.gettempdir()
+            output_path = os.path.join(temp_dir, f"ai_pose_{view.name.lower()}_{bpy.context.scene.frame_current}.png")
+            
+            bpy.context.scene.render.filepath = output_path
+            bpy.ops.render.render(write_still=True)
+    finally:
+        # Keep the bone overlay for the next capture, out of other renders
+        if bone_overlay:
+            bone_overlay.hide_render = True
+    
+    return output_path
+
+
+def render_views(view_types: Sequence, obj: bpy.types.Object, armature: bpy.types.Object,
+                 resolution: int = 1024, show_bones: bool = True,
+                 fast: bool = False) -> Tuple[str, ...]:
+    """
+    Render several views of the model in a single render pass
+    
+    Cameras, bone overlay and render settings are set up once for all views.
+    
+    Args:
+        view_types: ViewSpecs or preset names, e.g. ('FRONT', 'SIDE', 'BACK')
+        obj: Mesh object to render
+        armature: Armature object
+        resolution: Render resolution
+        show_bones: Whether to show armature bones
+        fast: Capture with flat-shaded Workbench instead of the scene's engine
         
-        bpy.context.scene.render.filepath = output_path
-        bpy.ops.render.render(write_still=True)
+    Returns:
+        Tuple of rendered image paths, in the order of view_types
+    """
+    scene = bpy.context.scene
+    views = [resolve_view(view_type) for view_type in view_types]
+    names = [view.name for view in views]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate view names: {', '.join(names)}")
+    
+    # Bounds are shared by all views
+    bounds = compute_world_bounds(obj, armature)
+    
+    # Setup cameras; the first one is the scene camera the others are derived from
+    cameras = []
+    for view in views:
+        camera = setup_camera_for_view(view, distance=5.0)
+        if bounds is not None:
+            frame_bounds_in_camera(bounds, camera)
+        cameras.append(camera)
+    scene.camera = cameras[0]
+    
+    # Update camera matrices so they can be recorded with the captures
+    bpy.context.view_layer.update()
+    
+    # Setup armature visualization
+    if show_bones:
+        setup_armature_visualization(armature, visible=True)
+        bone_overlay = create_bone_mesh_overlay(armature)
+    else:
+        setup_armature_visualization(armature, visible=False)
+        bone_overlay = None
     
-    # Cleanup bone overlay
     if bone_overlay:
-        bpy.data.objects.remove(bone_overlay, do_unlink=True)
+        bone_overlay.hide_render = False
     
-    return output_path
+    try:
+        # Render all views at once
+        with RenderSetup(resolution, fast), MultiViewSetup(names):
+            temp_dir = tempfile.gettempdir()
+            output_path = os.path.join(temp_dir, f"ai_pose_{scene.frame_current}.png")
+            
+            scene.render.filepath = output_path
+            bpy.ops.render.render(write_still=True)
+    finally:
+        # Keep the bone overlay for the next capture, out of other renders
+        if bone_overlay:
+            bone_overlay.hide_render = True
+    
+    paths = tuple(MultiViewSetup.view_output_path(output_path, name) for name in names)
+    
+    missing = [path for path in paths if not os.path.exists(path)]
+    if missing:
+        raise RuntimeError(f"Render did not write expected views: {', '.join(missing)}")
+    
+    return paths
+
+
+def render_bone_masks(view_types: Sequence, armature: bpy.types.Object,
+                      resolution: int = 1024) -> Tuple[Tuple[str, ...], Optional[Dict]]:
+    """
+    Render masks of the bone overlay in a single render pass
+    
+    Reuses the cameras placed by the preceding render_views call, so the
+    masks line up with its images pixel for pixel. Where Blender supports
+    colour attributes each bone is drawn in its own ID colour, so masks
+    tell bones apart by pixel value.
+    
+    Args:
+        view_types: Views rendered by render_views
+        armature: Armature object
+        resolution: Render resolution
+        
+    Returns:
+        Tuple of (mask image paths in the order of view_types, bone IDs from
+        get_bone_id_palette or None for plain white masks)
+    """
+    scene = bpy.context.scene
+    names = [resolve_view(view_type).name for view_type in view_types]
+    
+    camera = bpy.data.objects.get(resolve_view(view_types[0]).camera_name)
+    if camera is None:
+        raise RuntimeError("Views must be rendered before their bone masks")
+    scene.camera = camera
+    
+    bone_overlay = create_bone_mesh_overlay(armature)
+    if bone_overlay is None:
+        raise RuntimeError(f"Armature '{armature.name}' has no bones to mask")
+    
+    mesh = bone_overlay.data
+    bone_ids = None
+    if hasattr(mesh, 'color_attributes') and mesh.color_attributes.get(BONE_ID_ATTRIBUTE) is not None:
+        bone_ids = get_bone_id_palette(armature)
+    palette = bone_ids['palette'] if bone_ids else None
+    
+    bone_overlay.hide_render = False
+    try:
+        with RenderSetup(resolution, fast=True), BoneMaskSetup(bone_overlay, palette), MultiViewSetup(names):
+            temp_dir = tempfile.gettempdir()
+            output_path = os.path.join(temp_dir, f"ai_pose_mask_{scene.frame_current}.png")
+            
+            scene.render.filepath = output_path
+            bpy.ops.render.render(write_still=True)
+    finally:
+        bone_overlay.hide_render = True
+    
+    paths = tuple(MultiViewSetup.view_output_path(output_path, name) for name in names)
+    
+    missing = [path for path in paths if not os.path.exists(path)]
+    if missing:
+        raise RuntimeError(f"Render did not write expected masks: {', '.join(missing)}")
+    
+    return paths, bone_ids
+
+
+class CapturedView:
+    """A rendered view held in memory
+    
+    png_bytes can be uploaded as-is; pixels is decoded from them on first
+    access, which is safe on a worker thread. camera holds the view's
+    azimuth, elevation and camera matrices from compute_camera_matrices,
+    and as 'armature_bbox' the pixel bounds the bones project into.
+    mask_png is the view's bone mask, if one was rendered, and bone_ids the
+    names and palette from get_bone_id_palette its bones are coloured with.
+    """
+    
+    def __init__(self, view_type: str, png_bytes: bytes, camera: Optional[Dict] = None,
+                 mask_png: Optional[bytes] = None, bone_ids: Optional[Dict] = None):
+        self.view_type = view_type
+        self.png_bytes = png_bytes
+        self.camera = camera
+        self.mask_png = mask_png
+        self.bone_ids = bone_ids
+        self._pixels = None
+        self._mask_samples = None
+        self._mask = None
+        self._id_map = None
+        self._lock = threading.Lock()
+    
+    def _decode_mask(self) -> np.ndarray:
+        """Decoded mask PNG as (height, width, channels), caller holds the lock"""
+        if self._mask_samples is None:
+            from . import pose_processor
+            samples = pose_processor.decode_image_bytes(self.mask_png)
+            if samples is None:
+                raise ValueError(f"Failed to decode {self.view_type} bone mask")
+            self._mask_samples = samples if samples.ndim == 3 else samples[:, :, None]
+        return self._mask_samples
+    
+    @property
+    def mask(self):
+        """Bone mask as a uint8 array of shape (height, width), 255 on bones, None without one"""
+        if self.mask_png is None:
+            return None
+        with self._lock:
+            if self._mask is None:
+                covered = self._decode_mask()[:, :, :3].max(axis=2)
+                self._mask = np.where(covered > 0, 255, 0).astype(np.uint8)
+            return self._mask
+    
+    @property
+    def id_map(self):
+        """Bone index of every pixel as an int32 array, -1 off bones; None without bone IDs"""
+        if self.mask_png is None or self.bone_ids is None:
+            return None
+        with self._lock:
+            if self._id_map is None:
+                self._id_map = bone_detection.decode_ids(self._decode_mask(), self.bone_ids['palette'])
+            return self._id_map
+    
+    @property
+    def pixels(self):
+        """Decoded image as a uint8 array of shape (height, width, channels)"""
+        with self._lock:
+            if self._pixels is None:
+                from . import pose_processor
+                self._pixels = pose_processor.decode_image_bytes(self.png_bytes)
+                if self._pixels is None:
+                    raise ValueError(f"Failed to decode {self.view_type} view")
+            return self._pixels
+
+
+class RenderCache:
+    """Recent captures, reused while the objects they show are unchanged (main thread only)"""
+    
+    def __init__(self, max_entries: int = 4):
+        self.max_entries = max_entries
+        self.suppressed = False
+        # Entries in least to most recently used order
+        self._entries: Dict[str, Tuple[Tuple[CapturedView, ...], Set[str]]] = {}
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, fingerprint: str) -> Optional[Tuple[CapturedView, ...]]:
+        """
+        Look up the captures for a fingerprint
+        
+        Args:
+            fingerprint: Value from compute_render_fingerprint
+            
+        Returns:
+            Cached captures, or None on a miss
+        """
+        entry = self._entries.pop(fingerprint, None)
+        if entry is None:
+            return None
+        self._entries[fingerprint] = entry
+        return entry[0]
+    
+    def put(self, fingerprint: str, captures: Tuple[CapturedView, ...], id_names: Iterable[str]):
+        """
+        Store captures
+        
+        Args:
+            fingerprint: Value from compute_render_fingerprint
+            captures: Captured views
+            id_names: Names of the objects and data blocks the captures depend on
+        """
+        self._entries.pop(fingerprint, None)
+        self._entries[fingerprint] = (captures, set(id_names))
+        while len(self._entries) > self.max_entries:
+            del self._entries[next(iter(self._entries))]
+    
+    def invalidate(self, id_names: Set[str]):
+        """
+        Drop captures depending on changed data blocks
+        
+        Args:
+            id_names: Names of the changed objects and data blocks
+        """
+        for fingerprint, (_, names) in list(self._entries.items()):
+            if names & id_names:
+                del self._entries[fingerprint]
+    
+    def clear(self):
+        """Drop all captures"""
+        self._entries.clear()
+
+
+render_cache = RenderCache()
+
+
+def compute_render_fingerprint(view_types: Sequence, obj: bpy.types.Object,
+                               armature: bpy.types.Object, resolution: int = 1024,
+                               show_bones: bool = True, fast: bool = False,
+                               bone_mask: bool = False) -> str:
+    """
+    Hash everything a capture depends on
+    
+    Covers the evaluated mesh vertices, the evaluated pose bone matrices, both
+    world matrices and the capture settings. Arrays are read in bulk with
+    foreach_get.
+    
+    Args:
+        view_types: Views to render
+        obj: Mesh object to render
+        armature: Armature object
+        resolution: Render resolution
+        show_bones: Whether to show armature bones
+        fast: Capture with flat-shaded Workbench instead of the scene's engine
+        bone_mask: Whether bone masks are rendered as well
+        
+    Returns:
+        Hex digest identifying the capture
+    """
+    scene = bpy.context.scene
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    sha = hashlib.sha256()
+    
+    views = tuple(repr(resolve_view(view_type)) for view_type in view_types)
+    settings = (views, obj.name, armature.name, resolution, show_bones, fast, bone_mask,
+                None if fast else scene.render.engine)
+    sha.update(repr(settings).encode('utf-8'))
+    
+    for matrix in (obj.matrix_world, armature.matrix_world):
+        sha.update(np.array(matrix, dtype=np.float32).tobytes())
+    
+    obj_eval = obj.evaluated_get(depsgraph)
+    if obj_eval.type == 'MESH':
+        vertices = obj_eval.data.vertices
+        coords = np.empty(len(vertices) * 3, dtype=np.float32)
+        vertices.foreach_get('co', coords)
+        sha.update(coords.tobytes())
+    
+    if armature.type == 'ARMATURE':
+        pose_bones = armature.evaluated_get(depsgraph).pose.bones
+        matrices = np.empty(len(pose_bones) * 16, dtype=np.float32)
+        pose_bones.foreach_get('matrix', matrices)
+        sha.update(matrices.tobytes())
+    
+    return sha.hexdigest()
+
+
+@persistent
+def _on_depsgraph_update(scene, depsgraph):
+    """Invalidate captures of objects whose geometry or transform changed"""
+    if render_cache.suppressed or not len(render_cache):
+        return
+    
+    changed = set()
+    for update in depsgraph.updates:
+        if not (update.is_updated_geometry or update.is_updated_transform):
+            continue
+        if isinstance(update.id, (bpy.types.Object, bpy.types.Mesh, bpy.types.Armature)):
+            changed.add(update.id.original.name)
+    
+    if changed:
+        render_cache.invalidate(changed)
+
+
+@persistent
+def _on_load_post(*args):
+    """Drop all captures when another file is loaded"""
+    render_cache.clear()
+
+
+def capture_views(view_types: Sequence, obj: bpy.types.Object, armature: bpy.types.Object,
+                  resolution: int = 1024, show_bones: bool = True,
+                  fast: bool = False, use_cache: bool = True,
+                  bone_mask: bool = False) -> Tuple[CapturedView, ...]:
+    """
+    Render several views in one pass and return them in memory
+    
+    Blender only encodes render results by writing them out, so each file is
+    read once and removed straight away; nothing downstream touches the disk.
+    Unchanged scenes reuse the previous capture, whose identical bytes also
+    let uploads be skipped. Cameras created for the capture are removed again.
+    
+    Args:
+        view_types: ViewSpecs or preset names, e.g. ('FRONT', 'SIDE', 'BACK')
+        obj: Mesh object to render
+        armature: Armature object
+        resolution: Render resolution
+        show_bones: Whether to show armature bones
+        fast: Capture with flat-shaded Workbench instead of the scene's engine
+        use_cache: Reuse a cached capture when nothing changed
+        bone_mask: Also render a bone ID mask of every view
+        
+    Returns:
+        Tuple of captured views, in the order of view_types
+    """
+    fingerprint = None
+    if use_cache:
+        fingerprint = compute_render_fingerprint(view_types, obj, armature, resolution,
+                                                 show_bones, fast, bone_mask)
+        cached = render_cache.get(fingerprint)
+        if cached is not None:
+            return cached
+    
+    with ViewCameras(view_types):
+        paths = render_views(view_types, obj, armature, resolution, show_bones, fast)
+        mask_paths = (None,) * len(paths)
+        bone_ids = None
+        # Bounds of the bones' drawn volume, not just their heads and tails
+        bone_points = compute_bone_prisms(*get_bone_segments(armature)).reshape(-1, 3).astype(np.float64)
+        
+        captures = []
+        try:
+            if bone_mask:
+                mask_paths, bone_ids = render_bone_masks(view_types, armature, resolution)
+            
+            for view, path, mask_path in zip(map(resolve_view, view_types), paths, mask_paths):
+                camera = dict(compute_camera_matrices(bpy.data.objects[view.camera_name], resolution),
+                              azimuth=view.azimuth, elevation=view.elevation)
+                camera['armature_bbox'] = compute_projected_bounds(bone_points, camera)
+                with open(path, 'rb') as f:
+                    png_bytes = f.read()
+                mask_png = None
+                if mask_path is not None:
+                    with open(mask_path, 'rb') as f:
+                        mask_png = f.read()
+                captures.append(CapturedView(view.name, png_bytes, camera, mask_png, bone_ids))
+        finally:
+            for path in paths + tuple(filter(None, mask_paths)):
+                if os.path.exists(path):
+                    os.remove(path)
+    
+    captures = tuple(captures)
+    
+    if fingerprint is not None:
+        # Flush the updates caused by our own camera and armature setup so
+        # they do not invalidate the new entry
+        render_cache.suppressed = True
+        try:
+            bpy.context.view_layer.update()
+        finally:
+            render_cache.suppressed = False
+        
+        render_cache.put(fingerprint, captures,
+                         {obj.name, obj.data.name, armature.name, armature.data.name})
+    
+    return captures
+
+
+def capture_both_views(obj: bpy.types.Object, armature: bpy.types.Object,
+                       resolution: int = 1024, show_bones: bool = True,
+                       fast: bool = False, bone_mask: bool = False) -> Tuple[CapturedView, CapturedView]:
+    """
+    Render front and side views in one pass and return them in memory
+    
+    Args:
+        obj: Mesh object to render
+        armature: Armature object
+        resolution: Render resolution
+        show_bones: Whether to show armature bones
+        fast: Capture with flat-shaded Workbench instead of the scene's engine
+        bone_mask: Also render a bone ID mask of both views
+        
+    Returns:
+        Tuple of (front capture, side capture)
+    """
+    front, side = capture_views(('FRONT', 'SIDE'), obj, armature, resolution, show_bones, fast,
+                                bone_mask=bone_mask)
+    
+    return front, side
 
 
 def render_both_views(obj: bpy.types.Object, armature: bpy.types.Object,
-                     resolution: int = 1024, show_bones: bool = True) -> Tuple[str, str]:
+                     resolution: int = 1024, show_bones: bool = True,
+                     fast: bool = False) -> Tuple[str, str]:
     """
-    Render both front and side views
+    Render both front and side views in one render pass
     
     Args:
         obj: Mesh object to render
         armature: Armature object
         resolution: Render resolution
         show_bones: Whether to show armature bones
+        fast: Capture with flat-shaded Workbench instead of the scene's engine
         
     Returns:
         Tuple of (front_view_path, side_view_path)
     """
-    front_path = render_view('FRONT', obj, armature, resolution, show_bones)
-    side_path = render_view('SIDE', obj, armature, resolution, show_bones)
+    with ViewCameras(('FRONT', 'SIDE')):
+        front_path, side_path = render_views(('FRONT', 'SIDE'), obj, armature, resolution,
+                                             show_bones, fast)
     
     return front_path, side_path
 
 
 def register():
     """Register module"""
-    pass
+    if _on_depsgraph_update not in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.append(_on_depsgraph_update)
+    if _on_load_post not in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.append(_on_load_post)
 
 
 def unregister():
     """Unregister module"""
-    pass
+    if _on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(_on_depsgraph_update)
+    if _on_load_post in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(_on_load_post)
+    render_cache.clear()
+    remove_bone_overlays()
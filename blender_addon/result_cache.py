@@ -0,0 +1,273 @@
+"""
+Local cache of generation results
+Stores posed images and extracted bone rotations so repeated prompts skip ComfyUI
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+def compute_result_key(workflow: Dict, input_digests: Sequence[str], prompt: str) -> str:
+    """
+    Compute the cache key of one generation
+    
+    Args:
+        workflow: Workflow after update_workflow_inputs
+        input_digests: SHA-256 hex digests of the input images
+        prompt: Pose prompt text
+        
+    Returns:
+        Hex digest identifying the result
+    """
+    payload = json.dumps({
+        'workflow': workflow,
+        'inputs': list(input_digests),
+        'prompt': prompt,
+    }, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """On-disk LRU cache of posed images and bone rotations, capped in size"""
+    
+    INDEX_NAME = "index.json"
+    IMAGE_NAMES = ("front_posed.png", "side_posed.png")
+    
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024):
+        """
+        Initialize result cache
+        
+        Args:
+            directory: Directory the entries are stored in
+            max_bytes: Size cap; least recently used entries are evicted beyond it
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(directory, self.INDEX_NAME)
+        
+        # Entries in least to most recently used order
+        self._entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                entries = data.get('entries', {}) if isinstance(data, dict) else {}
+                self._entries = {
+                    key: entry for key, entry in entries.items() if isinstance(entry, dict)
+                }
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable result cache index {self.index_path}: {e}")
+    
+    @property
+    def total_bytes(self) -> int:
+        """Size of all cached entries"""
+        with self._lock:
+            return sum(entry.get('size', 0) for entry in self._entries.values())
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+    
+    def get_images(self, key: str, front_posed: str, side_posed: str) -> bool:
+        """
+        Look up the posed images of a result and copy them out of the cache
+        
+        The files are copied while the cache is locked, so another job
+        evicting the entry afterwards can't remove them from under the caller.
+        
+        Args:
+            key: Key from compute_result_key
+            front_posed: Path to copy the front view posed image to
+            side_posed: Path to copy the side view posed image to
+            
+        Returns:
+            True if the images were copied, False on a miss
+        """
+        with self._lock:
+            entry = self._touch_locked(key)
+            if entry is None or not entry.get('images'):
+                return False
+            
+            sources = [os.path.join(self._entry_dir(key), name) for name in self.IMAGE_NAMES]
+            try:
+                for source, target in zip(sources, (front_posed, side_posed)):
+                    shutil.copyfile(source, target)
+            except OSError:
+                # Files were removed behind our back
+                self._drop_locked(key)
+                self._save_locked()
+                return False
+            
+            self._save_locked()
+            return True
+    
+    def put_images(self, key: str, front_posed: str, side_posed: str) -> bool:
+        """
+        Store the posed images of a result
+        
+        The files are copied, so the originals may be deleted afterwards.
+        
+        Args:
+            key: Key from compute_result_key
+            front_posed: Path to the front view posed image
+            side_posed: Path to the side view posed image
+            
+        Returns:
+            True if the images were stored
+        """
+        entry_dir = self._entry_dir(key)
+        try:
+            os.makedirs(entry_dir, exist_ok=True)
+            size = 0
+            for source, name in zip((front_posed, side_posed), self.IMAGE_NAMES):
+                target = os.path.join(entry_dir, name)
+                temp_path = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+                shutil.copyfile(source, temp_path)
+                os.replace(temp_path, target)
+                size += os.path.getsize(target)
+        except OSError as e:
+            print(f"Error storing result in cache: {e}")
+            return False
+        
+        with self._lock:
+            entry = self._entries.pop(key, {})
+            entry['images'] = True
+            entry['image_size'] = size
+            self._entries[key] = entry
+            self._update_size_locked(entry)
+            self._evict_locked(keep=key)
+            self._save_locked()
+        return True
+    
+    def get_rotations(self, key: str, variant: str) -> Optional[Dict[str, List[float]]]:
+        """
+        Look up bone rotations extracted from a result
+        
+        Args:
+            key: Key from compute_result_key
+            variant: Armature and extraction settings the rotations were made for
+            
+        Returns:
+            Dictionary mapping bone names to (w, x, y, z) quaternions, None on a miss
+        """
+        with self._lock:
+            entry = self._touch_locked(key)
+            if entry is None:
+                return None
+            rotations = entry.get('rotations', {}).get(variant)
+            self._save_locked()
+            return dict(rotations) if rotations is not None else None
+    
+    def put_rotations(self, key: str, variant: str, rotations: Dict[str, Sequence[float]]):
+        """
+        Store bone rotations extracted from a result
+        
+        Args:
+            key: Key from compute_result_key
+            variant: Armature and extraction settings the rotations were made for
+            rotations: Dictionary mapping bone names to (w, x, y, z) quaternions
+        """
+        with self._lock:
+            entry = self._entries.pop(key, {})
+            entry.setdefault('rotations', {})[variant] = {
+                name: [float(v) for v in rotation] for name, rotation in rotations.items()
+            }
+            self._entries[key] = entry
+            self._update_size_locked(entry)
+            self._evict_locked(keep=key)
+            self._save_locked()
+    
+    def clear(self):
+        """Remove all cached entries"""
+        with self._lock:
+            for key in list(self._entries):
+                self._drop_locked(key)
+            self._save_locked()
+    
+    def _entry_dir(self, key: str) -> str:
+        """Directory holding the files of an entry"""
+        return os.path.join(self.directory, key)
+    
+    def _touch_locked(self, key: str) -> Optional[Dict]:
+        """Mark an entry as most recently used (lock must be held)"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._entries[key] = entry
+        return entry
+    
+    def _update_size_locked(self, entry: Dict):
+        """Recompute the size of an entry (lock must be held)"""
+        rotations_size = len(json.dumps(entry.get('rotations', {})))
+        entry['size'] = entry.get('image_size', 0) + rotations_size
+    
+    def _drop_locked(self, key: str):
+        """Remove an entry and its files (lock must be held)"""
+        self._entries.pop(key, None)
+        shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+    
+    def _evict_locked(self, keep: Optional[str] = None):
+        """Evict least recently used entries until under the size cap (lock must be held)"""
+        total = sum(entry.get('size', 0) for entry in self._entries.values())
+        for key in list(self._entries):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= self._entries[key].get('size', 0)
+            self._drop_locked(key)
+    
+    def _save_locked(self):
+        """Write the index to disk (lock must be held)"""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'entries': self._entries}, f)
+            os.replace(temp_path, self.index_path)
+        except OSError as e:
+            print(f"Error saving result cache index: {e}")
+
+
+_caches: Dict[str, ResultCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_result_cache(directory: str, max_bytes: int) -> ResultCache:
+    """
+    Get the shared result cache stored in a directory
+    
+    Args:
+        directory: Directory the entries are stored in
+        max_bytes: Size cap in bytes
+        
+    Returns:
+        ResultCache shared by all jobs using that directory
+    """
+    with _caches_lock:
+        cache = _caches.get(directory)
+        if cache is None:
+            cache = ResultCache(directory, max_bytes)
+            _caches[directory] = cache
+        elif cache.max_bytes != max_bytes:
+            with cache._lock:
+                cache.max_bytes = max_bytes
+                cache._evict_locked()
+                cache._save_locked()
+        return cache
+
+
+def register():
+    """Register module"""
+    pass
+
+
+def unregister():
+    """Unregister module"""
+    with _caches_lock:
+        _caches.clear()
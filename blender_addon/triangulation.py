@@ -0,0 +1,122 @@
+"""
+Multi-view triangulation with NumPy
+Recovers world-space points from their pixel positions in several calibrated views
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+def project_points(projections: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """
+    Project world points into every view
+    
+    Args:
+        projections: 3x4 projection matrices of shape (views, 3, 4), e.g.
+            from render_utils.compute_camera_matrices
+        points: World points of shape (points, 3)
+        
+    Returns:
+        Pixel coordinates of shape (views, points, 2)
+    """
+    projections = np.asarray(projections, dtype=np.float64)
+    points = np.asarray(points, dtype=np.float64)
+    homogeneous = np.concatenate([points, np.ones((len(points), 1))], axis=1)
+    
+    projected = np.einsum('vij,nj->vni', projections, homogeneous)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return projected[:, :, :2] / projected[:, :, 2:]
+
+
+def reprojection_errors(projections: np.ndarray, points: np.ndarray, pixels: np.ndarray,
+                        visible: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Measure how far world points project from their observed pixels
+    
+    Args:
+        projections: Projection matrices of shape (views, 3, 4)
+        points: World points of shape (points, 3)
+        pixels: Observed pixel coordinates of shape (views, points, 2)
+        visible: Whether each view observed each point, shape (views, points);
+            defaults to every finite observation
+            
+    Returns:
+        Root mean square error in pixels over the views observing each point,
+        shape (points,); NaN for points no view observes
+    """
+    pixels = np.asarray(pixels, dtype=np.float64)
+    if visible is None:
+        visible = np.isfinite(pixels).all(axis=2)
+    
+    squared = ((project_points(projections, points) - pixels) ** 2).sum(axis=2)
+    squared = np.where(visible, squared, 0.0)
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.sqrt(squared.sum(axis=0) / visible.sum(axis=0))
+
+
+def triangulate_points(projections: np.ndarray, pixels: np.ndarray,
+                       visible: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Triangulate many points from their pixels in several views at once
+    
+    Each observation contributes two rows of the direct linear transform,
+    u * P3 - P1 and v * P3 - P2, scaled to unit length for conditioning.
+    Every point's homogeneous position is the right singular vector of its
+    stacked rows with the smallest singular value, computed for all points
+    in one batched SVD.
+    
+    Args:
+        projections: Projection matrices of shape (views, 3, 4)
+        pixels: Observed pixel coordinates of shape (views, points, 2)
+        visible: Whether each view observed each point, shape (views, points);
+            defaults to every finite observation
+            
+    Returns:
+        Tuple of (world points of shape (points, 3), reprojection errors in
+        pixels of shape (points,)); both NaN for points seen by fewer than
+        two views
+    """
+    projections = np.asarray(projections, dtype=np.float64)
+    pixels = np.asarray(pixels, dtype=np.float64)
+    if visible is None:
+        visible = np.isfinite(pixels).all(axis=2)
+    visible = np.asarray(visible, dtype=bool)
+    views, count = pixels.shape[:2]
+    
+    if count == 0:
+        return np.empty((0, 3)), np.empty(0)
+    
+    observed = np.where(visible[:, :, None], pixels, 0.0)
+    
+    # Rows of shape (views, 2, points, 4)
+    rows = (observed.transpose(0, 2, 1)[:, :, :, None] * projections[:, None, None, 2, :]
+            - projections[:, :2, None, :])
+    
+    # One (2 * views, 4) system per point
+    systems = rows.transpose(2, 0, 1, 3).reshape(count, 2 * views, 4)
+    norms = np.linalg.norm(systems, axis=2, keepdims=True)
+    weights = np.repeat(visible.T, 2, axis=1)[:, :, None] & (norms > 0)
+    systems = np.where(weights, systems / np.where(norms > 0, norms, 1.0), 0.0)
+    
+    _, _, vh = np.linalg.svd(systems)
+    homogeneous = vh[:, -1, :]
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        points = homogeneous[:, :3] / homogeneous[:, 3:]
+    
+    points[visible.sum(axis=0) < 2] = np.nan
+    errors = reprojection_errors(projections, points, pixels, visible)
+    
+    return points, errors
+
+
+def register():
+    """Register module"""
+    pass
+
+
+def unregister():
+    """Unregister module"""
+    pass
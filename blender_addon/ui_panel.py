@@ -60,11 +60,29 @@ class AIPOSE_PT_MainPanel(Panel):
         box.label(text="Render Settings:", icon='CAMERA_DATA')
         box.prop(scene, "ai_pose_render_resolution", text="Resolution")
         box.prop(scene, "ai_pose_show_bones", text="Show Bones in Render")
+        box.prop(scene, "ai_pose_fast_capture", text="Fast Capture (Workbench)")
+        box.prop(scene, "ai_pose_bone_mask", text="Detect Bones in Mask")
         
         layout.separator()
         
         # Main action button
         box = layout.box()
+        
+        from . import pose_job
+        job = pose_job.get_active_job()
+        if job is not None:
+            # A job is in flight; the viewport stays usable meanwhile
+            box.label(text=job.message or "Working...", icon='SORTTIME')
+            row = box.row()
+            row.scale_y = 1.5
+            row.operator("aipose.cancel_job", icon='CANCEL', text="Cancel")
+            
+            layout.separator()
+            
+            row = layout.row()
+            row.operator("aipose.reset_pose", icon='LOOP_BACK', text="Reset to Rest Pose")
+            return
+        
         col = box.column(align=True)
         col.scale_y = 1.5
         
@@ -103,6 +121,84 @@ class AIPOSE_PT_MainPanel(Panel):
         row.operator("aipose.reset_pose", icon='LOOP_BACK', text="Reset to Rest Pose")
 
 
+class AIPOSE_PT_BatchPanel(Panel):
+    """Panel for batch pose generation"""
+    bl_label = "Batch Generation"
+    bl_idname = "AIPOSE_PT_batch_panel"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = 'AI Pose'
+    bl_parent_id = "AIPOSE_PT_main_panel"
+    bl_options = {'DEFAULT_CLOSED'}
+    
+    def draw(self, context):
+        layout = self.layout
+        scene = context.scene
+        
+        box = layout.box()
+        box.label(text="Prompts (one per line):", icon='TEXT')
+        box.prop(scene, "ai_pose_batch_prompts", text="")
+        box.prop(scene, "ai_pose_batch_max_in_flight")
+        
+        from . import pose_job
+        can_generate = (
+            scene.ai_pose_target_object is not None and
+            scene.ai_pose_armature is not None and
+            scene.ai_pose_batch_prompts is not None and
+            bool(scene.ai_pose_workflow_path.strip()) and
+            pose_job.get_active_job() is None
+        )
+        
+        row = layout.row()
+        row.scale_y = 1.2
+        row.operator("aipose.generate_batch", icon='ACTION', text="Generate Batch")
+        row.enabled = can_generate
+        
+        layout.label(text="Each pose is stored as an action", icon='INFO')
+
+
+class AIPOSE_PT_TimingPanel(Panel):
+    """Panel showing where the time of the last job went"""
+    bl_label = "Last Run Timing"
+    bl_idname = "AIPOSE_PT_timing_panel"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = 'AI Pose'
+    bl_parent_id = "AIPOSE_PT_main_panel"
+    bl_options = {'DEFAULT_CLOSED'}
+    
+    def draw(self, context):
+        layout = self.layout
+        
+        from . import profiling
+        trace = profiling.get_last_trace()
+        if trace is None:
+            layout.label(text="No job has run yet", icon='INFO')
+            return
+        
+        box = layout.box()
+        box.label(text=f"{trace.name}: {trace.status} in {trace.duration:.2f}s", icon='TIME')
+        
+        # Phase durations, in pipeline order
+        col = box.column(align=True)
+        for name, seconds in trace.phase_totals():
+            row = col.row()
+            row.label(text=name.replace('_', ' ').capitalize())
+            row.label(text=f"{seconds:.2f}s")
+        
+        if trace.counters:
+            box = layout.box()
+            box.label(text="Counters:", icon='LINENUMBERS_ON')
+            col = box.column(align=True)
+            for name, value in sorted(trace.counters.items()):
+                row = col.row()
+                row.label(text=name.replace('_', ' ').capitalize())
+                if name.startswith('bytes_'):
+                    row.label(text=f"{value / (1024 * 1024):.2f} MB")
+                else:
+                    row.label(text=f"{int(value)}")
+
+
 class AIPOSE_PT_WorkflowPanel(Panel):
     """Panel for workflow management"""
     bl_label = "ComfyUI Workflow"
@@ -228,6 +324,8 @@ class AIPOSE_PT_HelpPanel(Panel):
 # List of panel classes
 classes = [
     AIPOSE_PT_MainPanel,
+    AIPOSE_PT_BatchPanel,
+    AIPOSE_PT_TimingPanel,
     AIPOSE_PT_WorkflowPanel,
     AIPOSE_PT_ConnectionPanel,
     AIPOSE_PT_HelpPanel,